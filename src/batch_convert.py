@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+PDF to Markdown Converter - Batch Script
+
+Converts many PDFs in one non-interactive run. Inputs may be PDF files,
+directories (searched recursively), glob patterns or list files holding one
+path per line (prefix them with ``@``). The offline converter runs in a
+process pool; the AI converter runs documents concurrently on threads that
+share the process-wide request budget.
+
+Exit codes: 0 if every file converted, 1 if any failed, 2 if no PDFs were
+found, 130 if interrupted.
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import logging
+import argparse
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Progress goes to stdout on its own handler; the converters configure their
+# own logging, which would otherwise repeat every batch line
+logger = logging.getLogger("batch_convert")
+logger.setLevel(logging.INFO)
+logger.propagate = False
+_handler = logging.StreamHandler(sys.stdout)
+_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+logger.addHandler(_handler)
+
+EXIT_OK = 0
+EXIT_FAILURES = 1
+EXIT_NO_INPUT = 2
+EXIT_INTERRUPTED = 130
+
+
+def _expand(source: str) -> Iterable[Path]:
+    """PDF paths named by one command-line input."""
+    if source.startswith("@"):
+        with open(source[1:], 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    yield from _expand(line)
+        return
+
+    path = Path(source).expanduser()
+    if path.is_dir():
+        yield from sorted(p for p in path.rglob("*") if p.suffix.lower() == ".pdf" and p.is_file())
+    elif path.is_file() or not any(c in source for c in "*?["):
+        # Missing files are kept so they show up as failures in the summary
+        yield path
+    else:
+        yield from sorted(Path(p) for p in glob.glob(str(path), recursive=True) if p.lower().endswith(".pdf"))
+
+
+def collect_inputs(sources: List[str]) -> List[Path]:
+    """Resolve inputs to a de-duplicated list of PDF files in input order."""
+    seen = set()
+    pdfs = []
+    for source in sources:
+        for path in _expand(source):
+            resolved = path.resolve()
+            if resolved not in seen:
+                seen.add(resolved)
+                pdfs.append(resolved)
+    return pdfs
+
+
+def assign_output_dirs(pdfs: List[Path], output_root: Path) -> List[Path]:
+    """Give every PDF its own output directory, keeping names unique."""
+    used = set()
+    output_dirs = []
+    for pdf in pdfs:
+        name = pdf.stem
+        suffix = 1
+        while name in used:
+            suffix += 1
+            name = f"{pdf.stem}_{suffix}"
+        used.add(name)
+        output_dirs.append(output_root / name)
+    return output_dirs
+
+
+def convert_original(pdf_path: str, output_dir: str, incremental: bool) -> Tuple[Optional[str], float, Optional[Dict[str, Any]]]:
+    """Convert one PDF with the offline processor (runs in a worker process).
+
+    Returns the output file (None on failure), the conversion time and the
+    tokens spent (None, as no model is used).
+    """
+    from pdf_to_markdown_original.document import PDFDocument
+    from pdf_to_markdown_original.processor import PDFProcessor
+
+    start = time.monotonic()
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    # Close each file's text engine handle before the worker takes the next one
+    with PDFDocument(pdf_path) as document:
+        processor = PDFProcessor(pdf_path, output_dir, document=document)
+        output_file = processor.process(incremental=incremental)
+    return output_file, time.monotonic() - start, None
+
+
+def convert_ai(pdf_path: str, output_dir: str, incremental: bool, resume: bool) -> Tuple[Optional[str], float, Optional[Dict[str, Any]]]:
+    """Convert one PDF with the AI processor (runs on a worker thread)."""
+    from pdf_to_markdown_autogen.ai_processor import AIProcessor
+
+    start = time.monotonic()
+    processor = AIProcessor(pdf_path, incremental=incremental, resume=resume, output_dir=output_dir)
+    with processor.document:
+        output_file = processor.process()
+    output = str(output_file) if output_file is not None else None
+    return output, time.monotonic() - start, processor.token_usage.as_dict()
+
+
+def _submit(executor: Executor, args: argparse.Namespace, pdf: Path, output_dir: Path):
+    if args.engine == "original":
+        return executor.submit(convert_original, str(pdf), str(output_dir), args.incremental)
+    return executor.submit(convert_ai, str(pdf), str(output_dir), args.incremental, args.resume)
+
+
+def run_batch(args: argparse.Namespace, jobs: List[Tuple[Path, Path]], summary_file) -> Dict[str, int]:
+    """Convert every job and write one summary line per file as it finishes."""
+    counts = {"ok": 0, "failed": 0, "skipped": 0}
+
+    def report(entry: Dict[str, Any]) -> None:
+        counts[entry["status"]] += 1
+        summary_file.write(json.dumps(entry) + "\n")
+        summary_file.flush()
+        done = sum(counts.values())
+        logger.info(f"[{done}/{len(jobs)}] {entry['status']}: {entry['input']}")
+
+    pending = []
+    for pdf, output_dir in jobs:
+        if args.skip_existing and (output_dir / f"{pdf.stem}.md").exists():
+            report({"input": str(pdf), "status": "skipped", "output": str(output_dir / f"{pdf.stem}.md")})
+        else:
+            pending.append((pdf, output_dir))
+
+    if args.engine == "original":
+        executor = ProcessPoolExecutor(max_workers=args.workers)
+    else:
+        executor = ThreadPoolExecutor(max_workers=args.workers)
+
+    futures = {}
+    try:
+        futures = {_submit(executor, args, pdf, output_dir): pdf for pdf, output_dir in pending}
+
+        for future in as_completed(futures):
+            pdf = futures[future]
+            entry: Dict[str, Any] = {"input": str(pdf)}
+            try:
+                output_file, seconds, tokens = future.result()
+                if output_file is None:
+                    entry.update(status="failed", error="Conversion failed; see the log for details")
+                else:
+                    entry.update(status="ok", output=output_file)
+                entry["seconds"] = round(seconds, 2)
+                if tokens is not None:
+                    entry["tokens"] = tokens
+            except Exception as e:
+                entry.update(status="failed", error=str(e))
+            report(entry)
+    except KeyboardInterrupt:
+        # Leaving a with block would wait for every queued document (and
+        # its LLM calls); drop them and only let the running ones finish
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=False)
+        raise
+    executor.shutdown()
+
+    return counts
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Convert many PDFs to Markdown in one run")
+    parser.add_argument("inputs", nargs="+",
+                        help="PDF files, directories, glob patterns or @list files (one path per line)")
+    parser.add_argument("-o", "--output-dir", default="output",
+                        help="Root output directory; each PDF gets its own subdirectory (default: output)")
+    parser.add_argument("--engine", choices=["original", "ai"], default="original",
+                        help="Offline converter or the AI converter (default: original)")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="Documents converted at once (default: CPU count for original, 2 for ai)")
+    parser.add_argument("--summary", default=None,
+                        help="JSON-lines status file (default: <output-dir>/batch_summary.jsonl); "
+                             "appended to with --resume")
+    parser.add_argument("--skip-existing", action="store_true",
+                        help="Skip PDFs whose markdown output already exists")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Re-convert only pages changed since each file's previous incremental run")
+    parser.add_argument("--resume", action="store_true",
+                        help="Resume interrupted AI conversions from their checkpoints")
+    args = parser.parse_args(argv)
+    if args.workers is None:
+        args.workers = (os.cpu_count() or 1) if args.engine == "original" else 2
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+
+    pdfs = collect_inputs(args.inputs)
+    if not pdfs:
+        logger.error("No PDF files found in the given inputs")
+        return EXIT_NO_INPUT
+
+    output_root = Path(args.output_dir)
+    output_root.mkdir(parents=True, exist_ok=True)
+    jobs = list(zip(pdfs, assign_output_dirs(pdfs, output_root)))
+    summary_path = Path(args.summary) if args.summary else output_root / "batch_summary.jsonl"
+
+    logger.info(f"Converting {len(jobs)} PDFs with the {args.engine} engine ({args.workers} at a time)")
+    start = time.monotonic()
+    try:
+        # A resumed batch keeps the results of the runs before it
+        with open(summary_path, 'a' if args.resume else 'w', encoding='utf-8') as summary_file:
+            counts = run_batch(args, jobs, summary_file)
+    except KeyboardInterrupt:
+        logger.error("Batch interrupted")
+        return EXIT_INTERRUPTED
+
+    logger.info(f"Finished in {time.monotonic() - start:.1f}s: {counts['ok']} converted, "
+                f"{counts['failed']} failed, {counts['skipped']} skipped. Summary: {summary_path}")
+    return EXIT_FAILURES if counts["failed"] else EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,9 +4,28 @@ PDF to Markdown Converter (AutoGen Implementation)
 
 __version__ = "2.0.0"
 
-from .ai_processor import AIProcessor
-from .agents.pdf_extractor import PDFExtractorAgent
-from .agents.md_validator import MDValidatorAgent
-from .config import api_config
+import importlib
 
-__all__ = ['AIProcessor', 'PDFExtractorAgent', 'MDValidatorAgent', 'api_config']
+# Exports are imported on first access so that importing the package (or
+# one of its utilities) does not load the agents and their dependencies
+_EXPORTS = {
+    'AIProcessor': '.ai_processor',
+    'PDFExtractorAgent': '.agents.pdf_extractor',
+    'MDValidatorAgent': '.agents.md_validator',
+    'api_config': '.config',
+    'processing_config': '.config',
+}
+
+__all__ = ['AIProcessor', 'PDFExtractorAgent', 'MDValidatorAgent', 'api_config', 'processing_config']
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -1,4 +1,17 @@
-from .pdf_extractor import PDFExtractorAgent
-from .md_validator import MDValidatorAgent
+import importlib
+
+# Each agent module is imported on first access
+_EXPORTS = {
+    'PDFExtractorAgent': '.pdf_extractor',
+    'MDValidatorAgent': '.md_validator',
+}
 
 __all__ = ['PDFExtractorAgent', 'MDValidatorAgent']
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
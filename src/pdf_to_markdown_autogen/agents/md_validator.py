@@ -1,14 +1,61 @@
-from typing import Dict, Any, List, Tuple
-import autogen
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Tuple, Union
 import re
-import time
 import logging
-import random
 import os
-from openai import OpenAI, AzureOpenAI
+
+from ..config import processing_config
+from ..utils.http_clients import get_client
+from ..utils.llm_engine import ChatCompletionEngine
+from ..utils.local_validation import (
+    PageCoverage, PageIndex, ValidationReport, page_risk, strip_page_markers, validate_locally
+)
+from ..utils.rate_limiter import shared_limiter
+from ..utils.tokens import MIN_REPLY_TOKENS, count_message_tokens, model_limits, reply_token_limit
 
 logger = logging.getLogger(__name__)
 
+VALIDATION_SYSTEM_PROMPT = "You are an expert markdown validator. Your task is to perform a detailed analysis of markdown conversion accuracy, comparing the converted markdown against the original text. Be thorough and specific in your analysis."
+
+VALIDATION_PROMPT_TEMPLATE = """Compare this section of markdown content with the original text and report any discrepancies:
+
+Markdown Content ({label}):
+{markdown}
+
+Original Text ({label}):
+{original}
+
+Please provide a detailed analysis focusing on:
+1. Content completeness - is all original text preserved?
+2. Structure accuracy - are headings, lists, and tables formatted correctly?
+3. Formatting consistency - is markdown syntax used properly?
+4. Special elements - are code blocks, links, and images handled correctly?
+
+Format your response as:
+CONTENT: [analysis of content preservation]
+STRUCTURE: [analysis of structural elements]
+FORMATTING: [analysis of markdown syntax]
+SPECIAL_ELEMENTS: [analysis of special content]
+ISSUES: [list any discrepancies found]
+VERDICT: [PASS if the markdown faithfully preserves the original, otherwise FAIL]
+"""
+
+VERDICT_PATTERN = re.compile(r'VERDICT:\s*\**\s*(PASS|FAIL)', re.IGNORECASE)
+
+
+@dataclass
+class ReviewUnit:
+    """Markdown paired with the source pages it was converted from, for model review."""
+
+    label: str
+    pages: List[PageCoverage]  # Candidate pages the unit covers
+    markdown: str
+    original: str
+    location: str = ""  # Where the markdown sits in the document, for reports
+    request: List[Dict[str, str]] = field(default_factory=list)
+    page_count: int = 1  # Source pages sent with the unit
+
+
 class MDValidatorAgent:
     """Agent responsible for validating markdown content."""
     
@@ -20,89 +67,37 @@ class MDValidatorAgent:
         # Extract API configuration
         api_config = config.get("config_list", [{}])[0]
         
-        # Initialize appropriate client
         if self.api_provider == "azure":
-            self.client = AzureOpenAI(
-                api_version=api_config.get('api_version', '2024-12-01-preview'),
-                azure_endpoint=api_config.get('azure_endpoint', api_config.get('base_url')),
-                api_key=api_config.get('api_key')
-            )
             self.model = api_config.get('model', 'gpt-4o')  # Store model name for Azure
-            self.max_tokens = min(16384, self.config.get('max_tokens', 16384))  # Ensure we don't exceed model's limit
         else:
-            self.client = OpenAI(
-                api_key=api_config.get('api_key'),
-                base_url=api_config.get('base_url')
-            )
             self.model = api_config.get('model', 'gpt-4-turbo-preview')  # Store model name for OpenAI
-            self.max_tokens = self.config.get('max_tokens', 40000)
-        
-        self.agent = autogen.AssistantAgent(
-            name="md_validator",
-            system_message="""You are an expert at validating markdown content.
-            Your task is to:
-            1. Compare markdown content with original text
-            2. Ensure all content is preserved
-            3. STRICTLY Verify formatting is correct
-            4. Report any discrepancies
-            """,
-            llm_config=config
-        )
-        
-        self.min_request_interval = 3.0
-        self.max_retries = 5
-        self.base_delay = 60
-        self.rate_limit_history = []
-        self.last_request_time = 0
-        self.token_bucket = {
-            "tokens": 1,
-            "last_update": time.time(),
-            "rate": 1/3.0
-        }
-    
-    def _wait_for_rate_limit(self):
-        """Implement token bucket algorithm for rate limiting with dynamic intervals."""
-        current_time = time.time()
-        time_since_last_request = current_time - self.last_request_time
         
-        # Adjust interval based on rate limit history
-        if self.rate_limit_history:
-            time_since_last_rate_limit = current_time - self.rate_limit_history[-1]
-            if time_since_last_rate_limit < 300:  # Within 5 minutes of last rate limit
-                self.min_request_interval *= 1.5  # Increase interval by 50%
-                # Only log significant rate limit events
-                if self.min_request_interval > 10.0:
-                    logger.info(f"Rate limit history detected. Increased interval to {self.min_request_interval:.2f} seconds")
+        # Replies are capped at what the model can produce
+        self.limits = model_limits(self.model, processing_config.context_window, processing_config.max_output_tokens)
+        self.max_tokens = reply_token_limit(self.limits, self.config.get('max_tokens'))
         
-        if time_since_last_request < self.min_request_interval:
-            sleep_time = self.min_request_interval - time_since_last_request
-            # Only log significant wait times
-            if sleep_time > 5.0:
-                logger.info(f"Rate limiting: waiting {sleep_time:.2f} seconds")
-            time.sleep(sleep_time)
+        # Concurrent engine for chunk validation
+        self.engine = ChatCompletionEngine(
+            api_config, self.api_provider, self.model, self.max_tokens,
+            max_concurrency=processing_config.llm_concurrency,
+            limiter=shared_limiter(processing_config.requests_per_minute, processing_config.tokens_per_minute),
+            max_retries=processing_config.max_retries,
+            limits=self.limits
+        )
         
-        self.last_request_time = time.time()
+        # Local comparison decides; only suspicious pages reach the model
+        self.mode = processing_config.validation_mode
+        self.min_coverage = processing_config.validation_min_coverage
+        self.escalate_below = processing_config.validation_escalate_below
+        self.max_pages = processing_config.validation_max_pages
+        self.max_review_tokens = processing_config.validation_max_tokens
+        self.last_report: Optional[ValidationReport] = None
+        self.last_reviewed_pages: List[int] = []
     
-    def _handle_rate_limit(self, error: Exception) -> None:
-        """Handle rate limit errors with exponential backoff and jitter."""
-        if "429" in str(error):
-            self.rate_limit_history.append(time.time())
-            
-            for attempt in range(self.max_retries):
-                # Calculate delay with exponential backoff and jitter
-                delay = self.base_delay * (2 ** attempt)  # Exponential backoff
-                jitter = random.uniform(0, delay * 0.1)  # 10% jitter
-                total_delay = delay + jitter
-                
-                # Only log significant rate limit events
-                if attempt >= 2 or total_delay > 120:
-                    logger.info(f"Rate limit hit. Waiting {total_delay:.2f} seconds before retry {attempt + 1}/{self.max_retries}")
-                time.sleep(total_delay)
-            
-            # Reset rate limit history after successful retries
-            self.rate_limit_history = []
-            raise Exception(f"Rate limit exceeded after {self.max_retries} retries")
-        raise error
+    @property
+    def client(self):
+        """Pooled client shared with every other agent in the process, created on first use."""
+        return get_client(self.engine.api_config, self.api_provider)
     
     def _validate_content_length(self, markdown_content: str, original_text: List[str]) -> bool:
         """Validate that the markdown content length matches the original text."""
@@ -137,118 +132,213 @@ class MDValidatorAgent:
         
         return True
     
-    def _split_into_semantic_chunks(self, content: str, max_tokens: int = 150000) -> List[str]:
-        """Split content into semantic chunks (by sections/paragraphs) respecting token limits."""
-        # Split on major section boundaries first
-        sections = re.split(r'\n#+\s', content)
-        
-        chunks = []
-        current_chunk = ""
-        current_tokens = 0
-        estimated_tokens_per_char = 1.5  # Conservative estimate
-        
-        for section in sections:
-            # Rough token estimate for this section
-            section_tokens = len(section) * estimated_tokens_per_char
-            
-            if current_tokens + section_tokens > max_tokens:
-                if current_chunk:
-                    chunks.append(current_chunk)
-                current_chunk = section
-                current_tokens = section_tokens
+    def _build_validation_request(self, markdown: str, original: str, label: str) -> List[Dict[str, str]]:
+        return [
+            {"role": "system", "content": VALIDATION_SYSTEM_PROMPT},
+            {"role": "user", "content": VALIDATION_PROMPT_TEMPLATE.format(label=label, markdown=markdown, original=original)}
+        ]
+    
+    @staticmethod
+    def _reports_issues(result: str) -> bool:
+        """Whether a model reply flags the section as unfaithful."""
+        match = VERDICT_PATTERN.search(result)
+        if match:
+            return match.group(1).upper() == "FAIL"
+        return "discrepancy" in result.lower() or "missing" in result.lower()
+    
+    @staticmethod
+    def _page_markdown(markdown_content: str, page: PageCoverage) -> str:
+        """The markdown around a page's located span, widened to whole paragraphs."""
+        start, end = page.markdown_span
+        start = markdown_content.rfind("\n\n", 0, start)
+        end = markdown_content.find("\n\n", end)
+        return markdown_content[start + 2 if start >= 0 else 0:end if end >= 0 else len(markdown_content)]
+    
+    def _review_units(self, markdown_content: str, pages: List[str], index: PageIndex,
+                      candidates: List[PageCoverage]) -> List[ReviewUnit]:
+        """Pair candidate pages with the markdown converted from them.
+
+        With page markers every unit is one converted chunk and its exact
+        source pages; otherwise each page is paired with the markdown its
+        text was found in.
+        """
+        units: List[ReviewUnit] = []
+        by_anchor: Dict[int, ReviewUnit] = {}
+        for page in candidates:
+            anchor = index.anchor_for_page(page.page)
+            if anchor is None:
+                units.append(ReviewUnit(
+                    label=f"page {page.page}",
+                    pages=[page],
+                    markdown=strip_page_markers(self._page_markdown(markdown_content, page)),
+                    original=pages[page.page - 1],
+                ))
+            elif id(anchor) in by_anchor:
+                by_anchor[id(anchor)].pages.append(page)
             else:
-                if current_chunk:
-                    current_chunk += "\n# " + section
-                else:
-                    current_chunk = section
-                current_tokens += section_tokens
-        
-        if current_chunk:
-            chunks.append(current_chunk)
-        
-        return chunks
+                first_line, last_line = index.line_range(markdown_content, anchor)
+                unit = ReviewUnit(
+                    label=anchor.label,
+                    pages=[page],
+                    markdown=strip_page_markers(markdown_content[anchor.start:anchor.end]).strip(),
+                    original="\n\n".join(pages[anchor.first_page - 1:anchor.last_page]),
+                    location=f"markdown lines {first_line}-{last_line}",
+                    page_count=anchor.last_page - anchor.first_page + 1,
+                )
+                by_anchor[id(anchor)] = unit
+                units.append(unit)
+        units.sort(key=lambda unit: unit.pages[0].page)
+        for unit in units:
+            unit.request = self._build_validation_request(unit.markdown, unit.original, unit.label)
+        return units
+    
+    def _select_within_budget(self, units: List[ReviewUnit], risks: List[float],
+                              budgeted: bool = True) -> Tuple[List[ReviewUnit], List[ReviewUnit]]:
+        """Pick the riskiest review units that fit the per-document budget.
 
-    def validate_markdown(self, markdown_content: str, original_text: str) -> Tuple[bool, str]:
-        """Validate markdown content against original text."""
+        Units too large for the model's context are always left out. Each
+        unit counts every source page it covers against VALIDATION_MAX_PAGES.
+        Returns the selected units and the units left unreviewed, both in
+        document order.
+        """
+        selected, skipped = [], []
+        tokens_used = 0
+        pages_used = 0
+        for risk, unit in sorted(zip(risks, units), key=lambda pair: -pair[0]):
+            tokens = count_message_tokens(unit.request, self.model)
+            if tokens + MIN_REPLY_TOKENS > self.limits.context_window:
+                logger.warning(f"{unit.label} is too large for the model to review ({tokens} tokens)")
+                skipped.append(unit)
+                continue
+            # A section spanning several pages counts each of them
+            over_pages = budgeted and self.max_pages and pages_used + unit.page_count > self.max_pages
+            over_tokens = budgeted and self.max_review_tokens and tokens_used + tokens > self.max_review_tokens
+            if over_pages or over_tokens:
+                skipped.append(unit)
+                continue
+            tokens_used += tokens
+            pages_used += unit.page_count
+            selected.append(unit)
+        order = {id(unit): i for i, unit in enumerate(units)}
+        selected.sort(key=lambda unit: order[id(unit)])
+        skipped.sort(key=lambda unit: order[id(unit)])
+        if skipped:
+            logger.info(f"Review budget spent: {len(selected)} sections ({pages_used} pages), {tokens_used} tokens; "
+                        f"{len(skipped)} candidate sections not reviewed")
+        return selected, skipped
+    
+    def _validate_with_model(self, units: List[ReviewUnit]) -> Tuple[List[str], List[str]]:
+        """Send validation requests concurrently; return all replies and the failing labels."""
+        logger.info(f"\nValidator: Sending {len(units)} validation requests to AI model...")
+        results = self.engine.complete_all([unit.request for unit in units])
+        failed = []
+        for unit, result in zip(units, results):
+            logger.info(f"\nValidator Analysis for {unit.label}:\n{result}")
+            if self._reports_issues(result):
+                failed.append(unit.label)
+                logger.warning(f"\nDiscrepancies found in {unit.label}" + (f" ({unit.location})" if unit.location else ""))
+        return results, failed
+    
+    def validate_markdown(self, markdown_content: str, original_text: Union[str, List[str]],
+                          page_images: Optional[Dict[int, int]] = None) -> Tuple[bool, str]:
+        """Validate markdown content against original text.
+
+        ``original_text`` is preferably the list of page texts so problems
+        can be reported by page, and ``page_images`` the number of images
+        found on each page. Markdown is paired with its source pages through
+        the extractor's page markers. The local comparison runs first; with
+        the default ``escalate`` mode only pages whose coverage is below
+        VALIDATION_ESCALATE_BELOW are sent to the model, and the document
+        passes when coverage meets VALIDATION_MIN_COVERAGE or the model
+        clears every escalated page. ``sampled`` sends the riskiest pages
+        (low coverage, tables, figures, OCR-like text) whatever their
+        coverage. Both stay within VALIDATION_MAX_PAGES and
+        VALIDATION_MAX_TOKENS per document. ``local`` never calls the model
+        and ``full`` sends every page to it.
+        """
         try:
-            # Split content into semantic chunks with token limit consideration
-            md_chunks = self._split_into_semantic_chunks(markdown_content)
-            orig_chunks = self._split_into_semantic_chunks(original_text)
+            pages = [original_text] if isinstance(original_text, str) else list(original_text)
+            page_images = page_images or {}
+            index = PageIndex.from_markdown(markdown_content)
+            report = validate_locally(pages, markdown_content, index)
+            self.last_report = report
+            self.last_reviewed_pages = []
+            details = [report.summary()]
+            logger.info(f"\nValidator: local coverage {report.coverage:.1%} across {len(pages)} pages"
+                        + ("" if index else " (no page markers; locating pages by content)"))
+            for issue in report.structure_issues:
+                logger.warning(f"Structure issue: {issue}")
             
-            # Use the smaller number of chunks to avoid index errors
-            num_chunks = min(len(md_chunks), len(orig_chunks))
+            is_valid = report.coverage >= self.min_coverage
+            # A failing document escalates every page that drags it down
+            threshold = self.escalate_below if is_valid else max(self.escalate_below, self.min_coverage)
+            suspicious = report.pages_below(threshold)
             
-            if num_chunks > 1:
-                logger.info(f"Content split into {num_chunks} semantic chunks for validation")
+            candidates = []
+            if self.mode == "escalate":
+                candidates = suspicious
+            elif self.mode in ("sampled", "full"):
+                candidates = [page for page in report.pages if page.word_count]
             
-            validation_results = []
-            has_discrepancies = False
+            # Pages with nothing found in the markdown need no second opinion
+            absent = [page for page in candidates + suspicious if page.markdown_span is None]
+            absent = sorted({page.page: page for page in absent}.values(), key=lambda page: page.page)
+            for page in absent:
+                details.append(f"Page {page.page}: no content found in the markdown")
             
-            # Validate each chunk
-            for i in range(num_chunks):
-                self._wait_for_rate_limit()
-                logger.info(f"\n=== Starting validation of chunk {i + 1}/{num_chunks} ===")
-                logger.info("\nValidator: Analyzing markdown structure and content...")
-                
-                validation_prompt = f"""Compare this section of markdown content with the original text and report any discrepancies:
-
-Markdown Content (Section {i + 1}/{num_chunks}):
-{md_chunks[i]}
-
-Original Text (Section {i + 1}/{num_chunks}):
-{orig_chunks[i]}
-
-Please provide a detailed analysis focusing on:
-1. Content completeness - is all original text preserved?
-2. Structure accuracy - are headings, lists, and tables formatted correctly?
-3. Formatting consistency - is markdown syntax used properly?
-4. Special elements - are code blocks, links, and images handled correctly?
-
-Format your response as:
-CONTENT: [analysis of content preservation]
-STRUCTURE: [analysis of structural elements]
-FORMATTING: [analysis of markdown syntax]
-SPECIAL_ELEMENTS: [analysis of special content]
-ISSUES: [list any discrepancies found]
-"""
-                
-                logger.info("\nValidator: Sending validation request to AI model...")
-                response = self.client.chat.completions.create(
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": "You are an expert markdown validator. Your task is to perform a detailed analysis of markdown conversion accuracy, comparing the converted markdown against the original text. Be thorough and specific in your analysis."
-                        },
-                        {
-                            "role": "user",
-                            "content": validation_prompt
-                        }
-                    ],
-                    model=self.model,  # Only need model parameter for Azure OpenAI
-                    max_tokens=self.max_tokens
+            if self.mode not in ("escalate", "sampled", "full") or not candidates:
+                if is_valid:
+                    logger.info("\nValidation complete: No significant issues found")
+                else:
+                    logger.warning("\nValidation complete: Issues found in the conversion")
+                return is_valid, "\n".join(details)
+            
+            units = self._review_units(
+                markdown_content, pages, index, [page for page in candidates if page.markdown_span is not None]
+            )
+            if self.mode == "full":
+                selected, skipped = self._select_within_budget(units, [0.0] * len(units), budgeted=False)
+            else:
+                risks = []
+                for unit in units:
+                    risks.append(max(
+                        page_risk(page, pages[page.page - 1], unit.markdown, page_images.get(page.page, 0))
+                        for page in unit.pages
+                    ))
+                selected, skipped = self._select_within_budget(
+                    [unit for unit, risk in zip(units, risks) if risk > 0], [risk for risk in risks if risk > 0]
+                )
+            
+            failed = [f"page {page.page}" for page in absent]
+            if selected:
+                logger.info(f"Sending {len(selected)} sections covering "
+                            f"{sum(len(unit.pages) for unit in selected)}/{len(pages)} pages to the model for review")
+                results, model_failed = self._validate_with_model(selected)
+                failed.extend(model_failed)
+                self.last_reviewed_pages = sorted(page.page for unit in selected for page in unit.pages)
+                details.append("=== Model Review of Selected Pages ===")
+                details.extend(
+                    f"--- {unit.label}" + (f" ({unit.location})" if unit.location else "") + f" ---\n{result}"
+                    for unit, result in zip(selected, results)
                 )
-                
-                if not response.choices:
-                    raise Exception(f"Empty response received from the model for chunk {i + 1}")
-                
-                result = response.choices[0].message.content
-                logger.info(f"\nValidator Analysis for Chunk {i + 1}:\n{result}")
-                validation_results.append(result)
-                
-                # Check for discrepancies in this chunk
-                if "discrepancy" in result.lower() or "missing" in result.lower():
-                    has_discrepancies = True
-                    logger.warning(f"\nDiscrepancies found in chunk {i + 1}")
             
-            # Combine validation results
-            combined_result = "\n\n=== Complete Validation Results ===\n\n" + "\n\n---\n\n".join(validation_results)
+            reviewed = ", ".join(str(number) for number in self.last_reviewed_pages) or "none"
+            details.append(f"Pages reviewed by the model: {reviewed}")
+            skipped_pages = sorted((page for unit in skipped for page in unit.pages), key=lambda page: page.page)
+            if skipped_pages:
+                details.append("Candidate pages not reviewed (budget or size): " + ", ".join(str(page.page) for page in skipped_pages))
             
-            if has_discrepancies:
-                logger.warning("\nValidation complete: Issues found in the conversion")
+            # The model's review overrides low coverage for the pages it
+            # cleared; pages the budget left out are judged on coverage alone
+            unreviewed_failing = [page for page in skipped_pages if page.coverage < self.min_coverage]
+            is_valid = not failed and (is_valid or not unreviewed_failing)
+            if failed:
+                logger.warning(f"\nValidation complete: Issues found in {', '.join(failed)}")
+            elif not is_valid:
+                logger.warning("\nValidation complete: Low coverage on pages the model did not review")
             else:
                 logger.info("\nValidation complete: No significant issues found")
-            
-            return not has_discrepancies, combined_result
+            return is_valid, "\n\n".join(details)
             
         except Exception as e:
             logger.error(f"Error validating content: {str(e)}")
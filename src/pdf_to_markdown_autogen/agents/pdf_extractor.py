@@ -1,25 +1,56 @@
-from typing import Dict, Any, List, Tuple
-import autogen
+from typing import TYPE_CHECKING, Dict, Any, Iterable, List, Tuple, Optional, Union
 from pathlib import Path
-import PyPDF2
-import pdf2image
+import hashlib
+import json
 import os
-import base64
-from PIL import Image
-import io
-import cv2
-import numpy as np
-import time
 import logging
-import random
-from openai import OpenAI, AzureOpenAI
+from concurrent.futures import ProcessPoolExecutor
+
+from ..utils.document import PDFDocument, as_document
+from ..config import processing_config
+from ..utils.cache import ConversionCache
+from ..utils.checkpoint import CheckpointJournal
+from ..utils.chunking import Chunk, Chunker
+from ..utils.http_clients import get_client
+from ..utils.llm_engine import ChatCompletionEngine
+from ..utils.local_validation import END_OF_PAGES_MARKER, page_marker
+from ..utils.pdf_backend import RENDER_FALLBACK, resolve_backend
+from ..utils.rate_limiter import shared_limiter
+from ..utils.tokens import chunk_token_budget, count_message_tokens, model_limits, reply_token_limit
+from ..utils.manifest import ConversionManifest, contiguous_runs
+
+if TYPE_CHECKING:
+    # OpenCV and NumPy are only imported once images are extracted
+    import numpy as np
+    from ..utils.image_regions import ImageResult, PageImages
 
 logger = logging.getLogger(__name__)
 
+CONVERSION_SYSTEM_PROMPT = "You are an expert PDF content analyzer and markdown converter. Your task is to convert PDF content to perfectly formatted markdown while preserving all content and structure exactly."
+
+CONTEXT_TEMPLATE = """Preceding context (already converted; for continuity only, do not include it in your output):
+{context}
+
+"""
+
+CONVERSION_PROMPT_TEMPLATE = """Convert this PDF content to markdown while preserving all formatting and structure:
+
+{context_section}PDF Content (Chunk {index}/{total}, pages {pages}):
+{text}
+
+Requirements:
+1. Preserve exact text content and order
+2. Maintain heading hierarchy (use #, ##, ### etc.)
+3. Format lists and tables correctly
+4. Preserve code blocks and special formatting
+5. Handle any complex layouts
+
+Please provide detailed markdown conversion that keeps all original content intact."""
+
 class PDFExtractorAgent:
     """Agent responsible for extracting text content from PDFs."""
     
-    def __init__(self, config: Dict[str, Any]):
+    def __init__(self, config: Dict[str, Any], image_workers: Optional[int] = None):
         """Initialize the PDF extractor agent."""
         self.config = config
         self.api_provider = os.getenv('API_PROVIDER', 'openai').lower()
@@ -27,325 +58,311 @@ class PDFExtractorAgent:
         # Extract API configuration
         api_config = config.get("config_list", [{}])[0]
         
-        # Initialize appropriate client
         if self.api_provider == "azure":
-            self.client = AzureOpenAI(
-                api_version=api_config.get('api_version', '2024-12-01-preview'),
-                azure_endpoint=api_config.get('azure_endpoint', api_config.get('base_url')),
-                api_key=api_config.get('api_key')
-            )
             self.model = api_config.get('model', 'gpt-4o')  # Store model name for Azure
-            self.max_tokens = min(16384, self.config.get('max_tokens', 16384))  # Ensure we don't exceed model's limit
         else:
-            self.client = OpenAI(
-                api_key=api_config.get('api_key'),
-                base_url=api_config.get('base_url')
-            )
             self.model = api_config.get('model', 'gpt-4-turbo-preview')
-            self.max_tokens = self.config.get('max_tokens', 40000)
         
-        self.agent = autogen.AssistantAgent(
-            name="pdf_extractor",
-            system_message="""You are an expert at analyzing PDF documents and converting them to well-formatted Markdown.
-            Your task is to:
-            1. Analyze the PDF structure and content
-            2. Extract text while preserving formatting
-            3. Handle image extraction and placement
-            4. Generate a markdown which matches the formatting in the PDF document 
-            """,
-            llm_config=config
-        )
+        # Replies are capped at what the model can produce
+        self.limits = model_limits(self.model, processing_config.context_window, processing_config.max_output_tokens)
+        self.max_tokens = reply_token_limit(self.limits, self.config.get('max_tokens'))
         
-        self.min_request_interval = 3.0
-        self.chunk_size = 4000
-        self.max_retries = 5
-        self.base_delay = 60
-        self.rate_limit_history = []
-        self.last_request_time = 0
-        self.token_bucket = {
-            "tokens": 1,
-            "last_update": time.time(),
-            "rate": 1/3.0
-        }
-    
-    def _wait_for_rate_limit(self):
-        """Implement token bucket algorithm for rate limiting with dynamic intervals."""
-        current_time = time.time()
-        time_since_last_request = current_time - self.last_request_time
+        # Concurrent engine for chunk conversion
+        self.engine = ChatCompletionEngine(
+            api_config, self.api_provider, self.model, self.max_tokens,
+            max_concurrency=processing_config.llm_concurrency,
+            limiter=shared_limiter(processing_config.requests_per_minute, processing_config.tokens_per_minute),
+            max_retries=processing_config.max_retries,
+            limits=self.limits
+        )
         
-        # Adjust interval based on rate limit history
-        if self.rate_limit_history:
-            time_since_last_rate_limit = current_time - self.rate_limit_history[-1]
-            if time_since_last_rate_limit < 300:  # Within 5 minutes of last rate limit
-                self.min_request_interval *= 1.5  # Increase interval by 50%
-                # Only log significant rate limit events
-                if self.min_request_interval > 10.0:
-                    logger.info(f"Rate limit history detected. Increased interval to {self.min_request_interval:.2f} seconds")
+        self.last_manifest: Optional[ConversionManifest] = None
         
-        if time_since_last_request < self.min_request_interval:
-            sleep_time = self.min_request_interval - time_since_last_request
-            # Only log significant wait times
-            if sleep_time > 5.0:
-                logger.info(f"Rate limiting: waiting {sleep_time:.2f} seconds")
-            time.sleep(sleep_time)
+        self.cache = None
+        if processing_config.cache_enabled:
+            self.cache = ConversionCache(processing_config.cache_dir, processing_config.cache_max_bytes)
         
-        self.last_request_time = time.time()
+        # Chunks small enough for the prompt and the converted reply to fit
+        prompt_overhead = self._prompt_overhead() + processing_config.chunk_overlap_tokens
+        chunk_tokens = chunk_token_budget(self.limits, self.max_tokens, prompt_overhead, processing_config.chunk_tokens)
+        if 0 < chunk_tokens < processing_config.chunk_tokens:
+            logger.info(f"Chunks reduced to {chunk_tokens} tokens so converted replies fit {self.model}")
+        self.chunker = Chunker(
+            max_tokens=chunk_tokens,
+            overlap_tokens=processing_config.chunk_overlap_tokens,
+            model=self.model
+        )
+        self.render_dpi = processing_config.render_dpi
+        self.render_backend = resolve_backend(processing_config.render_backend, RENDER_FALLBACK)
+        self.render_batch_size = processing_config.render_batch_size  # Pages held in memory at once
+        self.detection_scale = processing_config.detection_scale  # Downscale of the figure search pass
+        self.image_workers = image_workers if image_workers is not None else processing_config.image_workers
     
-    def _handle_rate_limit(self, error: Exception) -> None:
-        """Handle rate limit errors with exponential backoff and jitter."""
-        if "429" in str(error):
-            self.rate_limit_history.append(time.time())
-            
-            for attempt in range(self.max_retries):
-                # Calculate delay with exponential backoff and jitter
-                delay = self.base_delay * (2 ** attempt)  # Exponential backoff
-                jitter = random.uniform(0, delay * 0.1)  # 10% jitter
-                total_delay = delay + jitter
-                
-                # Only log significant rate limit events
-                if attempt >= 2 or total_delay > 120:
-                    logger.info(f"Rate limit hit. Waiting {total_delay:.2f} seconds before retry {attempt + 1}/{self.max_retries}")
-                time.sleep(total_delay)
-            
-            # Reset rate limit history after successful retries
-            self.rate_limit_history = []
-            raise Exception(f"Rate limit exceeded after {self.max_retries} retries")
-        raise error
+    def _prompt_overhead(self) -> int:
+        """Tokens of a conversion request around the chunk text.
+
+        A failing tokenizer must not stop the agent from being built, so the
+        count falls back to the character estimate.
+        """
+        request = self._build_conversion_request(Chunk(0, "", 1, 1, 0), 1)
+        try:
+            return count_message_tokens(request, self.model)
+        except Exception as e:
+            logger.warning(f"Could not count prompt tokens for {self.model}, estimating from character counts: {str(e)}")
+            return count_message_tokens(request, self.model, estimate=True)
     
-    def extract_text(self, pdf_path: str) -> List[str]:
+    @property
+    def client(self):
+        """Pooled client shared with every other agent in the process, created on first use."""
+        return get_client(self.engine.api_config, self.api_provider)
+    
+    def extract_text(self, pdf_path: Union[str, PDFDocument]) -> List[str]:
         """Extract text from PDF pages."""
-        text_content = []
-        with open(pdf_path, 'rb') as file:
-            reader = PyPDF2.PdfReader(file)
-            for page in reader.pages:
-                text_content.append(page.extract_text())
-        return text_content
+        return as_document(pdf_path).texts()
     
-    def get_text_content(self, pdf_path: str) -> str:
+    def get_text_content(self, pdf_path: Union[str, PDFDocument]) -> str:
         """Get the raw text content from the PDF file."""
-        text_content = self.extract_text(pdf_path)
-        return "\n\n".join(text_content)
+        return as_document(pdf_path).full_text()
 
-    def detect_image_boundaries(self, image: np.ndarray) -> List[Tuple[int, int, int, int]]:
+    def detect_image_boundaries(self, image: "np.ndarray") -> List[Tuple[int, int, int, int]]:
         """Detect boundaries of actual diagrams and figures in a page."""
-        # Convert to grayscale
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        
-        # Apply adaptive threshold to handle varying backgrounds
-        binary = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY_INV, 11, 2)
-        
-        # Apply morphological operations to connect components of diagrams
-        kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3,3))
-        binary = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, kernel)
-        
-        # Find contours
-        contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        
-        # Get image dimensions for relative size calculations
-        height, width = image.shape[:2]
-        min_area = (width * height) * 0.01  # Minimum 1% of page area
-        
-        # Filter and sort contours
-        image_regions = []
-        for contour in contours:
-            x, y, w, h = cv2.boundingRect(contour)
-            area = w * h
-            aspect_ratio = w / h if h != 0 else 0
-            
-            # Filter criteria for actual diagrams/figures:
-            # 1. Must be larger than min_area (eliminates text characters)
-            # 2. Must have reasonable aspect ratio (not too thin/wide)
-            # 3. Must have sufficient complexity (perimeter to area ratio)
-            if (area >= min_area and 
-                0.2 <= aspect_ratio <= 5 and  # Reasonable aspect ratio
-                cv2.contourArea(contour) / area > 0.1):  # Sufficient fill ratio
-                
-                # Expand region slightly to ensure we capture the full diagram
-                x = max(0, x - 5)
-                y = max(0, y - 5)
-                w = min(width - x, w + 10)
-                h = min(height - y, h + 10)
-                
-                image_regions.append((x, y, w, h))
-        
-        # Merge overlapping regions
-        image_regions = self._merge_overlapping_regions(image_regions)
-        
-        return sorted(image_regions, key=lambda r: (r[1], r[0]))  # Sort by y, then x
+        from ..utils.image_regions import detect_image_boundaries
+        return detect_image_boundaries(image, self.detection_scale)
 
     def _merge_overlapping_regions(self, regions: List[Tuple[int, int, int, int]]) -> List[Tuple[int, int, int, int]]:
         """Merge overlapping image regions to avoid splitting diagrams."""
-        if not regions:
-            return regions
+        from ..utils.image_regions import merge_overlapping_regions
+        return merge_overlapping_regions(regions)
+    
+    def extract_images(
+        self,
+        pdf_path: str,
+        output_dir: Path,
+        document: Optional[PDFDocument] = None,
+        pages: Optional[Iterable[int]] = None,
+        checkpoint: Optional[CheckpointJournal] = None,
+    ) -> List["ImageResult"]:
+        """Extract images from PDF pages.
+
+        Returns ``(path, page, region)`` tuples in page order. Pages are
+        rasterized a small batch at a time and released as soon as their
+        regions are saved. With ``image_workers > 1`` contiguous page ranges
+        are spread across a process pool, each worker rendering its own pages.
+        ``pages`` limits extraction to the given 1-based page numbers. Pages
+        already recorded in ``checkpoint`` are skipped and newly finished
+        pages are recorded in it.
+        """
+        from ..utils.image_regions import extract_page_range, iter_page_range_images, split_page_ranges
         
-        # Sort regions by x coordinate
-        regions = sorted(regions, key=lambda r: r[0])
+        output_dir.mkdir(parents=True, exist_ok=True)
+        page_count = as_document(document if document is not None else pdf_path).page_count
+        pages = set(pages) if pages is not None else set(range(1, page_count + 1))
         
-        merged = []
-        current = list(regions[0])
+        page_images: Dict[int, List["ImageResult"]] = {}
+        if checkpoint is not None:
+            page_images = {page: checkpoint.image_pages[page] for page in pages if page in checkpoint.image_pages}
+            if page_images:
+                logger.info(f"Reusing images of {len(page_images)} pages from checkpoint")
         
-        for next_region in regions[1:]:
-            # Calculate current region bounds
-            current_x2 = current[0] + current[2]
-            current_y2 = current[1] + current[3]
-            
-            # Calculate next region bounds
-            next_x = next_region[0]
-            next_y = next_region[1]
-            next_x2 = next_x + next_region[2]
-            next_y2 = next_y + next_region[3]
+        def record(results: Iterable["PageImages"]) -> None:
+            for page, images in results:
+                page_images[page] = images
+                if checkpoint is not None:
+                    checkpoint.record_image_page(page, images)
+        
+        page_runs = contiguous_runs(pages - set(page_images))
+        total_pages = sum(last_page - first_page + 1 for first_page, last_page in page_runs)
+        
+        if self.image_workers <= 1 or total_pages <= 1:
+            for first_page, last_page in page_runs:
+                record(iter_page_range_images(
+                    pdf_path, first_page, last_page, str(output_dir), self.render_dpi, self.render_batch_size,
+                    self.render_backend, self.detection_scale
+                ))
+        else:
+            page_ranges = [
+                page_range
+                for first_page, last_page in page_runs
+                for page_range in split_page_ranges(first_page, last_page, self.image_workers)
+            ]
+            workers = min(self.image_workers, len(page_ranges))
+            logger.info(f"Extracting images from {total_pages} pages with {workers} worker processes")
             
-            # Check for overlap
-            if (current_x2 >= next_x and current[0] <= next_x2 and
-                current_y2 >= next_y and current[1] <= next_y2):
-                # Merge regions
-                current[0] = min(current[0], next_x)
-                current[1] = min(current[1], next_y)
-                current[2] = max(current_x2, next_x2) - current[0]
-                current[3] = max(current_y2, next_y2) - current[1]
-            else:
-                merged.append(tuple(current))
-                current = list(next_region)
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [
+                    executor.submit(
+                        extract_page_range, pdf_path, first_page, last_page,
+                        str(output_dir), self.render_dpi, self.render_batch_size, self.render_backend,
+                        self.detection_scale
+                    )
+                    for first_page, last_page in page_ranges
+                ]
+                for future in futures:
+                    record(future.result())
         
-        merged.append(tuple(current))
-        return merged
+        return [image for page in sorted(page_images) for image in page_images[page]]
     
-    def extract_images(self, pdf_path: str, output_dir: Path) -> List[Tuple[str, str]]:
-        """Extract images from PDF pages."""
-        images = []
-        output_dir.mkdir(parents=True, exist_ok=True)
+    def _build_conversion_request(self, chunk: Chunk, total_chunks: int) -> List[Dict[str, str]]:
+        """Build the chat messages that convert one chunk to markdown."""
+        context_section = CONTEXT_TEMPLATE.format(context=chunk.context) if chunk.context else ""
+        processing_prompt = CONVERSION_PROMPT_TEMPLATE.format(
+            context_section=context_section,
+            index=chunk.index + 1,
+            total=total_chunks,
+            pages=chunk.page_label,
+            text=chunk.text
+        )
+        return [
+            {"role": "system", "content": CONVERSION_SYSTEM_PROMPT},
+            {"role": "user", "content": processing_prompt}
+        ]
+    
+    def _cache_key(self, chunk: Chunk) -> str:
+        return ConversionCache.make_key(chunk.text, CONVERSION_PROMPT_TEMPLATE, self.model, self.max_tokens)
+    
+    def _convert_chunks(self, chunks: List[Chunk], checkpoint: Optional[CheckpointJournal] = None) -> List[str]:
+        """Convert chunks to markdown, sending only cache misses to the model.
+
+        Chunks found in ``checkpoint`` are reused, and every conversion is
+        written to the cache and the checkpoint as soon as it completes.
+        """
+        processed_chunks: List[Optional[str]] = [None] * len(chunks)
+        keys = [self._cache_key(chunk) for chunk in chunks]
         
-        # Convert PDF pages to images
-        pdf_images = pdf2image.convert_from_path(pdf_path)
+        for i, key in enumerate(keys):
+            if checkpoint is not None and key in checkpoint.chunks:
+                processed_chunks[i] = checkpoint.chunks[key]
+            elif self.cache is not None:
+                processed_chunks[i] = self.cache.get(key)
         
-        for i, page_image in enumerate(pdf_images):
-            # Convert PIL image to OpenCV format
-            cv_image = cv2.cvtColor(np.array(page_image), cv2.COLOR_RGB2BGR)
+        pending = [i for i, result in enumerate(processed_chunks) if result is None]
+        if len(pending) < len(chunks):
+            logger.info(f"Reusing {len(chunks) - len(pending)}/{len(chunks)} cached chunk conversions")
+        
+        if pending:
+            logger.info(f"\n=== Converting {len(pending)} chunks of up to {self.chunker.max_tokens} tokens ({self.engine.max_concurrency} in flight) ===")
+            requests = [self._build_conversion_request(chunks[i], len(chunks)) for i in pending]
             
-            # Detect image boundaries
-            regions = self.detect_image_boundaries(cv_image)
+            def on_result(request_index: int, result: str) -> None:
+                key = keys[pending[request_index]]
+                if self.cache is not None:
+                    self.cache.put(key, result, model=self.model)
+                if checkpoint is not None:
+                    checkpoint.record_chunk(key, result)
             
-            for j, (x, y, w, h) in enumerate(regions):
-                # Extract individual image
-                img = cv_image[y:y+h, x:x+w]
-                
-                # Convert back to PIL for saving
-                pil_img = Image.fromarray(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
-                
-                # Save image
-                img_path = output_dir / f"image_{i+1}_{j+1}.png"
-                pil_img.save(img_path)
-                
-                # Convert to base64 for markdown
-                buffered = io.BytesIO()
-                pil_img.save(buffered, format="PNG")
-                img_str = base64.b64encode(buffered.getvalue()).decode()
-                
-                images.append((str(img_path), img_str))
+            for i, result in zip(pending, self.engine.complete_all(requests, on_result=on_result)):
+                processed_chunks[i] = result
+            logger.info(f"\nExtractor: Completed markdown conversion for {len(pending)} chunks")
         
-        return images
+        return processed_chunks
     
-    def _process_chunk(self, chunk: str) -> str:
-        """Process a single chunk of text with rate limit handling."""
-        self._wait_for_rate_limit()
-        
-        try:
-            response = self.client.chat.completions.create(
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert at analyzing PDF documents and converting them to well-formatted Markdown."
-                    },
-                    {
-                        "role": "user",
-                        "content": f"Convert this PDF content to markdown while preserving all formatting and structure:\n\n{chunk}"
-                    }
-                ],
-                model=self.model,  # Only need model parameter for Azure OpenAI
-                max_tokens=self.max_tokens
-            )
-            
-            if not response.choices:
-                raise Exception("Empty response received from the model")
-            
-            return response.choices[0].message.content
-                
-        except Exception as e:
-            logger.error(f"Error processing chunk: {str(e)}")
-            self._handle_rate_limit(e)
-            raise  # Re-raise the exception after handling rate limits
+    def checkpoint_identity(self, document: PDFDocument) -> str:
+        """Identify a document, by the hash of its file, and the settings that shape its conversion."""
+        return hashlib.sha256(json.dumps({
+            "file": document.file_digest(),
+            "model": self.model,
+            "render_dpi": self.render_dpi,
+            "render_backend": self.render_backend,
+            "detection_scale": self.detection_scale,
+        }).encode('utf-8')).hexdigest()
     
-    def extract_content(self, pdf_path: str) -> str:
-        """Extract content from PDF with chunked processing."""
+    def extract_content(
+        self,
+        pdf_path: str,
+        document: Optional[PDFDocument] = None,
+        previous_manifest: Optional[ConversionManifest] = None,
+        checkpoint: Optional[CheckpointJournal] = None,
+        images_dir: Optional[Path] = None,
+        fingerprints: Optional[List[str]] = None,
+    ) -> str:
+        """Extract content from PDF with chunked processing.
+
+        Pass the run's shared ``document`` so later stages reuse the parse.
+        With ``previous_manifest`` only pages whose fingerprint changed are
+        re-extracted and re-converted; the markdown of chunks covering
+        unchanged pages is spliced back in. Finished pages and chunks are
+        recorded in ``checkpoint`` so an interrupted run can resume. The
+        manifest describing this run is left in ``last_manifest``. Images
+        are saved to ``images_dir`` (default ``output/images`` next to the PDF).
+        Page ``fingerprints`` are only needed for an incremental run; they
+        are computed here when ``previous_manifest`` is given without them.
+        Without fingerprints ``last_manifest`` cannot drive a later
+        incremental run.
+        """
+        owns_document = document is None
         try:
             # Extract text and images
             logger.info(f"\n=== PDF Extractor Starting Analysis ===")
             logger.info(f"Analyzing PDF structure: {pdf_path}")
-            text_content = self.extract_text(pdf_path)
-            images = self.extract_images(pdf_path, Path(pdf_path).parent / "output" / "images")
+            document = document if document is not None else PDFDocument(pdf_path)
+            text_content = document.texts()
+            page_count = len(text_content)
+            if previous_manifest is not None and fingerprints is None:
+                fingerprints = document.page_fingerprints()
+            if images_dir is None:
+                images_dir = Path(pdf_path).parent / "output" / "images"
             
-            # Process text in chunks
-            chunks = [text_content[i:i + self.chunk_size] for i in range(0, len(text_content), self.chunk_size)]
-            processed_chunks = []
+            if previous_manifest is not None and previous_manifest.model != self.model:
+                logger.info("Previous conversion used a different model; converting all pages")
+                previous_manifest = None
             
-            for i, chunk in enumerate(chunks):
-                self._wait_for_rate_limit()
-                logger.info(f"\n=== Processing Chunk {i+1}/{len(chunks)} ===")
-                
-                processing_prompt = f"""Convert this PDF content to markdown while preserving all formatting and structure:
-
-PDF Content (Chunk {i+1}/{len(chunks)}):
-{chunk}
-
-Requirements:
-1. Preserve exact text content and order
-2. Maintain heading hierarchy (use #, ##, ### etc.)
-3. Format lists and tables correctly
-4. Preserve code blocks and special formatting
-5. Handle any complex layouts
-
-Please provide detailed markdown conversion that keeps all original content intact."""
-
-                logger.info("\nExtractor: Analyzing content structure...")
-                logger.info("- Detecting headings and section hierarchy")
-                logger.info("- Identifying lists, tables, and special elements")
-                logger.info("- Analyzing formatting requirements")
-                
-                response = self.client.chat.completions.create(
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": "You are an expert PDF content analyzer and markdown converter. Your task is to convert PDF content to perfectly formatted markdown while preserving all content and structure exactly."
-                        },
-                        {
-                            "role": "user",
-                            "content": processing_prompt
-                        }
-                    ],
-                    model=self.model,  # Only need model parameter for Azure OpenAI
-                    max_tokens=self.max_tokens
-                )
-                
-                if not response.choices:
-                    raise Exception(f"Empty response received from the model for chunk {i+1}")
-                
-                processed_chunk = response.choices[0].message.content
-                logger.info(f"\nExtractor: Completed markdown conversion for chunk {i+1}")
-                logger.info("Content structure preserved:")
-                logger.info("- Headings and sections maintained")
-                logger.info("- Lists and tables formatted")
-                logger.info("- Special elements handled")
+            if previous_manifest is None:
+                changed_pages = set(range(1, page_count + 1))
+                reused_chunks = []
+                images = self.extract_images(pdf_path, images_dir, document=document, checkpoint=checkpoint)
+            else:
+                changed_pages = previous_manifest.changed_pages(fingerprints)
+                reused_chunks = previous_manifest.reusable_chunks(changed_pages, page_count)
+                logger.info(f"Incremental run: {len(changed_pages)}/{page_count} pages changed, "
+                            f"reusing {len(reused_chunks)} converted chunks")
                 
-                processed_chunks.append(processed_chunk)
+                # Pages re-extracted before an interruption already hold new files
+                resumed_pages = set(checkpoint.image_pages) if checkpoint is not None else set()
+                images = []
+                for image in previous_manifest.images:
+                    if image[1] in changed_pages or image[1] > page_count:
+                        if image[1] not in resumed_pages:
+                            Path(image[0]).unlink(missing_ok=True)
+                    else:
+                        images.append(image)
+                images.extend(self.extract_images(
+                    pdf_path, images_dir, document=document, pages=changed_pages, checkpoint=checkpoint
+                ))
+                images.sort(key=lambda image: image[1])
+            
+            # Chunk and convert every page not covered by a reused chunk
+            covered_pages = {
+                page
+                for chunk in reused_chunks
+                for page in range(chunk["first_page"], chunk["last_page"] + 1)
+            }
+            chunks = []
+            for first_page, last_page in contiguous_runs(set(range(1, page_count + 1)) - covered_pages):
+                chunks.extend(self.chunker.chunk_pages(text_content[first_page - 1:last_page], first_page=first_page))
+            for i, chunk in enumerate(chunks):
+                chunk.index = i
+            processed_chunks = self._convert_chunks(chunks, checkpoint=checkpoint)
             
-            # Combine processed chunks
-            markdown_content = "\n\n".join(processed_chunks)
+            sections = reused_chunks + [
+                {"first_page": chunk.first_page, "last_page": chunk.last_page, "markdown": markdown}
+                for chunk, markdown in zip(chunks, processed_chunks)
+            ]
+            sections.sort(key=lambda section: section["first_page"])
+            self.last_manifest = ConversionManifest(fingerprints or [], chunks=sections, images=images, model=self.model)
+            
+            # Combine processed chunks, each after a marker naming its source
+            # pages so validation can pair markdown with the right text
+            markdown_content = "\n\n".join(
+                f"{page_marker(section['first_page'], section['last_page'])}\n{section['markdown']}"
+                for section in sections
+            )
+            markdown_content += f"\n\n{END_OF_PAGES_MARKER}"
             
             # Add image references
             if images:
                 logger.info(f"\nExtractor: Processing {len(images)} extracted images")
                 markdown_content += "\n\n## Images\n"
-                for i, (img_path, _) in enumerate(images):
+                for i, (img_path, _, _) in enumerate(images):
                     markdown_content += f"\n![Image {i+1}]({img_path})\n"
                 logger.info("Image references added to markdown")
             
@@ -356,3 +373,7 @@ Please provide detailed markdown conversion that keeps all original content inta
         except Exception as e:
             logger.error(f"Error extracting content: {str(e)}")
             raise
+        finally:
+            # A document passed in belongs to the caller, who closes it
+            if owns_document:
+                document.close()
@@ -1,10 +1,16 @@
 from pathlib import Path
 import logging
 import re
-from typing import Optional
+import threading
+from typing import Dict, Optional
 from .config import api_config
 from .agents.pdf_extractor import PDFExtractorAgent
 from .agents.md_validator import MDValidatorAgent
+from .utils.checkpoint import CheckpointJournal
+from .utils.document import PDFDocument
+from .utils.local_validation import strip_page_markers
+from .utils.manifest import ConversionManifest
+from .utils.tokens import TokenUsage
 from .version import __version__
 
 # Configure logging
@@ -14,45 +20,69 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Serializes version bumps when several documents are processed in threads
+_version_lock = threading.Lock()
+
 class AIProcessor:
     """Coordinates the AI agents for PDF processing."""
     
-    def __init__(self, pdf_path: str):
-        """Initialize the processor with the PDF path."""
+    def __init__(
+        self,
+        pdf_path: str,
+        image_workers: Optional[int] = None,
+        incremental: bool = False,
+        resume: bool = False,
+        output_dir: Optional[str] = None,
+    ):
+        """Initialize the processor with the PDF path.
+        
+        ``image_workers`` overrides PDF_IMAGE_WORKERS for image extraction.
+        With ``incremental`` only pages changed since the previous
+        incremental run's manifest are re-converted; other runs do not
+        fingerprint pages or write a manifest. With ``resume`` the work recorded in the
+        checkpoint of an interrupted run is reused instead of redone.
+        Output goes to ``output_dir``, by default ``output`` next to the PDF.
+        """
         self.pdf_path = Path(pdf_path)
+        self.output_dir = Path(output_dir) if output_dir is not None else self.pdf_path.parent / "output"
+        # Parsed once and shared by extraction and validation
+        self.document = PDFDocument(self.pdf_path)
         self.config = api_config.get_config()
         self.consecutive_rate_limits = 0
+        self.incremental = incremental
+        self.resume = resume
         
         # Initialize agents
-        self.extractor = PDFExtractorAgent(self.config)
+        self.extractor = PDFExtractorAgent(self.config, image_workers=image_workers)
         self.validator = MDValidatorAgent(self.config)
     
     def _increment_version(self) -> None:
         """Increment the patch version number after successful conversion."""
         version_file = Path(__file__).parent / "version.py"
-        try:
-            with open(version_file, 'r') as f:
-                content = f.read()
-            
-            # Extract current version
-            match = re.search(r'__version__\s*=\s*"(\d+\.\d+\.\d+)"', content)
-            if not match:
-                logger.warning("Could not find version number to increment")
-                return
-            
-            current_version = match.group(1)
-            major, minor, patch = map(int, current_version.split('.'))
-            new_version = f"{major}.{minor}.{patch + 1}"
-            
-            # Update version file
-            new_content = content.replace(f'__version__ = "{current_version}"', f'__version__ = "{new_version}"')
-            with open(version_file, 'w') as f:
-                f.write(new_content)
-            
-            logger.info(f"Version incremented from {current_version} to {new_version}")
-            
-        except Exception as e:
-            logger.warning(f"Failed to increment version: {str(e)}")
+        with _version_lock:
+            try:
+                with open(version_file, 'r') as f:
+                    content = f.read()
+                
+                # Extract current version
+                match = re.search(r'__version__\s*=\s*"(\d+\.\d+\.\d+)"', content)
+                if not match:
+                    logger.warning("Could not find version number to increment")
+                    return
+                
+                current_version = match.group(1)
+                major, minor, patch = map(int, current_version.split('.'))
+                new_version = f"{major}.{minor}.{patch + 1}"
+                
+                # Update version file
+                new_content = content.replace(f'__version__ = "{current_version}"', f'__version__ = "{new_version}"')
+                with open(version_file, 'w') as f:
+                    f.write(new_content)
+                
+                logger.info(f"Version incremented from {current_version} to {new_version}")
+                
+            except Exception as e:
+                logger.warning(f"Failed to increment version: {str(e)}")
     
     def _handle_rate_limit(self, error: Exception) -> None:
         """Handle rate limit errors and track consecutive occurrences."""
@@ -68,32 +98,66 @@ class AIProcessor:
             self.consecutive_rate_limits = 0
         raise error
     
+    @property
+    def token_usage(self) -> TokenUsage:
+        """Tokens spent on this document by conversion and validation so far."""
+        return self.extractor.engine.usage + self.validator.engine.usage
+    
     def process(self) -> Optional[Path]:
         """Process the PDF and generate markdown output."""
         try:
             logger.info(f"Starting PDF processing: {self.pdf_path}")
+            output_file = self.output_dir / f"{self.pdf_path.stem}.md"
+            manifest_path = ConversionManifest.path_for(output_file)
+            output_file.parent.mkdir(parents=True, exist_ok=True)
+            
+            previous_manifest = None
+            if self.incremental:
+                previous_manifest = ConversionManifest.load(manifest_path)
+                if previous_manifest is None:
+                    logger.info("No usable manifest from a previous run; converting all pages")
+            
+            # Page fingerprints are only needed to compare with, and write, a manifest
+            fingerprints = self.document.page_fingerprints() if self.incremental else None
+            
+            # Progress is journaled so an interrupted run can be resumed
+            checkpoint = CheckpointJournal.open(
+                CheckpointJournal.path_for(output_file),
+                self.extractor.checkpoint_identity(self.document),
+                resume=self.resume
+            )
             
             # Extract content from PDF
             logger.info("Extracting content from PDF...")
             try:
-                markdown_content = self.extractor.extract_content(str(self.pdf_path))
+                markdown_content = self.extractor.extract_content(
+                    str(self.pdf_path), document=self.document,
+                    previous_manifest=previous_manifest, checkpoint=checkpoint,
+                    images_dir=self.output_dir / "images", fingerprints=fingerprints
+                )
             except Exception as e:
                 error_msg = f"Failed to extract content from PDF: {str(e)}"
                 logger.error(error_msg)
                 raise Exception(error_msg)
+            finally:
+                checkpoint.close()
             
             if not markdown_content:
                 error_msg = "No content was extracted from the PDF"
                 logger.error(error_msg)
                 raise Exception(error_msg)
             
-            # Get original text for validation
-            original_text = "\n\n".join(self.extractor.extract_text(str(self.pdf_path)))
+            # Original page texts and per-page image counts for validation
+            original_text = self.document.texts()
+            page_images: Dict[int, int] = {}
+            if self.extractor.last_manifest is not None:
+                for _, page, _ in self.extractor.last_manifest.images:
+                    page_images[page] = page_images.get(page, 0) + 1
             
             # Validate the generated markdown
             logger.info("Validating generated markdown...")
             try:
-                is_valid, validation_details = self.validator.validate_markdown(markdown_content, original_text)
+                is_valid, validation_details = self.validator.validate_markdown(markdown_content, original_text, page_images)
                 if not is_valid:
                     error_msg = f"Validation failed: {validation_details}"
                     logger.error(error_msg)
@@ -106,13 +170,14 @@ class AIProcessor:
                 logger.error(error_msg)
                 raise Exception(error_msg)
             
-            # Save the markdown content
-            output_file = self.pdf_path.parent / "output" / f"{self.pdf_path.stem}.md"
-            output_file.parent.mkdir(parents=True, exist_ok=True)
-            
+            # Save the markdown content; the page markers were only for validation
             try:
                 with open(output_file, 'w', encoding='utf-8') as f:
-                    f.write(markdown_content)
+                    f.write(strip_page_markers(markdown_content))
+                if self.incremental:
+                    # Record page fingerprints so the next run can be incremental
+                    self.extractor.last_manifest.save(manifest_path)
+                checkpoint.discard()
             except Exception as e:
                 error_msg = f"Failed to save markdown file: {str(e)}"
                 logger.error(error_msg)
@@ -122,8 +187,13 @@ class AIProcessor:
             self._increment_version()
             
             logger.info(f"Successfully processed PDF. Output saved to: {output_file}")
+            logger.info(f"Token usage: {self.token_usage}")
             return output_file
             
         except Exception as e:
             logger.error(f"PDF processing failed: {str(e)}")
-            return None
\ No newline at end of file
+            logger.info(f"Token usage: {self.token_usage}")
+            return None
+        finally:
+            # Release the text engine's file handle; the document reopens it if used again
+            self.document.close()
\ No newline at end of file
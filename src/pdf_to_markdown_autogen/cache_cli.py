@@ -0,0 +1,64 @@
+"""Inspect and prune the conversion result cache.
+
+Usage:
+    python -m pdf_to_markdown_autogen.cache_cli stats
+    python -m pdf_to_markdown_autogen.cache_cli list --limit 50
+    python -m pdf_to_markdown_autogen.cache_cli prune --max-mb 256
+    python -m pdf_to_markdown_autogen.cache_cli clear
+"""
+import argparse
+import sys
+from datetime import datetime
+from typing import Optional
+
+from .config import processing_config
+from .utils.cache import ConversionCache
+
+
+def _format_time(timestamp: Optional[float]) -> str:
+    if timestamp is None:
+        return "-"
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Inspect and prune the PDF to Markdown conversion cache")
+    parser.add_argument("--cache-dir", default=processing_config.cache_dir,
+                        help="Cache directory (default: PDF_MD_CACHE_DIR)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("stats", help="Show entry count and total size")
+    list_parser = subparsers.add_parser("list", help="List the most recently used entries")
+    list_parser.add_argument("--limit", type=int, default=20)
+    prune_parser = subparsers.add_parser("prune", help="Evict least-recently-used entries")
+    prune_parser.add_argument("--max-mb", type=float, default=None,
+                              help="Target size in MB (default: PDF_MD_CACHE_MAX_MB)")
+    subparsers.add_parser("clear", help="Remove every entry")
+    args = parser.parse_args(argv)
+
+    cache = ConversionCache(args.cache_dir, processing_config.cache_max_bytes)
+
+    if args.command == "stats":
+        stats = cache.stats()
+        print(f"Cache:        {stats['path']}")
+        print(f"Entries:      {stats['entries']}")
+        print(f"Size:         {stats['size_bytes'] / (1024 * 1024):.2f} MB "
+              f"(limit {stats['max_size_bytes'] / (1024 * 1024):.0f} MB)")
+        print(f"Oldest use:   {_format_time(stats['least_recently_used'])}")
+        print(f"Newest use:   {_format_time(stats['most_recently_used'])}")
+    elif args.command == "list":
+        for entry in cache.entries(args.limit):
+            print(f"{entry['key'][:16]}  {entry['size_bytes']:>9} B  {entry['model'] or '-':<20}  "
+                  f"last used {_format_time(entry['accessed'])}")
+    elif args.command == "prune":
+        max_bytes = None if args.max_mb is None else int(args.max_mb * 1024 * 1024)
+        removed = cache.prune(max_bytes)
+        print(f"Removed {removed} entries")
+    elif args.command == "clear":
+        removed = cache.clear()
+        print(f"Removed {removed} entries")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
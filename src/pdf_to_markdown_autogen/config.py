@@ -65,6 +65,61 @@ class APIConfig:
         
         return config
 
+class ProcessingConfig:
+    """Configuration for worker pools, batching and request scheduling."""
+    
+    def __init__(self):
+        # PDF engines: pypdf/pypdfium2/pymupdf for text, pdf2image/pypdfium2/pymupdf
+        # for rendering; 'auto' opts in to the fastest installed engine
+        self.text_backend = os.getenv('PDF_TEXT_BACKEND', 'pypdf').lower()
+        self.render_backend = os.getenv('PDF_RENDER_BACKEND', 'pdf2image').lower()
+        
+        # Image extraction
+        self.image_workers = int(os.getenv('PDF_IMAGE_WORKERS', '1'))
+        self.render_dpi = int(os.getenv('PDF_RENDER_DPI', '200'))
+        self.render_batch_size = int(os.getenv('PDF_RENDER_BATCH_SIZE', '4'))
+        # Figure candidates are searched for on the page downscaled by this factor
+        # (1 = off; lower is faster but thin or small figures can be missed)
+        self.detection_scale = min(1.0, max(0.1, float(os.getenv('PDF_DETECTION_SCALE', '1.0'))))
+        # zlib level for extracted figures (0-9; lower is faster, larger files)
+        self.png_compression = min(9, max(0, int(os.getenv('PDF_PNG_COMPRESSION', '6'))))
+        
+        # Model limits; 0 uses the known values for the configured model
+        self.context_window = int(os.getenv('LLM_CONTEXT_WINDOW', '0'))
+        self.max_output_tokens = int(os.getenv('LLM_MAX_OUTPUT_TOKENS', '0'))
+        
+        # Chunking of extracted text for conversion (0 = largest chunk the model fits)
+        self.chunk_tokens = int(os.getenv('PDF_CHUNK_TOKENS', '3000'))
+        self.chunk_overlap_tokens = int(os.getenv('PDF_CHUNK_OVERLAP_TOKENS', '200'))
+        
+        # Conversion result cache
+        self.cache_enabled = os.getenv('PDF_MD_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+        self.cache_dir = os.getenv('PDF_MD_CACHE_DIR', str(Path.home() / '.cache' / 'pdf_to_markdown'))
+        self.cache_max_bytes = int(float(os.getenv('PDF_MD_CACHE_MAX_MB', '512')) * 1024 * 1024)
+        
+        # LLM request scheduling (shared by all agents in the process)
+        self.llm_concurrency = int(os.getenv('LLM_MAX_CONCURRENCY', '4'))
+        self.requests_per_minute = float(os.getenv('LLM_REQUESTS_PER_MINUTE', '20'))
+        self.tokens_per_minute = float(os.getenv('LLM_TOKENS_PER_MINUTE', '0'))
+        self.max_retries = int(os.getenv('LLM_MAX_RETRIES', '6'))
+        
+        # Validation: 'local' (no model calls), 'escalate' (model reviews
+        # low-coverage pages only), 'sampled' (model reviews the riskiest
+        # pages) or 'full' (model reviews every chunk)
+        self.validation_mode = os.getenv('VALIDATION_MODE', 'escalate').lower()
+        self.validation_min_coverage = float(os.getenv('VALIDATION_MIN_COVERAGE', '0.95'))
+        self.validation_escalate_below = float(os.getenv('VALIDATION_ESCALATE_BELOW', '0.9'))
+        # Per-document budget for model review in escalate and sampled modes (0 = unlimited)
+        self.validation_max_pages = int(os.getenv('VALIDATION_MAX_PAGES', '8'))
+        self.validation_max_tokens = int(os.getenv('VALIDATION_MAX_TOKENS', '60000'))
+        
+        # HTTP connection pool shared by every API client in the process
+        self.http_max_connections = int(os.getenv('LLM_HTTP_MAX_CONNECTIONS', '20'))
+        self.http_max_keepalive_connections = int(os.getenv('LLM_HTTP_MAX_KEEPALIVE', '10'))
+        self.http_keepalive_expiry = float(os.getenv('LLM_HTTP_KEEPALIVE_SECONDS', '90'))
+        self.http_timeout = float(os.getenv('LLM_HTTP_TIMEOUT_SECONDS', '300'))
+        self.http_connect_timeout = float(os.getenv('LLM_HTTP_CONNECT_TIMEOUT_SECONDS', '10'))
+
 def get_config() -> Dict[str, Any]:
     """Get configuration from environment variables using APIConfig."""
     return api_config.get_config()
@@ -77,5 +132,6 @@ def get_azure_config() -> Dict[str, Any]:
     config = api_config.get_config()
     return config["config_list"][0]
 
-# Create a global instance
-api_config = APIConfig()
\ No newline at end of file
+# Create global instances
+api_config = APIConfig()
+processing_config = ProcessingConfig()
\ No newline at end of file
@@ -6,6 +6,8 @@ from dotenv import load_dotenv
 
 from .agents.pdf_extractor import PDFExtractorAgent
 from .agents.md_validator import MDValidatorAgent
+from .utils.document import PDFDocument
+from .utils.local_validation import strip_page_markers
 from .version import __version__
 
 logger = logging.getLogger(__name__)
@@ -31,26 +33,24 @@ class PDFToMarkdownConverter:
         """Convert a PDF file to Markdown format."""
         logger.info(f"Starting PDF to Markdown conversion v{__version__}")
         
-        # Extract content from PDF
-        markdown_content = self.pdf_extractor.extract_content(pdf_path)
+        # Parse once; extraction and validation share the document
+        with PDFDocument(pdf_path) as document:
+            # Extract content from PDF
+            markdown_content = self.pdf_extractor.extract_content(pdf_path, document=document)
         
-        # Validate markdown content
-        # For validation, we'll use a sample of the original text
-        # This is more efficient than validating the entire document
-        with open(pdf_path, 'rb') as file:
-            import PyPDF2
-            reader = PyPDF2.PdfReader(file)
-            sample_text = ""
-            for i in range(min(2, len(reader.pages))):
-                sample_text += reader.pages[i].extract_text()
+            # Validate markdown content
+            # For validation, we'll use a sample of the original text
+            # This is more efficient than validating the entire document
+            sample_pages = [document.page_text(i) for i in range(min(2, document.page_count))]
         
-        # Only validate if we have enough text
-        if len(sample_text) > 100:
-            is_valid = self.md_validator.validate_markdown(markdown_content, sample_text)
-            if not is_valid:
-                logger.warning("Markdown validation failed, but continuing with output")
-        
-        return markdown_content
+            # Only validate if we have enough text
+            if sum(len(text) for text in sample_pages) > 100:
+                is_valid, _ = self.md_validator.validate_markdown(markdown_content, sample_pages)
+                if not is_valid:
+                    logger.warning("Markdown validation failed, but continuing with output")
+
+        # Page markers are only needed for validation
+        return strip_page_markers(markdown_content)
 
 def setup_logging():
     """Configure logging for the application."""
@@ -1,68 +1,63 @@
-import os
 import sys
 import logging
+import argparse
 from pathlib import Path
-from pdf_to_markdown_autogen.agents.pdf_extractor import PDFExtractorAgent
-from pdf_to_markdown_autogen.agents.md_validator import MDValidatorAgent
-from pdf_to_markdown_autogen.config import get_azure_config
+from typing import Optional
 
-# Add the current directory to the Python path
-current_dir = Path(__file__).parent
-sys.path.append(str(current_dir))
+# Add the src directory to the Python path
+src_dir = Path(__file__).parent.parent
+sys.path.append(str(src_dir))
+
+from pdf_to_markdown_autogen.ai_processor import AIProcessor
 
 logger = logging.getLogger(__name__)
 
-def convert_pdf_to_markdown(input_file: str, output_file: str) -> None:
+DEFAULT_INPUT_FILE = src_dir / "DIGITAL-Spike_ Design Data Quality Solution-270325-192328.pdf"
+
+def convert_pdf_to_markdown(
+    input_file: str,
+    output_dir: str,
+    incremental: bool = False,
+    resume: bool = False,
+) -> Optional[Path]:
     """
     Convert a PDF file to Markdown using the AutoGen implementation.
-    
+
     Args:
         input_file (str): Path to the input PDF file
-        output_file (str): Path where the output Markdown file should be saved
+        output_dir (str): Directory where the Markdown file is saved
+        incremental (bool): Re-convert only pages changed since the previous run
+        resume (bool): Resume an interrupted conversion from its checkpoint
+
+    Returns:
+        Optional[Path]: Path of the Markdown file, or None if the conversion failed
     """
-    # Get configuration
-    config = get_azure_config()
-    
-    # Initialize agents
-    pdf_extractor = PDFExtractorAgent(config)
-    md_validator = MDValidatorAgent(config)
-    
-    # Extract content from PDF
-    logger.info("Extracting content from PDF...")
-    markdown_content = pdf_extractor.extract_content(input_file)
-    
-    # Validate markdown content
-    logger.info("Validating markdown content...")
-    is_valid, validation_result = md_validator.validate_content(markdown_content, input_file)
-    
-    if not is_valid:
-        logger.warning(f"Validation issues found: {validation_result}")
-    
-    # Save markdown content
-    logger.info(f"Saving markdown content to {output_file}...")
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.write(markdown_content)
-    
-    logger.info("Conversion completed successfully")
+    processor = AIProcessor(input_file, incremental=incremental, resume=resume, output_dir=output_dir)
+    return processor.process()
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Convert a PDF to Markdown using the AutoGen processor")
+    parser.add_argument("input_file", nargs="?", default=str(DEFAULT_INPUT_FILE), help="Path to the PDF file")
+    parser.add_argument("--output-dir", default=str(src_dir / "output"),
+                        help="Directory for the Markdown output (default: src/output)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Re-convert only pages changed since the previous incremental run")
+    parser.add_argument("--resume", action="store_true",
+                        help="Resume an interrupted conversion from its checkpoint")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO)
+    args = parse_args(argv)
 
-def main():
-    # Get the current directory
-    current_dir = Path(__file__).parent
-    
-    # Set paths
-    pdf_path = current_dir.parent / "DIGITAL-Spike_ Design Data Quality Solution-270325-192328.pdf"
-    output_dir = current_dir.parent / "output"
-    
-    # Extract full paths
-    input_file = str(pdf_path.resolve())
-    output_file = str((output_dir / pdf_path.stem).resolve().with_suffix('.md'))
-    
-    # Create output directory if it doesn't exist
-    output_dir.mkdir(parents=True, exist_ok=True)
-    
     # Convert PDF to markdown
-    convert_pdf_to_markdown(input_file, output_file)
+    output_file = convert_pdf_to_markdown(
+        str(Path(args.input_file).resolve()), args.output_dir, incremental=args.incremental, resume=args.resume
+    )
+    if output_file is None:
+        logger.error("Conversion failed - see above errors for details")
+        sys.exit(1)
+    logger.info(f"Conversion completed successfully. Output saved to {output_file}")
 
 if __name__ == "__main__":
-    from run_autogen import main
-    main()
\ No newline at end of file
+    main()
@@ -16,6 +16,8 @@ try:
     from pdf_to_markdown_autogen.agents.pdf_extractor import PDFExtractorAgent
     from pdf_to_markdown_autogen.agents.md_validator import MDValidatorAgent
     from pdf_to_markdown_autogen.config import api_config, get_azure_config
+    from pdf_to_markdown_autogen.utils.document import PDFDocument
+    from pdf_to_markdown_autogen.utils.local_validation import strip_page_markers
 
     # Load environment variables
     load_dotenv()
@@ -36,13 +38,16 @@ try:
         pdf_extractor = PDFExtractorAgent(config)
         md_validator = MDValidatorAgent(config)
         
+        # Parse the PDF once for every stage
+        document = PDFDocument(input_file)
+        
         # Extract content from PDF
         logger.info("Extracting content from PDF...")
-        markdown_content = pdf_extractor.extract_content(input_file)
+        markdown_content = pdf_extractor.extract_content(input_file, document=document)
         
         # Get original text for validation
         logger.info("Getting original text for validation...")
-        original_text = pdf_extractor.get_text_content(input_file)
+        original_text = pdf_extractor.extract_text(document)
         
         # Validate markdown content
         logger.info("Validating markdown content...")
@@ -54,7 +59,8 @@ try:
         # Save markdown content
         logger.info(f"Saving markdown content to {output_file}...")
         with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(markdown_content)
+            # Page markers are only needed for validation
+            f.write(strip_page_markers(markdown_content))
         
         logger.info("Conversion completed successfully")
 
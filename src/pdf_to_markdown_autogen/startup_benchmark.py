@@ -0,0 +1,92 @@
+"""Measure how long a fresh interpreter takes to import the converter.
+
+Usage:
+    python -m pdf_to_markdown_autogen.startup_benchmark
+    python -m pdf_to_markdown_autogen.startup_benchmark --runs 20 --top 15
+    python -m pdf_to_markdown_autogen.startup_benchmark --module pdf_to_markdown_autogen.ai_processor
+
+Each run starts a new Python process with ``-X importtime`` so that
+nothing is cached in ``sys.modules``. The report gives the median wall
+time per module, the slowest imports and which of the heavy dependencies
+(loaded only by the stage that needs them) were pulled in at startup.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+DEFAULT_MODULES = [
+    "pdf_to_markdown_autogen",
+    "pdf_to_markdown_autogen.ai_processor",
+    "pdf_to_markdown_autogen.cache_cli",
+]
+# Dependencies that should not be imported before their stage runs
+HEAVY_MODULES = ["autogen", "openai", "httpx", "cv2", "numpy", "pdf2image", "PyPDF2", "pypdfium2", "fitz"]
+
+
+def _import_once(module: str) -> Tuple[float, Dict[str, int]]:
+    """Wall time of one cold import and each module's cumulative import time in microseconds."""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env=env, stderr=subprocess.PIPE, stdout=subprocess.DEVNULL, universal_newlines=True
+    )
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+
+    cumulative: Dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, total, name = line[len("import time:"):].split("|")
+        cumulative[name.strip()] = int(total)
+    return elapsed, cumulative
+
+
+def benchmark(module: str, runs: int) -> Tuple[List[float], Dict[str, int]]:
+    """Wall times of ``runs`` cold imports and the import times of the last one."""
+    # The first run warms the OS file cache and is not counted
+    _import_once(module)
+    times = []
+    cumulative: Dict[str, int] = {}
+    for _ in range(runs):
+        elapsed, cumulative = _import_once(module)
+        times.append(elapsed)
+    return times, cumulative
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Measure the import time of the PDF to Markdown converter")
+    parser.add_argument("--module", action="append", dest="modules",
+                        help="Module to import (repeatable; default: the package, AIProcessor and cache CLI)")
+    parser.add_argument("--runs", type=int, default=10, help="Cold imports per module (default: 10)")
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to list (default: 10)")
+    args = parser.parse_args(argv)
+
+    baseline, _ = benchmark("sys", max(1, args.runs))
+    interpreter = statistics.median(baseline)
+    print(f"Interpreter startup: {interpreter * 1000:.1f} ms (median of {len(baseline)})")
+
+    for module in args.modules or DEFAULT_MODULES:
+        times, cumulative = benchmark(module, max(1, args.runs))
+        median = statistics.median(times)
+        print()
+        print(f"{module}")
+        print(f"  wall time:   {median * 1000:.1f} ms median, {min(times) * 1000:.1f} ms best "
+              f"({(median - interpreter) * 1000:.1f} ms over interpreter startup)")
+        heavy = [name for name in HEAVY_MODULES if name in cumulative]
+        print(f"  heavy deps:  {', '.join(heavy) if heavy else 'none'}")
+        for name, total in sorted(cumulative.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+            print(f"  {total / 1000:>9.1f} ms  {name}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
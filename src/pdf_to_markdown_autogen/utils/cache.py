@@ -0,0 +1,146 @@
+"""Content-addressed on-disk cache of model conversion results."""
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+
+class ConversionCache:
+    """Persistent cache of model replies with size-based LRU eviction.
+
+    Entries are keyed by a hash of everything that determines the reply
+    (chunk text, prompt template, model, max_tokens), so an unchanged chunk
+    is never sent to the model twice. Each operation opens its own SQLite
+    connection, which keeps the cache safe to share between threads and
+    processes. The total size is kept up to date by triggers, so checking
+    it after every insert does not scan the table.
+    """
+
+    DB_NAME = "conversions.db"
+    # Least-recently-used entries read at a time while pruning
+    PRUNE_BATCH = 64
+
+    def __init__(self, cache_dir: Union[str, Path], max_size_bytes: int):
+        self.cache_dir = Path(cache_dir).expanduser()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.cache_dir / self.DB_NAME
+        self.max_size_bytes = max_size_bytes
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                "model TEXT, created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+            conn.execute("CREATE TABLE IF NOT EXISTS totals (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS entries_size_insert AFTER INSERT ON entries BEGIN "
+                "UPDATE totals SET value = value + NEW.size WHERE name = 'size'; END"
+            )
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS entries_size_delete AFTER DELETE ON entries BEGIN "
+                "UPDATE totals SET value = value - OLD.size WHERE name = 'size'; END"
+            )
+            # Caches created before the running total are summed once
+            conn.execute(
+                "INSERT OR IGNORE INTO totals (name, value) SELECT 'size', COALESCE(SUM(size), 0) FROM entries"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(str(self.db_path), timeout=30)
+
+    @staticmethod
+    def _total_size(conn: sqlite3.Connection) -> int:
+        return conn.execute("SELECT value FROM totals WHERE name = 'size'").fetchone()[0]
+
+    @staticmethod
+    def make_key(chunk_text: str, prompt_template: str, model: str, max_tokens: int) -> str:
+        """Hash the inputs that determine a conversion result."""
+        payload = json.dumps([chunk_text, prompt_template, model, max_tokens], ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached reply for ``key`` and mark it recently used."""
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (time.time(), key))
+            return row[0]
+
+    def put(self, key: str, value: str, model: str = "") -> None:
+        """Store a reply and evict least-recently-used entries if over size."""
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            # Delete explicitly: the row REPLACE removes does not fire the delete trigger
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            conn.execute(
+                "INSERT INTO entries (key, value, size, model, created, accessed) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, value, len(value.encode('utf-8')), model, now, now)
+            )
+        self.prune()
+
+    def prune(self, max_size_bytes: Optional[int] = None) -> int:
+        """Evict least-recently-used entries until under the size limit.
+
+        Returns the number of entries removed.
+        """
+        limit = self.max_size_bytes if max_size_bytes is None else max_size_bytes
+        removed = 0
+        with closing(self._connect()) as conn, conn:
+            total = self._total_size(conn)
+            while total > limit:
+                oldest = conn.execute(
+                    "SELECT key, size FROM entries ORDER BY accessed LIMIT ?", (self.PRUNE_BATCH,)
+                ).fetchall()
+                if not oldest:
+                    break
+                for key, size in oldest:
+                    if total <= limit:
+                        break
+                    conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                    total -= size
+                    removed += 1
+        if removed:
+            logger.info(f"Evicted {removed} cache entries to stay under {limit} bytes")
+        return removed
+
+    def clear(self) -> int:
+        """Remove every entry and return how many there were."""
+        with closing(self._connect()) as conn, conn:
+            return conn.execute("DELETE FROM entries").rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        """Entry count, total size and age range of the cache."""
+        with closing(self._connect()) as conn:
+            count, oldest, newest = conn.execute(
+                "SELECT COUNT(*), MIN(accessed), MAX(accessed) FROM entries"
+            ).fetchone()
+            size = self._total_size(conn)
+        return {
+            "path": str(self.db_path),
+            "entries": count,
+            "size_bytes": size,
+            "max_size_bytes": self.max_size_bytes,
+            "least_recently_used": oldest,
+            "most_recently_used": newest,
+        }
+
+    def entries(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Most recently used entries, newest first."""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT key, size, model, created, accessed FROM entries ORDER BY accessed DESC LIMIT ?",
+                (limit,)
+            ).fetchall()
+        return [
+            {"key": key, "size_bytes": size, "model": model, "created": created, "accessed": accessed}
+            for key, size, model, created, accessed in rows
+        ]
@@ -0,0 +1,112 @@
+"""Checkpoint journal for resumable conversions."""
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+ImageRecord = Tuple[str, int, Tuple[int, int, int, int]]
+
+
+class CheckpointJournal:
+    """Append-only JSON-lines record of the work finished so far.
+
+    A line is written and fsynced after every converted chunk and every
+    page whose images have been extracted, so a run that dies part-way can
+    be resumed without repeating that work. The first line identifies the
+    document and settings; a journal written for anything else is
+    discarded instead of resumed.
+    """
+
+    def __init__(self, path: Union[str, Path], identity: str):
+        self.path = Path(path)
+        self.identity = identity
+        self.chunks: Dict[str, str] = {}
+        self.image_pages: Dict[int, List[ImageRecord]] = {}
+        self._lock = threading.Lock()
+        self._file = None
+
+    @staticmethod
+    def path_for(output_file: Union[str, Path]) -> Path:
+        """Journal location for a markdown output file."""
+        output_file = Path(output_file)
+        return output_file.with_name(f"{output_file.stem}.checkpoint.jsonl")
+
+    @classmethod
+    def open(cls, path: Union[str, Path], identity: str, resume: bool = False) -> "CheckpointJournal":
+        """Open a journal, replaying it when resuming a matching run."""
+        journal = cls(path, identity)
+        journal.path.parent.mkdir(parents=True, exist_ok=True)
+        if resume and journal.path.exists() and journal._replay():
+            logger.info(f"Resuming from checkpoint: {len(journal.chunks)} chunks and "
+                        f"{len(journal.image_pages)} image pages already done")
+            journal._file = open(journal.path, 'a', encoding='utf-8')
+        else:
+            if resume:
+                logger.info("No matching checkpoint found; starting from the beginning")
+            journal._file = open(journal.path, 'w', encoding='utf-8')
+            journal._append({"type": "header", "identity": identity})
+        return journal
+
+    def _replay(self) -> bool:
+        """Load completed work; False if the journal belongs to another run."""
+        with open(self.path, 'rb') as f:
+            lines = f.readlines()
+        if not lines:
+            return False
+        try:
+            header = json.loads(lines[0].decode('utf-8'))
+        except ValueError:
+            return False
+        if header.get("type") != "header" or header.get("identity") != self.identity:
+            return False
+
+        valid_length = len(lines[0])
+        for line in lines[1:]:
+            try:
+                if not line.endswith(b"\n"):
+                    raise ValueError("unterminated record")
+                record = json.loads(line.decode('utf-8'))
+            except ValueError:
+                # A torn final line from a crash mid-write; cut it off so new
+                # records start on a clean line
+                os.truncate(self.path, valid_length)
+                break
+            valid_length += len(line)
+            if record["type"] == "chunk":
+                self.chunks[record["key"]] = record["markdown"]
+            elif record["type"] == "images":
+                self.image_pages[record["page"]] = [
+                    (path, page, tuple(region)) for path, page, region in record["images"]
+                ]
+        return True
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        with self._lock:
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def record_chunk(self, key: str, markdown: str) -> None:
+        """Record a converted chunk."""
+        self.chunks[key] = markdown
+        self._append({"type": "chunk", "key": key, "markdown": markdown})
+
+    def record_image_page(self, page: int, images: List[ImageRecord]) -> None:
+        """Record that a page's images have been extracted (possibly none)."""
+        self.image_pages[page] = images
+        self._append({"type": "images", "page": page, "images": [list(image) for image in images]})
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def discard(self) -> None:
+        """Close and delete the journal once the output has been written."""
+        self.close()
+        if self.path.exists():
+            self.path.unlink()
@@ -0,0 +1,142 @@
+"""Page- and token-aware chunking of extracted PDF text."""
+import re
+from dataclasses import dataclass
+from typing import Callable, List, Tuple
+
+from .tokens import count_tokens, split_by_tokens, tail_tokens
+
+# Lines that usually open a section: markdown headings, numbered headings
+# ("2.1 Scope") and all-caps titles.
+HEADING_PATTERN = re.compile(r'^(?:#{1,6}\s+\S|\d+(?:\.\d+)*\.?\s+[A-Z]|[A-Z][A-Z0-9 ,&/-]{3,}$)')
+
+
+@dataclass
+class Chunk:
+    """Text sent to the model in a single request."""
+
+    index: int
+    text: str
+    first_page: int  # 1-based, inclusive
+    last_page: int
+    token_count: int
+    context: str = ""  # Tail of the previous chunk, for continuity only
+
+    @property
+    def page_label(self) -> str:
+        if self.first_page == self.last_page:
+            return str(self.first_page)
+        return f"{self.first_page}-{self.last_page}"
+
+
+def _split_headings(text: str) -> List[str]:
+    sections: List[str] = []
+    for line in text.split('\n'):
+        if not sections or HEADING_PATTERN.match(line.strip()):
+            sections.append(line)
+        else:
+            sections[-1] += '\n' + line
+    return sections
+
+
+def _split_paragraphs(text: str) -> List[str]:
+    return [p for p in re.split(r'\n\s*\n', text) if p.strip()]
+
+
+def _split_lines(text: str) -> List[str]:
+    return text.split('\n')
+
+
+# Progressively finer boundaries tried when a page does not fit in one chunk
+_SPLITTERS: List[Tuple[Callable[[str], List[str]], str]] = [
+    (_split_headings, '\n'),
+    (_split_paragraphs, '\n\n'),
+    (_split_lines, '\n'),
+]
+
+
+class Chunker:
+    """Splits page text into chunks that fit a token budget.
+
+    Whole pages are packed together while they fit. A page that is too large
+    on its own is split at heading boundaries first, then paragraphs, then
+    lines, and only as a last resort at an arbitrary token offset. Every
+    chunk records the page span it covers and carries the tail of the
+    previous chunk as context.
+    """
+
+    def __init__(self, max_tokens: int = 3000, overlap_tokens: int = 200, model: str = "gpt-4o"):
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.model = model
+
+    def _count(self, text: str) -> int:
+        return count_tokens(text, self.model)
+
+    def _pack(self, pieces: List[str], separator: str) -> List[str]:
+        """Greedily join adjacent pieces while they stay within budget."""
+        packed: List[str] = []
+        current: List[str] = []
+        current_tokens = 0
+        for piece in pieces:
+            piece_tokens = self._count(piece)
+            if current and current_tokens + piece_tokens > self.max_tokens:
+                packed.append(separator.join(current))
+                current, current_tokens = [], 0
+            current.append(piece)
+            current_tokens += piece_tokens
+        if current:
+            packed.append(separator.join(current))
+        return packed
+
+    def _split_text(self, text: str, level: int = 0) -> List[str]:
+        if self._count(text) <= self.max_tokens:
+            return [text]
+        if level >= len(_SPLITTERS):
+            return split_by_tokens(text, self.max_tokens, self.model)
+
+        splitter, separator = _SPLITTERS[level]
+        pieces = splitter(text)
+        if len(pieces) <= 1:
+            return self._split_text(text, level + 1)
+
+        segments: List[str] = []
+        for piece in self._pack(pieces, separator):
+            segments.extend(self._split_text(piece, level + 1))
+        return segments
+
+    def chunk_pages(self, pages: List[str], first_page: int = 1) -> List[Chunk]:
+        """Chunk a list of consecutive page texts starting at ``first_page``."""
+        units: List[Tuple[int, str, int]] = []
+        for page_number, page_text in enumerate(pages, start=first_page):
+            page_text = page_text.strip()
+            if not page_text:
+                continue
+            for segment in self._split_text(page_text):
+                units.append((page_number, segment, self._count(segment)))
+
+        chunks: List[Chunk] = []
+        current: List[Tuple[int, str, int]] = []
+        current_tokens = 0
+
+        def flush():
+            text = "\n\n".join(segment for _, segment, _ in current)
+            context = tail_tokens(chunks[-1].text, self.overlap_tokens, self.model) if chunks else ""
+            chunks.append(Chunk(
+                index=len(chunks),
+                text=text,
+                first_page=current[0][0],
+                last_page=current[-1][0],
+                token_count=current_tokens,
+                context=context,
+            ))
+
+        for unit in units:
+            if current and current_tokens + unit[2] > self.max_tokens:
+                flush()
+                current, current_tokens = [], 0
+            current.append(unit)
+            current_tokens += unit[2]
+        if current:
+            flush()
+
+        return chunks
@@ -0,0 +1,142 @@
+"""Process-wide OpenAI clients sharing pooled HTTP connections."""
+import asyncio
+import atexit
+import logging
+import threading
+from typing import TYPE_CHECKING, Any, Coroutine, Dict, Optional, Tuple, TypeVar
+
+from ..config import processing_config
+
+if TYPE_CHECKING:
+    # httpx and openai are imported when the first client is created
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+ClientKey = Tuple[str, Optional[str], Optional[str], Optional[str]]
+
+_lock = threading.Lock()
+_sync_clients: Dict[ClientKey, Any] = {}
+_async_clients: Dict[ClientKey, Any] = {}
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_thread: Optional[threading.Thread] = None
+
+
+def _client_key(api_config: Dict[str, Any], api_provider: str) -> ClientKey:
+    endpoint = api_config.get('azure_endpoint', api_config.get('base_url'))
+    return (api_provider, endpoint, api_config.get('api_key'), api_config.get('api_version'))
+
+
+def _limits() -> "httpx.Limits":
+    import httpx
+    return httpx.Limits(
+        max_connections=processing_config.http_max_connections,
+        max_keepalive_connections=processing_config.http_max_keepalive_connections,
+        keepalive_expiry=processing_config.http_keepalive_expiry,
+    )
+
+
+def _timeout() -> "httpx.Timeout":
+    import httpx
+    return httpx.Timeout(processing_config.http_timeout, connect=processing_config.http_connect_timeout)
+
+
+def _build_client(api_config: Dict[str, Any], api_provider: str, client_cls, azure_cls, http_client):
+    if api_provider == "azure":
+        return azure_cls(
+            api_version=api_config.get('api_version', '2024-12-01-preview'),
+            azure_endpoint=api_config.get('azure_endpoint', api_config.get('base_url')),
+            api_key=api_config.get('api_key'),
+            http_client=http_client,
+            max_retries=0  # Retries are paced by the shared rate limiter
+        )
+    return client_cls(
+        api_key=api_config.get('api_key'),
+        base_url=api_config.get('base_url'),
+        http_client=http_client,
+        max_retries=0
+    )
+
+
+def get_client(api_config: Dict[str, Any], api_provider: str):
+    """Shared synchronous client for an endpoint and key."""
+    import httpx
+    from openai import AzureOpenAI, OpenAI
+    key = _client_key(api_config, api_provider)
+    with _lock:
+        if key not in _sync_clients:
+            http_client = httpx.Client(limits=_limits(), timeout=_timeout())
+            _sync_clients[key] = _build_client(api_config, api_provider, OpenAI, AzureOpenAI, http_client)
+        return _sync_clients[key]
+
+
+def get_async_client(api_config: Dict[str, Any], api_provider: str):
+    """Shared asynchronous client for an endpoint and key.
+
+    Only use it from coroutines passed to :func:`run_coroutine`; its
+    connections belong to the shared event loop.
+    """
+    import httpx
+    from openai import AsyncAzureOpenAI, AsyncOpenAI
+    key = _client_key(api_config, api_provider)
+    with _lock:
+        if key not in _async_clients:
+            http_client = httpx.AsyncClient(limits=_limits(), timeout=_timeout())
+            _async_clients[key] = _build_client(api_config, api_provider, AsyncOpenAI, AsyncAzureOpenAI, http_client)
+        return _async_clients[key]
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    global _loop, _loop_thread
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            _loop_thread = threading.Thread(target=_loop.run_forever, name="llm-event-loop", daemon=True)
+            _loop_thread.start()
+        return _loop
+
+
+def run_coroutine(coro: Coroutine[Any, Any, T]) -> T:
+    """Run a coroutine on the shared event loop and wait for its result.
+
+    A single long-lived loop lets the async clients keep their connections
+    open between documents, stages and calling threads.
+    """
+    loop = _get_loop()
+    if threading.current_thread() is _loop_thread:
+        raise RuntimeError("run_coroutine cannot be called from the shared event loop")
+    future = asyncio.run_coroutine_threadsafe(coro, loop)
+    try:
+        return future.result()
+    except BaseException:
+        # Interrupted while waiting (Ctrl-C): do not leave the coroutine running on the loop
+        future.cancel()
+        raise
+
+
+async def _close_async_clients() -> None:
+    for client in list(_async_clients.values()):
+        await client.close()
+
+
+def close_all() -> None:
+    """Close every shared client and stop the shared event loop."""
+    global _loop, _loop_thread
+    for client in list(_sync_clients.values()):
+        client.close()
+    _sync_clients.clear()
+
+    if _loop is not None:
+        try:
+            asyncio.run_coroutine_threadsafe(_close_async_clients(), _loop).result(timeout=10)
+        except Exception as e:
+            logger.debug(f"Error closing async clients: {str(e)}")
+        _loop.call_soon_threadsafe(_loop.stop)
+        _loop_thread.join(timeout=10)
+        _loop.close()
+        _loop, _loop_thread = None, None
+    _async_clients.clear()
+
+
+atexit.register(close_all)
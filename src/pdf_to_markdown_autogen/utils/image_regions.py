@@ -0,0 +1,246 @@
+"""Figure detection and extraction from rasterized PDF pages.
+
+Everything here is module-level and free of agent state so that page ranges
+can be handed to worker processes.
+"""
+import heapq
+import math
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from ..config import processing_config
+from .pdf_backend import BGR
+from .rasterize import iter_page_arrays
+
+Region = Tuple[int, int, int, int]
+# (image path, 1-based page number, (x, y, w, h) on the rendered page)
+ImageResult = Tuple[str, int, Region]
+# (1-based page number, images found on that page)
+PageImages = Tuple[int, List[ImageResult]]
+# Thin line art loses most of its outline area when downscaled, so the
+# downscaled pass accepts any fill and leaves that test to the full-resolution one
+CANDIDATE_MIN_FILL = 0.0
+
+
+def to_gray(image: np.ndarray, channel_order: str = BGR) -> np.ndarray:
+    """Grayscale version of a page in either channel order."""
+    if image.ndim == 2:
+        return image
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY if channel_order == BGR else cv2.COLOR_RGB2GRAY)
+
+
+def _figure_boxes(gray: np.ndarray, min_area: float, min_fill: float = 0.1) -> List[Region]:
+    """Bounding boxes of the figure-like shapes in a grayscale image."""
+    # Apply adaptive threshold to handle varying backgrounds
+    binary = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY_INV, 11, 2)
+
+    # Apply morphological operations to connect components of diagrams
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3,3))
+    binary = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, kernel)
+
+    # Find contours
+    contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    boxes = []
+    for contour in contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        area = w * h
+        aspect_ratio = w / h if h != 0 else 0
+
+        # Filter criteria for actual diagrams/figures:
+        # 1. Must be larger than min_area (eliminates text characters)
+        # 2. Must have reasonable aspect ratio (not too thin/wide)
+        # 3. Must have sufficient complexity (perimeter to area ratio)
+        if (area >= min_area and
+            0.2 <= aspect_ratio <= 5 and  # Reasonable aspect ratio
+            cv2.contourArea(contour) / area > min_fill):  # Sufficient fill ratio
+            boxes.append((x, y, w, h))
+
+    return boxes
+
+
+def _refine_candidate(gray: np.ndarray, candidate: Region, scale: float, min_area: float) -> List[Region]:
+    """Full-resolution figure boxes inside a candidate found on the downscaled page.
+
+    The candidate is mapped back with a margin wide enough for the rounding
+    of the downscale and the threshold's 11 px neighbourhood, and the same
+    detection is repeated on that window only.
+    """
+    height, width = gray.shape[:2]
+    x, y, w, h = candidate
+    margin = math.ceil(2 / scale) + 8
+    x0 = max(0, math.floor(x / scale) - margin)
+    y0 = max(0, math.floor(y / scale) - margin)
+    x1 = min(width, math.ceil((x + w) / scale) + margin)
+    y1 = min(height, math.ceil((y + h) / scale) + margin)
+    return [(bx + x0, by + y0, bw, bh) for bx, by, bw, bh in _figure_boxes(gray[y0:y1, x0:x1], min_area)]
+
+
+def detect_image_boundaries(image: np.ndarray, scale: float = 1.0) -> List[Region]:
+    """Detect boundaries of actual diagrams and figures in a page.
+
+    ``image`` is a BGR page or an already grayscale one. With ``scale`` below
+    1 candidates are searched for on a page downscaled by that factor, and
+    only the windows around them are analysed at full resolution, so the
+    boxes are those of a full-resolution pass at a fraction of the cost.
+    """
+    gray = to_gray(image)
+
+    # Get image dimensions for relative size calculations
+    height, width = gray.shape[:2]
+    min_area = (width * height) * 0.01  # Minimum 1% of page area
+
+    if 0 < scale < 1:
+        # Passing the factor rather than a size keeps OpenCV's fast path for 1/2, 1/4, ...
+        small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        boxes = [
+            box
+            for candidate in _figure_boxes(small, min_area * scale * scale, CANDIDATE_MIN_FILL)
+            for box in _refine_candidate(gray, candidate, scale, min_area)
+        ]
+    else:
+        boxes = _figure_boxes(gray, min_area)
+
+    image_regions = []
+    for x, y, w, h in boxes:
+        # Expand region slightly to ensure we capture the full diagram
+        x = max(0, x - 5)
+        y = max(0, y - 5)
+        w = min(width - x, w + 10)
+        h = min(height - y, h + 10)
+
+        image_regions.append((x, y, w, h))
+
+    # Merge overlapping regions
+    image_regions = merge_overlapping_regions(image_regions)
+
+    return sorted(image_regions, key=lambda r: (r[1], r[0]))  # Sort by y, then x
+
+
+def _overlapping_pairs(regions: List[Region]) -> Iterator[Tuple[int, int]]:
+    """Index pairs of regions that overlap or touch.
+
+    Sweeps the regions in order of their left edge, keeping a heap of those
+    whose right edge has not been passed yet, so only regions that share
+    some x range are ever compared.
+    """
+    active: List[Tuple[int, int]] = []  # (right edge, index)
+    for i in sorted(range(len(regions)), key=lambda i: regions[i][0]):
+        x, y, w, h = regions[i]
+        while active and active[0][0] < x:
+            heapq.heappop(active)
+        for _, j in active:
+            other_y = regions[j][1]
+            if y <= other_y + regions[j][3] and other_y <= y + h:
+                yield j, i
+        heapq.heappush(active, (x + w, i))
+
+
+def merge_overlapping_regions(regions: List[Region]) -> List[Region]:
+    """Merge overlapping image regions to avoid splitting diagrams.
+
+    Overlapping regions are grouped with a union-find, including chains of
+    regions that only overlap through a third one, and each group becomes
+    its bounding box. Those boxes can overlap regions that none of their
+    members did, so this repeats until nothing more merges.
+    """
+    regions = list(regions)
+    while len(regions) > 1:
+        parent = list(range(len(regions)))
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for i, j in _overlapping_pairs(regions):
+            root_i, root_j = find(i), find(j)
+            if root_i != root_j:
+                parent[max(root_i, root_j)] = min(root_i, root_j)
+
+        bounds: Dict[int, List[int]] = {}
+        for i, (x, y, w, h) in enumerate(regions):
+            box = bounds.setdefault(find(i), [x, y, x + w, y + h])
+            box[0], box[1] = min(box[0], x), min(box[1], y)
+            box[2], box[3] = max(box[2], x + w), max(box[3], y + h)
+
+        if len(bounds) == len(regions):
+            break
+        regions = [(x1, y1, x2 - x1, y2 - y1) for x1, y1, x2, y2 in bounds.values()]
+
+    return regions
+
+
+def iter_page_range_images(
+    pdf_path: str,
+    first_page: int,
+    last_page: int,
+    output_dir: str,
+    dpi: int = 200,
+    batch_size: int = 4,
+    backend: Optional[str] = None,
+    detection_scale: float = 1.0,
+) -> Iterator[PageImages]:
+    """Rasterize a page range, detect figures and save each one as a PNG.
+
+    Yields one ``(page, images)`` entry per page as soon as it is done,
+    including pages without figures, so callers can record progress.
+    """
+    output_dir = Path(output_dir)
+    png_params = [cv2.IMWRITE_PNG_COMPRESSION, processing_config.png_compression]
+
+    for page_number, pixels, channel_order in iter_page_arrays(
+        pdf_path, first_page, last_page, dpi, batch_size, backend
+    ):
+        regions = detect_image_boundaries(to_gray(pixels, channel_order), detection_scale)
+        page_results = []
+
+        for j, (x, y, w, h) in enumerate(regions):
+            # A view into the page; the only copy made is the one cv2 encodes from
+            img = pixels[y:y+h, x:x+w]
+            if channel_order != BGR:
+                img = cv2.cvtColor(img, cv2.COLOR_RGB2BGR)
+
+            img_path = output_dir / f"image_{page_number}_{j+1}.png"
+            if not cv2.imwrite(str(img_path), img, png_params):
+                raise IOError(f"Could not write {img_path}")
+
+            page_results.append((str(img_path), page_number, (x, y, w, h)))
+
+        del pixels
+        yield page_number, page_results
+
+
+def extract_page_range(
+    pdf_path: str,
+    first_page: int,
+    last_page: int,
+    output_dir: str,
+    dpi: int = 200,
+    batch_size: int = 4,
+    backend: Optional[str] = None,
+    detection_scale: float = 1.0,
+) -> List[PageImages]:
+    """Extract the figures of a page range; the unit of work for pool workers."""
+    return list(iter_page_range_images(
+        pdf_path, first_page, last_page, output_dir, dpi, batch_size, backend, detection_scale
+    ))
+
+
+def split_page_ranges(
+    first_page: int, last_page: int, workers: int, ranges_per_worker: int = 4
+) -> List[Tuple[int, int]]:
+    """Split an inclusive page range into contiguous sub-ranges for a pool.
+
+    Several ranges per worker keep the pool busy when some pages are much
+    more expensive to render than others.
+    """
+    page_count = last_page - first_page + 1
+    if page_count <= 0:
+        return []
+    span = max(1, math.ceil(page_count / (max(1, workers) * ranges_per_worker)))
+    return [(start, min(start + span - 1, last_page)) for start in range(first_page, last_page + 1, span)]
@@ -0,0 +1,147 @@
+"""Concurrent chat-completion engine used by the extractor and validator."""
+import asyncio
+import logging
+import random
+from typing import Any, Callable, Dict, List, Optional
+
+from .http_clients import get_async_client, run_coroutine
+from .rate_limiter import RateLimiter, retry_after_seconds
+from .tokens import MIN_REPLY_TOKENS, ModelLimits, TokenUsage, count_message_tokens, count_tokens, model_limits
+
+logger = logging.getLogger(__name__)
+
+Messages = List[Dict[str, str]]
+ResultCallback = Callable[[int, str], None]
+
+
+class ChatCompletionEngine:
+    """Keeps up to ``max_concurrency`` chat requests in flight.
+
+    Requests are started when the shared rate limiter allows and replies
+    are returned in request order regardless of completion order. Requests
+    run on the process-wide event loop with the shared, pooled API client.
+    Rate-limited, timed-out and server-error requests are retried. Each
+    request's ``max_tokens`` is reduced to what still fits the model's
+    context after its prompt, and the tokens used are totalled in ``usage``.
+    """
+
+    def __init__(
+        self,
+        api_config: Dict[str, Any],
+        api_provider: str,
+        model: str,
+        max_tokens: int,
+        max_concurrency: int = 4,
+        limiter: Optional[RateLimiter] = None,
+        max_retries: int = 6,
+        limits: Optional[ModelLimits] = None,
+    ):
+        self.api_config = api_config
+        self.api_provider = api_provider
+        self.model = model
+        self.max_tokens = max_tokens
+        self.max_concurrency = max(1, max_concurrency)
+        self.limiter = limiter if limiter is not None else RateLimiter(0)
+        self.max_retries = max_retries
+        self.limits = limits if limits is not None else model_limits(model)
+        self.usage = TokenUsage()
+
+    def _reply_tokens(self, index: int, prompt_tokens: int) -> int:
+        """``max_tokens`` for a request: the configured limit, or what is left of the context."""
+        available = self.limits.context_window - prompt_tokens
+        if available < MIN_REPLY_TOKENS:
+            raise ValueError(f"Request {index + 1} has {prompt_tokens} prompt tokens, too many for "
+                             f"the {self.limits.context_window}-token context of {self.model}")
+        return min(self.max_tokens, available)
+
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        return min(60.0, 2.0 ** attempt) * random.uniform(1.0, 1.25)
+
+    async def _complete(
+        self,
+        client,
+        semaphore: asyncio.Semaphore,
+        index: int,
+        messages: Messages,
+        on_result: Optional[ResultCallback] = None,
+    ) -> str:
+        from openai import APIConnectionError, APIStatusError, APITimeoutError, RateLimitError
+        
+        prompt_tokens = count_message_tokens(messages, self.model)
+        max_tokens = self._reply_tokens(index, prompt_tokens)
+        # Expect a reply about as long as the prompt
+        estimate = prompt_tokens + min(max_tokens, prompt_tokens)
+        async with semaphore:
+            for attempt in range(self.max_retries + 1):
+                delay = self.limiter.reserve(estimate)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+                try:
+                    raw = await client.chat.completions.with_raw_response.create(
+                        messages=messages,
+                        model=self.model,
+                        max_tokens=max_tokens
+                    )
+                    break
+                except RateLimitError as e:
+                    # The request was not served; give back its tokens and wait
+                    self.limiter.adjust_tokens(-estimate)
+                    if attempt == self.max_retries:
+                        raise
+                    retry_after = retry_after_seconds(e.response.headers)
+                    await asyncio.sleep(self.limiter.on_rate_limited(retry_after, self._backoff(attempt)))
+                except (APITimeoutError, APIConnectionError, APIStatusError) as e:
+                    if isinstance(e, APIStatusError) and e.status_code < 500:
+                        raise
+                    self.limiter.adjust_tokens(-estimate)
+                    if attempt == self.max_retries:
+                        raise
+                    delay = self._backoff(attempt)
+                    logger.warning(f"Request {index + 1} failed ({str(e)}); retrying in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+
+        self.limiter.observe_headers(raw.headers)
+        response = raw.parse()
+        if not response.choices:
+            raise Exception(f"Empty response received from the model for chunk {index + 1}")
+        content = response.choices[0].message.content
+
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            self.limiter.adjust_tokens(usage.total_tokens - estimate)
+            self.usage.add(usage.prompt_tokens, usage.completion_tokens, prompt_tokens)
+        else:
+            self.usage.add(prompt_tokens, count_tokens(content or "", self.model), prompt_tokens)
+
+        logger.info(f"Completed request {index + 1}")
+        if on_result is not None:
+            on_result(index, content)
+        return content
+
+    async def _complete_all(self, requests: List[Messages], on_result: Optional[ResultCallback] = None) -> List[str]:
+        client = get_async_client(self.api_config, self.api_provider)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        tasks = [
+            asyncio.ensure_future(self._complete(client, semaphore, i, messages, on_result))
+            for i, messages in enumerate(requests)
+        ]
+        try:
+            return await asyncio.gather(*tasks)
+        except BaseException:
+            # The batch has failed; stop the other requests from spending tokens and rate budget
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    def complete_all(self, requests: List[Messages], on_result: Optional[ResultCallback] = None) -> List[str]:
+        """Run every request concurrently and return the replies in order.
+
+        ``on_result(index, reply)`` is called as each request finishes, so
+        callers can persist progress before the whole batch is done.
+        """
+        if not requests:
+            return []
+        return run_coroutine(self._complete_all(requests, on_result))
@@ -0,0 +1,350 @@
+"""Deterministic comparison of generated markdown with the source PDF text."""
+import bisect
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+# Words compared as overlapping n-grams, so reordered or dropped runs show up
+SHINGLE_SIZE = 3
+# Uncovered runs shorter than this are treated as noise
+MIN_MISSING_WORDS = 4
+
+_WORD = re.compile(r'\w+')
+_HYPHEN_BREAK = re.compile(r'(\w)-\n\s*(\w)')
+_HTML_COMMENT = re.compile(r'<!--.*?-->', re.DOTALL)
+_IMAGE = re.compile(r'!\[[^\]]*\]\([^)]*\)')
+_LINK_TARGET = re.compile(r'\]\([^)]*\)')
+_TABLE_ROW = re.compile(r'^\s*\|.*\|\s*$', re.MULTILINE)
+_TABLE_SEPARATOR = re.compile(r'^\s*\|?\s*:?-{3,}:?\s*(\|\s*:?-{3,}:?\s*)*\|?\s*$')
+# Written by the extractor before each converted chunk, and after the last one
+PAGE_MARKER = re.compile(r'<!-- (?:pages? (\d+)(?:-(\d+))?|end of pages) -->')
+END_OF_PAGES_MARKER = "<!-- end of pages -->"
+# A marker and the line break after it
+_MARKER_LINE = re.compile(PAGE_MARKER.pattern + r'\n?')
+
+
+def normalize_source(text: str) -> str:
+    """Undo PDF extraction artifacts that the markdown is not expected to keep."""
+    return _HYPHEN_BREAK.sub(r'\1\2', text)
+
+
+def _blank(match) -> str:
+    return ' ' * len(match.group())
+
+
+def normalize_markdown(markdown: str) -> str:
+    """Blank out markdown-only content (comments, images, link targets).
+
+    The result has the same length as the input, so offsets into it are
+    offsets into the original markdown.
+    """
+    markdown = _HTML_COMMENT.sub(_blank, markdown)
+    markdown = _IMAGE.sub(_blank, markdown)
+    return _LINK_TARGET.sub(lambda m: ']' + _blank(m)[1:], markdown)
+
+
+def page_marker(first_page: int, last_page: int) -> str:
+    """Comment marking the source pages of the markdown that follows it."""
+    if first_page == last_page:
+        return f"<!-- page {first_page} -->"
+    return f"<!-- pages {first_page}-{last_page} -->"
+
+
+def strip_page_markers(markdown: str) -> str:
+    """``markdown`` without the page markers, which are only needed for validation."""
+    return _MARKER_LINE.sub('', markdown)
+
+
+def words_with_offsets(text: str) -> Tuple[List[str], List[int]]:
+    """Lower-cased, NFKC-normalized words of ``text`` and the offset each one starts at."""
+    words, offsets = [], []
+    for match in _WORD.finditer(text):
+        words.append(unicodedata.normalize('NFKC', match.group()).lower())
+        offsets.append(match.start())
+    return words, offsets
+
+
+def _shingles(words: List[str]) -> List[Tuple[str, ...]]:
+    size = min(SHINGLE_SIZE, len(words))
+    return [tuple(words[i:i + size]) for i in range(len(words) - size + 1)] if size else []
+
+
+@dataclass
+class MissingSpan:
+    """A run of source words that does not appear in the markdown."""
+
+    page: int  # 1-based
+    word_count: int
+    excerpt: str
+
+
+@dataclass
+class PageCoverage:
+    """How much of one source page made it into the markdown."""
+
+    page: int  # 1-based
+    word_count: int
+    coverage: float  # Share of the page's word n-grams found in the markdown
+    missing: List[MissingSpan] = field(default_factory=list)
+    markdown_span: Optional[Tuple[int, int]] = None  # Approximate (start, end) in the markdown
+
+
+@dataclass
+class ValidationReport:
+    """Outcome of the local comparison."""
+
+    coverage: float
+    pages: List[PageCoverage]
+    structure_issues: List[str]
+    length_ratio: float
+
+    def pages_below(self, threshold: float) -> List[PageCoverage]:
+        return [page for page in self.pages if page.word_count and page.coverage < threshold]
+
+    def summary(self, max_spans: int = 20) -> str:
+        lines = [
+            f"Coverage: {self.coverage:.1%} of source word sequences found in the markdown",
+            f"Length ratio (markdown/source words): {self.length_ratio:.2f}",
+        ]
+        spans = [span for page in self.pages for span in page.missing]
+        if spans:
+            lines.append(f"Missing spans ({len(spans)}):")
+            lines.extend(f"  page {span.page}: {span.word_count} words: \"{span.excerpt}\"" for span in spans[:max_spans])
+            if len(spans) > max_spans:
+                lines.append(f"  ... and {len(spans) - max_spans} more")
+        if self.structure_issues:
+            lines.append("Structure issues:")
+            lines.extend(f"  {issue}" for issue in self.structure_issues)
+        return "\n".join(lines)
+
+
+@dataclass
+class PageAnchor:
+    """A stretch of markdown converted from a known range of source pages."""
+
+    start: int  # Offsets into the markdown, end exclusive
+    end: int
+    first_page: int  # 1-based, inclusive
+    last_page: int
+
+    @property
+    def label(self) -> str:
+        if self.first_page == self.last_page:
+            return f"page {self.first_page}"
+        return f"pages {self.first_page}-{self.last_page}"
+
+
+class PageIndex:
+    """Maps markdown offsets to the source pages they were converted from.
+
+    Built from the page markers the extractor writes before each chunk.
+    Neighbouring chunks that share a page (one page split across requests)
+    are merged, so every anchor pairs with whole source pages.
+    """
+
+    def __init__(self, anchors: List[PageAnchor]):
+        self.anchors = anchors
+        self._starts = [anchor.start for anchor in anchors]
+
+    @classmethod
+    def from_markdown(cls, markdown: str) -> 'PageIndex':
+        anchors: List[PageAnchor] = []
+        markers = list(PAGE_MARKER.finditer(markdown))
+        for marker, following in zip(markers, markers[1:] + [None]):
+            if marker.group(1) is None:
+                continue
+            first = int(marker.group(1))
+            last = int(marker.group(2) or first)
+            end = following.start() if following is not None else len(markdown)
+            if anchors and first <= anchors[-1].last_page:
+                anchors[-1].end = end
+                anchors[-1].last_page = max(last, anchors[-1].last_page)
+            else:
+                anchors.append(PageAnchor(marker.end(), end, first, last))
+        return cls(anchors)
+
+    def __bool__(self) -> bool:
+        return bool(self.anchors)
+
+    def anchor_at(self, offset: int) -> Optional[PageAnchor]:
+        """The anchor containing a markdown offset, if any."""
+        i = bisect.bisect_right(self._starts, offset) - 1
+        if i >= 0 and offset < self.anchors[i].end:
+            return self.anchors[i]
+        return None
+
+    def anchor_for_page(self, page: int) -> Optional[PageAnchor]:
+        """The anchor converted from a source page, if any."""
+        for anchor in self.anchors:
+            if anchor.first_page <= page <= anchor.last_page:
+                return anchor
+        return None
+
+    def line_range(self, markdown: str, anchor: PageAnchor) -> Tuple[int, int]:
+        """1-based first and last markdown line of an anchor."""
+        text = markdown[anchor.start:anchor.end]
+        start = anchor.start + len(text) - len(text.lstrip('\n'))
+        first = markdown.count('\n', 0, start) + 1
+        return first, first + text.strip('\n').count('\n')
+
+
+def check_structure(markdown: str) -> List[str]:
+    """Markdown structure problems: tables, code fences and headings."""
+    issues = []
+    lines = markdown.split('\n')
+
+    fences = sum(1 for line in lines if line.lstrip().startswith('```'))
+    if fences % 2:
+        issues.append("Unclosed code fence")
+
+    # Tables: consecutive lines starting with a pipe
+    i = 0
+    while i < len(lines):
+        if not lines[i].lstrip().startswith('|'):
+            i += 1
+            continue
+        start = i
+        while i < len(lines) and lines[i].lstrip().startswith('|'):
+            i += 1
+        table = lines[start:i]
+        if len(table) < 2:
+            continue
+        if not _TABLE_SEPARATOR.match(table[1]):
+            issues.append(f"Table at line {start + 1} has no header separator")
+        columns = {line.strip().strip('|').count('|') for line in table if not _TABLE_SEPARATOR.match(line)}
+        if len(columns) > 1:
+            issues.append(f"Table at line {start + 1} has rows with different column counts")
+
+    levels = [len(m.group(1)) for m in re.finditer(r'^(#{1,6})\s', markdown, re.MULTILINE)]
+    for previous, level in zip(levels, levels[1:]):
+        if level > previous + 1:
+            issues.append(f"Heading level jumps from {previous} to {level}")
+            break
+
+    return issues
+
+
+def _ngram_positions(words: List[str], start: int, end: int) -> Dict[Tuple[str, ...], int]:
+    """First position of every n-gram of ``words[start:end]`` (short n-grams too, for short pages)."""
+    positions: Dict[Tuple[str, ...], int] = {}
+    for size in {SHINGLE_SIZE, 1, 2}:
+        for i in range(start, end - size + 1):
+            positions.setdefault(tuple(words[i:i + size]), i)
+    return positions
+
+
+def validate_locally(pages: List[str], markdown: str, index: Optional[PageIndex] = None) -> ValidationReport:
+    """Compare the source pages with the markdown without calling a model.
+
+    Pages are located in the markdown through ``index`` (built from the
+    page markers when not given), falling back to where their text matched.
+    """
+    if index is None:
+        index = PageIndex.from_markdown(markdown)
+    md_text = normalize_markdown(markdown)
+    md_words, md_offsets = words_with_offsets(md_text)
+
+    # First markdown position of every n-gram, for locating pages
+    md_positions = _ngram_positions(md_words, 0, len(md_words))
+    # Pages with a marker are only compared with the markdown converted from them
+    anchor_positions: Dict[int, Dict[Tuple[str, ...], int]] = {}
+
+    page_reports = []
+    total_shingles = 0
+    found_shingles = 0
+    source_words = 0
+
+    for page_number, page_text in enumerate(pages, start=1):
+        words, _ = words_with_offsets(normalize_source(page_text))
+        source_words += len(words)
+        shingles = _shingles(words)
+        if not shingles:
+            page_reports.append(PageCoverage(page_number, len(words), 1.0))
+            continue
+
+        anchor = index.anchor_for_page(page_number)
+        positions_in = md_positions
+        if anchor is not None:
+            if id(anchor) not in anchor_positions:
+                first_word = bisect.bisect_left(md_offsets, anchor.start)
+                last_word = bisect.bisect_left(md_offsets, anchor.end)
+                anchor_positions[id(anchor)] = _ngram_positions(md_words, first_word, last_word)
+            positions_in = anchor_positions[id(anchor)]
+        found = [shingle in positions_in for shingle in shingles]
+        total_shingles += len(shingles)
+        found_shingles += sum(found)
+
+        # A word is covered if any n-gram containing it was found
+        size = len(shingles[0])
+        covered = [False] * len(words)
+        for i, hit in enumerate(found):
+            if hit:
+                for j in range(i, i + size):
+                    covered[j] = True
+
+        missing = []
+        i = 0
+        while i < len(words):
+            if covered[i]:
+                i += 1
+                continue
+            start = i
+            while i < len(words) and not covered[i]:
+                i += 1
+            if i - start >= MIN_MISSING_WORDS:
+                excerpt = " ".join(words[start:min(i, start + 12)]) + (" ..." if i - start > 12 else "")
+                missing.append(MissingSpan(page_number, i - start, excerpt))
+
+        positions = sorted(positions_in[s] for s, hit in zip(shingles, found) if hit)
+        span = None
+        if positions and anchor is not None:
+            span = (anchor.start, anchor.end)
+        elif positions:
+            # Trim stray matches of common phrases elsewhere in the document
+            trim = len(positions) // 10
+            first, last = positions[trim], positions[len(positions) - 1 - trim]
+            last_word = min(last + size - 1, len(md_words) - 1)
+            span = (md_offsets[first], md_offsets[last_word] + len(md_words[last_word]))
+
+        page_reports.append(PageCoverage(
+            page=page_number,
+            word_count=len(words),
+            coverage=sum(found) / len(shingles),
+            missing=missing,
+            markdown_span=span,
+        ))
+
+    return ValidationReport(
+        coverage=found_shingles / total_shingles if total_shingles else 1.0,
+        pages=page_reports,
+        structure_issues=check_structure(markdown),
+        length_ratio=len(md_words) / source_words if source_words else 1.0,
+    )
+
+
+def ocr_noise(text: str) -> float:
+    """Share of a text that looks like OCR debris: stray symbols and one-letter words."""
+    if not text.strip():
+        return 0.0
+    visible = [c for c in text if not c.isspace()]
+    odd = sum(1 for c in visible if not (c.isalnum() or c in ".,;:!?'\"()-/%&$@#*+=[]{}<>|_"))
+    words = _WORD.findall(text)
+    single = sum(1 for w in words if len(w) == 1 and not w.isdigit() and w.lower() not in ("a", "i"))
+    return min(1.0, odd / len(visible) + (single / len(words) if words else 0.0))
+
+
+def page_risk(page: PageCoverage, page_text: str, page_markdown: str, image_count: int = 0) -> float:
+    """How likely a page is to be badly converted; 0 means nothing suspicious.
+
+    Combines missing coverage with features that conversions often get
+    wrong: tables, figures and noisy (OCR-like) text.
+    """
+    if not page.word_count:
+        return 0.0
+    risk = (1.0 - page.coverage) * 2.0
+    if _TABLE_ROW.search(page_markdown) or re.search(r'\S {2,}\S.* {2,}\S', page_text):
+        risk += 0.3
+    risk += min(0.3, 0.1 * image_count)
+    risk += min(0.5, ocr_noise(page_text))
+    return risk
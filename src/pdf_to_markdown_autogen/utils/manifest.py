@@ -0,0 +1,100 @@
+"""Per-page fingerprint manifest used for incremental re-conversion."""
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+
+
+def contiguous_runs(pages: Iterable[int]) -> List[Tuple[int, int]]:
+    """Group page numbers into sorted, inclusive ``(first, last)`` runs."""
+    runs: List[Tuple[int, int]] = []
+    for page in sorted(set(pages)):
+        if runs and runs[-1][1] == page - 1:
+            runs[-1] = (runs[-1][0], page)
+        else:
+            runs.append((page, page))
+    return runs
+
+
+class ConversionManifest:
+    """Fingerprints and per-chunk markdown of a finished conversion.
+
+    Stored as JSON next to the markdown output. On the next run the page
+    fingerprints show which pages changed; chunks whose pages are all
+    unchanged are spliced back in without being converted again.
+    """
+
+    def __init__(
+        self,
+        page_fingerprints: List[str],
+        chunks: Optional[List[Dict[str, Any]]] = None,
+        images: Optional[List[Tuple[str, int, Tuple[int, int, int, int]]]] = None,
+        model: str = "",
+    ):
+        self.page_fingerprints = page_fingerprints
+        self.chunks = chunks or []  # {"first_page", "last_page", "markdown"}
+        self.images = images or []
+        self.model = model
+
+    @staticmethod
+    def path_for(output_file: Union[str, Path]) -> Path:
+        """Manifest location for a markdown output file."""
+        output_file = Path(output_file)
+        return output_file.with_name(f"{output_file.stem}.manifest.json")
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> Optional["ConversionManifest"]:
+        """Load a manifest, returning None if it is missing or unusable."""
+        path = Path(path)
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") != MANIFEST_VERSION:
+                logger.info(f"Ignoring manifest with unsupported version: {path}")
+                return None
+            return cls(
+                page_fingerprints=data["page_fingerprints"],
+                chunks=data["chunks"],
+                images=[(p, page, tuple(region)) for p, page, region in data.get("images", [])],
+                model=data.get("model", ""),
+            )
+        except Exception as e:
+            logger.warning(f"Could not read manifest {path}: {str(e)}")
+            return None
+
+    def save(self, path: Union[str, Path]) -> None:
+        """Write the manifest atomically."""
+        path = Path(path)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "version": MANIFEST_VERSION,
+                "model": self.model,
+                "page_fingerprints": self.page_fingerprints,
+                "chunks": self.chunks,
+                "images": [list(image) for image in self.images],
+            }, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def changed_pages(self, page_fingerprints: List[str]) -> Set[int]:
+        """1-based pages whose fingerprint differs from this manifest."""
+        return {
+            page
+            for page, fingerprint in enumerate(page_fingerprints, start=1)
+            if page > len(self.page_fingerprints) or self.page_fingerprints[page - 1] != fingerprint
+        }
+
+    def reusable_chunks(self, changed: Set[int], page_count: int) -> List[Dict[str, Any]]:
+        """Previous chunks that cover only unchanged pages of the new document."""
+        return [
+            chunk for chunk in self.chunks
+            if chunk["last_page"] <= page_count
+            and not any(page in changed for page in range(chunk["first_page"], chunk["last_page"] + 1))
+        ]
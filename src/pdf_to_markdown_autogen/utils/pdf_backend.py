@@ -0,0 +1,212 @@
+"""Interchangeable PDF engines for text extraction and page rendering.
+
+PyPDF2 (text) and pdf2image (rendering through poppler) are always
+available. pypdfium2 and PyMuPDF are optional, much faster engines that
+parse and render in-process instead of starting a poppler subprocess for
+every batch of pages. They are opt-in: ``auto`` picks the first of them
+that is installed, and logs which one it chose.
+"""
+import importlib.util
+import logging
+import threading
+from functools import lru_cache
+from typing import TYPE_CHECKING, Iterator, Tuple
+
+if TYPE_CHECKING:
+    # NumPy is imported by the render functions, not by text extraction
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+TEXT_FALLBACK = "pypdf"
+RENDER_FALLBACK = "pdf2image"
+# Optional engines by preference, and the module each one needs
+FAST_BACKENDS = {"pypdfium2": "pypdfium2", "pymupdf": "fitz"}
+
+# Channel orders of rendered page arrays
+BGR = "BGR"
+RGB = "RGB"
+# (1-based page number, height x width x 3 pixels, channel order)
+PageArray = Tuple[int, "np.ndarray", str]
+
+# Neither PDFium nor MuPDF may be called from two threads at once
+_pdfium_lock = threading.RLock()
+_mupdf_lock = threading.RLock()
+
+
+@lru_cache(maxsize=None)
+def resolve_backend(name: str, fallback: str) -> str:
+    """The engine to use for a configured name, falling back when it is not installed."""
+    name = (name or fallback).lower()
+    if name == fallback:
+        return fallback
+    candidates = list(FAST_BACKENDS) if name == "auto" else [name]
+    for candidate in candidates:
+        module = FAST_BACKENDS.get(candidate)
+        if module is None:
+            logger.warning(f"Unknown PDF backend {candidate}; using {fallback}")
+            return fallback
+        if importlib.util.find_spec(module) is not None:
+            if name == "auto":
+                logger.info(f"PDF backend auto: using {candidate} instead of {fallback}")
+            return candidate
+        if name != "auto":
+            logger.warning(f"PDF backend {candidate} is not installed; using {fallback}")
+    return fallback
+
+
+class PdfiumText:
+    """Page text through pypdfium2."""
+
+    def __init__(self, pdf_path: str):
+        import pypdfium2
+        with _pdfium_lock:
+            self._pdf = pypdfium2.PdfDocument(pdf_path)
+
+    @property
+    def page_count(self) -> int:
+        return len(self._pdf)
+
+    def page_text(self, index: int) -> str:
+        with _pdfium_lock:
+            page = self._pdf[index]
+            text_page = page.get_textpage()
+            try:
+                return text_page.get_text_range().replace('\r\n', '\n')
+            finally:
+                text_page.close()
+                page.close()
+
+    def close(self) -> None:
+        with _pdfium_lock:
+            self._pdf.close()
+
+
+class MuPDFText:
+    """Page text through PyMuPDF."""
+
+    def __init__(self, pdf_path: str):
+        import fitz
+        with _mupdf_lock:
+            self._doc = fitz.open(pdf_path)
+
+    @property
+    def page_count(self) -> int:
+        return self._doc.page_count
+
+    def page_text(self, index: int) -> str:
+        with _mupdf_lock:
+            return self._doc[index].get_text()
+
+    def close(self) -> None:
+        with _mupdf_lock:
+            self._doc.close()
+
+
+def open_text_source(pdf_path: str, backend: str):
+    """A text source for a fast backend, or None when PyPDF2 should be used."""
+    backend = resolve_backend(backend, TEXT_FALLBACK)
+    if backend == "pypdfium2":
+        return PdfiumText(pdf_path)
+    if backend == "pymupdf":
+        return MuPDFText(pdf_path)
+    return None
+
+
+def page_count(pdf_path: str, backend: str = "auto") -> int:
+    """Number of pages, read with the render backend."""
+    backend = resolve_backend(backend, RENDER_FALLBACK)
+    if backend == "pypdfium2":
+        source = PdfiumText(pdf_path)
+    elif backend == "pymupdf":
+        source = MuPDFText(pdf_path)
+    else:
+        import pdf2image
+        return pdf2image.pdfinfo_from_path(pdf_path)["Pages"]
+    try:
+        return source.page_count
+    finally:
+        source.close()
+
+
+def _arrays_pdfium(pdf_path: str, first_page: int, last_page: int, dpi: int) -> Iterator[PageArray]:
+    import pypdfium2
+    with _pdfium_lock:
+        pdf = pypdfium2.PdfDocument(pdf_path)
+    try:
+        for page_number in range(first_page, last_page + 1):
+            with _pdfium_lock:
+                page = pdf[page_number - 1]
+                bitmap = page.render(scale=dpi / 72)
+            try:
+                # A view of PDFium's buffer, valid until the bitmap is closed
+                yield page_number, bitmap.to_numpy(), BGR
+            finally:
+                with _pdfium_lock:
+                    bitmap.close()
+                    page.close()
+    finally:
+        with _pdfium_lock:
+            pdf.close()
+
+
+def _arrays_mupdf(pdf_path: str, first_page: int, last_page: int, dpi: int) -> Iterator[PageArray]:
+    import fitz
+    import numpy as np
+    with _mupdf_lock:
+        doc = fitz.open(pdf_path)
+    try:
+        for page_number in range(first_page, last_page + 1):
+            with _mupdf_lock:
+                pixmap = doc[page_number - 1].get_pixmap(dpi=dpi, alpha=False)
+            # A view of the pixmap's samples, valid while the pixmap is referenced
+            array = np.frombuffer(pixmap.samples_mv, dtype=np.uint8).reshape(pixmap.height, pixmap.stride)
+            yield page_number, array[:, :pixmap.width * 3].reshape(pixmap.height, pixmap.width, 3), RGB
+            del array, pixmap
+    finally:
+        with _mupdf_lock:
+            doc.close()
+
+
+def _arrays_pdf2image(
+    pdf_path: str, first_page: int, last_page: int, dpi: int, batch_size: int
+) -> Iterator[PageArray]:
+    import numpy as np
+    import pdf2image
+    for start in range(first_page, last_page + 1, batch_size):
+        end = min(start + batch_size - 1, last_page)
+        batch = pdf2image.convert_from_path(pdf_path, dpi=dpi, first_page=start, last_page=end)
+        batch.reverse()
+        page_number = start
+        while batch:
+            # Pop before converting so the batch no longer references the page
+            image = batch.pop()
+            array = np.asarray(image.convert("RGB") if image.mode != "RGB" else image)
+            image.close()
+            yield page_number, array, RGB
+            page_number += 1
+
+
+def render_page_arrays(
+    pdf_path: str,
+    first_page: int,
+    last_page: int,
+    dpi: int,
+    batch_size: int = 4,
+    backend: str = "auto",
+) -> Iterator[PageArray]:
+    """Yield ``(page_number, pixels, channel_order)`` for an inclusive, 1-based page range.
+
+    ``pixels`` is a height x width x 3 uint8 array in ``channel_order``
+    (``BGR`` or ``RGB``, whichever the engine produces without a copy). It
+    may be a view of the engine's buffer: use it before asking for the next
+    page and copy anything that has to outlive that. The in-process engines
+    render one page at a time; pdf2image renders ``batch_size`` pages per
+    poppler call.
+    """
+    backend = resolve_backend(backend, RENDER_FALLBACK)
+    if backend == "pypdfium2":
+        return _arrays_pdfium(pdf_path, first_page, last_page, dpi)
+    if backend == "pymupdf":
+        return _arrays_mupdf(pdf_path, first_page, last_page, dpi)
+    return _arrays_pdf2image(pdf_path, first_page, last_page, dpi, max(1, batch_size))
@@ -0,0 +1,28 @@
+"""Streaming page rasterization."""
+from typing import Iterator, Optional
+
+from ..config import processing_config
+from .pdf_backend import PageArray, page_count, render_page_arrays
+
+
+def iter_page_arrays(
+    pdf_path: str,
+    first_page: int = 1,
+    last_page: Optional[int] = None,
+    dpi: int = 200,
+    batch_size: int = 4,
+    backend: Optional[str] = None,
+) -> Iterator[PageArray]:
+    """Yield ``(page_number, pixels, channel_order)`` for a page range, one page at a time.
+
+    Pages are rendered with the configured PDF_RENDER_BACKEND (pdf2image
+    renders ``batch_size`` pages per call), so that at most one batch is
+    ever held in memory. ``pixels`` may be a view of the renderer's buffer
+    and is only valid until the next page is requested. Page numbers are
+    1-based and ``last_page`` is inclusive.
+    """
+    if backend is None:
+        backend = processing_config.render_backend
+    if last_page is None:
+        last_page = page_count(pdf_path, backend)
+    return render_page_arrays(pdf_path, first_page, last_page, dpi, batch_size, backend)
@@ -0,0 +1,180 @@
+"""Process-wide adaptive rate limiting for API requests."""
+import logging
+import re
+import threading
+import time
+from typing import Dict, Mapping, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Longest slowdown applied after repeated rate-limit responses
+MAX_SLOWDOWN = 16.0
+# Seconds without a rate-limit response for the slowdown to halve
+SLOWDOWN_HALF_LIFE = 60.0
+
+_DURATION_PART = re.compile(r'(\d+(?:\.\d+)?)(ms|s|m|h)')
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_reset_duration(value: Optional[str]) -> Optional[float]:
+    """Seconds in an ``x-ratelimit-reset-*`` value such as ``"1m30s"`` or ``"250ms"``."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def retry_after_seconds(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """Delay requested by ``retry-after-ms`` or ``retry-after``, if present."""
+    if not headers:
+        return None
+    try:
+        if headers.get('retry-after-ms'):
+            return float(headers['retry-after-ms']) / 1000.0
+        if headers.get('retry-after'):
+            return float(headers['retry-after'])
+    except ValueError:
+        pass
+    return None
+
+
+class _Bucket:
+    """Token bucket that may go negative; a deficit is waited off at the refill rate."""
+
+    def __init__(self, per_minute: float, burst_seconds: float):
+        self.per_minute = per_minute
+        self.burst_seconds = burst_seconds
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    @property
+    def capacity(self) -> float:
+        return max(1.0, self.per_minute * self.burst_seconds / 60.0)
+
+    def refill(self, now: float, slowdown: float) -> None:
+        rate = self.per_minute / 60.0 / slowdown
+        self.level = min(self.capacity, self.level + (now - self.updated) * rate)
+        self.updated = now
+
+    def take(self, amount: float, slowdown: float) -> float:
+        """Deduct ``amount`` and return the seconds until the deficit clears."""
+        self.level -= amount
+        if self.level >= 0:
+            return 0.0
+        return -self.level / (self.per_minute / 60.0 / slowdown)
+
+
+class RateLimiter:
+    """Thread-safe request and token budget shared by every engine in the process.
+
+    Each request reserves one request and its estimated tokens and is told
+    how long to wait before starting. Rate-limit responses pause everyone
+    until the server's ``retry-after`` and slow the budget down; the
+    slowdown halves every minute without one, back to full speed.
+    ``x-ratelimit-*`` headers tighten the limits to what the server reports
+    and pause new requests when a window is exhausted.
+    """
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float = 0):
+        self.requests = self._request_bucket(requests_per_minute)
+        self.tokens = self._token_bucket(tokens_per_minute)
+        self.slowdown = 1.0
+        self._blocked_until = 0.0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _request_bucket(per_minute: float) -> Optional[_Bucket]:
+        # Requests are spaced evenly rather than allowed to burst
+        return _Bucket(per_minute, 60.0 / per_minute) if per_minute > 0 else None
+
+    @staticmethod
+    def _token_bucket(per_minute: float) -> Optional[_Bucket]:
+        # Tokens may burst up to ten seconds' worth
+        return _Bucket(per_minute, 10.0) if per_minute > 0 else None
+
+    def _refill(self, now: float) -> None:
+        if self.slowdown > 1.0:
+            self.slowdown = max(1.0, self.slowdown * 0.5 ** ((now - self._updated) / SLOWDOWN_HALF_LIFE))
+        self._updated = now
+        for bucket in (self.requests, self.tokens):
+            if bucket is not None:
+                bucket.refill(now, self.slowdown)
+
+    def reserve(self, tokens: int = 0) -> float:
+        """Reserve a request of about ``tokens`` tokens; return the seconds to wait."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            delay = max(0.0, self._blocked_until - now)
+            if self.requests is not None:
+                delay = max(delay, self.requests.take(1, self.slowdown))
+            if self.tokens is not None and tokens:
+                delay = max(delay, self.tokens.take(tokens, self.slowdown))
+            return delay
+
+    def adjust_tokens(self, difference: int) -> None:
+        """Correct an earlier estimate once the actual usage is known."""
+        if self.tokens is None or not difference:
+            return
+        with self._lock:
+            self.tokens.level -= difference
+
+    def on_rate_limited(self, retry_after: Optional[float], fallback: float) -> float:
+        """Record a rate-limit response and return the seconds to back off.
+
+        Every request in the process waits at least ``retry_after`` (or
+        ``fallback`` when the server gave no hint) and the budget is slowed.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.slowdown = min(MAX_SLOWDOWN, self.slowdown * 2)
+            wait = retry_after if retry_after is not None else fallback
+            self._blocked_until = max(self._blocked_until, now + wait)
+            logger.warning(f"Rate limited; pausing requests for {wait:.1f}s at 1/{self.slowdown:.0f} speed")
+            return self._blocked_until - now
+
+    def observe_headers(self, headers: Optional[Mapping[str, str]]) -> None:
+        """Tighten limits and pause exhausted windows from ``x-ratelimit-*`` headers."""
+        if not headers:
+            return
+        with self._lock:
+            now = time.monotonic()
+            for kind in ("requests", "tokens"):
+                try:
+                    limit = float(headers.get(f'x-ratelimit-limit-{kind}') or 0)
+                except ValueError:
+                    limit = 0
+                bucket = getattr(self, kind)
+                if limit and (bucket is None or limit < bucket.per_minute):
+                    logger.info(f"Server reports a limit of {limit:.0f} {kind}/min; adopting it")
+                    if bucket is None:
+                        setattr(self, kind, self._request_bucket(limit) if kind == "requests" else self._token_bucket(limit))
+                    else:
+                        bucket.per_minute = limit
+
+                remaining = headers.get(f'x-ratelimit-remaining-{kind}')
+                if remaining is not None and remaining.strip() in ("0", "0.0"):
+                    reset = parse_reset_duration(headers.get(f'x-ratelimit-reset-{kind}'))
+                    if reset:
+                        self._blocked_until = max(self._blocked_until, now + reset)
+
+
+_shared_limiters: Dict[Tuple[float, float], RateLimiter] = {}
+_shared_limiters_lock = threading.Lock()
+
+
+def shared_limiter(requests_per_minute: float, tokens_per_minute: float = 0) -> RateLimiter:
+    """Return the process-wide limiter for the given limits."""
+    key = (requests_per_minute, tokens_per_minute)
+    with _shared_limiters_lock:
+        if key not in _shared_limiters:
+            _shared_limiters[key] = RateLimiter(requests_per_minute, tokens_per_minute)
+        return _shared_limiters[key]
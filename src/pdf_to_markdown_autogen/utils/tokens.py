@@ -0,0 +1,189 @@
+"""Local token counting, model limits and usage accounting."""
+import logging
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Used when no tokenizer is available; close to the average for English prose
+CHARS_PER_TOKEN = 4
+# Tokens the chat format adds to every message, and to prime the reply
+MESSAGE_OVERHEAD_TOKENS = 4
+REPLY_OVERHEAD_TOKENS = 3
+# Markdown is somewhat longer than the text it was converted from
+MARKDOWN_EXPANSION = 1.25
+# Smallest reply worth sending a request for
+MIN_REPLY_TOKENS = 256
+
+
+@dataclass(frozen=True)
+class ModelLimits:
+    """Context window and longest reply of a chat model, in tokens."""
+
+    context_window: int
+    max_output_tokens: int
+
+
+# Matched by the longest model-name prefix; Azure deployment names that
+# follow the model name match too
+MODEL_LIMITS: Dict[str, ModelLimits] = {
+    "gpt-4o": ModelLimits(128000, 16384),
+    "gpt-4.1": ModelLimits(1047576, 32768),
+    "gpt-4-turbo": ModelLimits(128000, 4096),
+    "gpt-4-0125": ModelLimits(128000, 4096),
+    "gpt-4-1106": ModelLimits(128000, 4096),
+    "gpt-4-32k": ModelLimits(32768, 8192),
+    "gpt-4": ModelLimits(8192, 4096),
+    "gpt-35-turbo": ModelLimits(16385, 4096),
+    "gpt-3.5-turbo": ModelLimits(16385, 4096),
+    "o1": ModelLimits(200000, 100000),
+    "o1-mini": ModelLimits(128000, 65536),
+    "o3": ModelLimits(200000, 100000),
+    "o4-mini": ModelLimits(200000, 100000),
+}
+DEFAULT_LIMITS = ModelLimits(128000, 4096)
+
+
+def model_limits(model: str, context_window: int = 0, max_output_tokens: int = 0) -> ModelLimits:
+    """Limits of ``model``; non-zero arguments override the known values."""
+    name = model.lower()
+    prefixes = [prefix for prefix in MODEL_LIMITS if name.startswith(prefix)]
+    limits = MODEL_LIMITS[max(prefixes, key=len)] if prefixes else DEFAULT_LIMITS
+    if not prefixes and not (context_window and max_output_tokens):
+        logger.warning(f"Unknown model {model}; assuming a {limits.context_window}-token context "
+                       f"and {limits.max_output_tokens}-token replies")
+    return ModelLimits(
+        context_window or limits.context_window,
+        min(max_output_tokens or limits.max_output_tokens, context_window or limits.context_window),
+    )
+
+
+def reply_token_limit(limits: ModelLimits, requested: Optional[int] = None) -> int:
+    """``max_tokens`` for requests: the requested value, capped at what the model allows."""
+    if not requested or requested <= 0:
+        return limits.max_output_tokens
+    return min(requested, limits.max_output_tokens)
+
+
+def chunk_token_budget(limits: ModelLimits, max_reply_tokens: int, prompt_overhead: int, requested: int = 0) -> int:
+    """Largest source chunk whose prompt and converted reply both fit the model.
+
+    ``requested`` (when positive) is an upper bound chosen by the user.
+    """
+    fits_reply = int(max_reply_tokens / MARKDOWN_EXPANSION)
+    fits_context = limits.context_window - prompt_overhead - max_reply_tokens
+    budget = max(MIN_REPLY_TOKENS, min(fits_reply, fits_context))
+    return min(requested, budget) if requested > 0 else budget
+
+
+@lru_cache(maxsize=None)
+def _get_encoding(model: str):
+    """Return a tiktoken encoding for ``model`` or None if unavailable."""
+    try:
+        import tiktoken
+    except ImportError:
+        logger.warning("tiktoken is not installed; estimating tokens from character counts")
+        return None
+    # Encodings are downloaded on first use; offline runs need TIKTOKEN_CACHE_DIR
+    # pointing at a pre-seeded cache, or counts fall back to the estimate
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            # Unknown names (such as Azure deployments) use the GPT-4 encoding
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning(f"Could not load tokenizer for {model}, estimating from character counts: {str(e)}")
+        return None
+
+
+def estimate_tokens(text: str) -> int:
+    """Token count estimated from the length of ``text``, for when no tokenizer is available."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+@lru_cache(maxsize=4096)
+def count_tokens(text: str, model: str = "gpt-4o") -> int:
+    """Count the tokens ``text`` occupies for ``model``.
+
+    Results are cached, since the same chunk is counted while chunking,
+    budgeting and rate limiting.
+    """
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return estimate_tokens(text)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def count_message_tokens(messages: List[Dict[str, str]], model: str = "gpt-4o", estimate: bool = False) -> int:
+    """Prompt tokens of a chat request, including the chat format's overhead.
+
+    With ``estimate`` the content is measured from its length, without the tokenizer.
+    """
+    def content_tokens(content: str) -> int:
+        return estimate_tokens(content) if estimate else count_tokens(content, model)
+
+    return REPLY_OVERHEAD_TOKENS + sum(MESSAGE_OVERHEAD_TOKENS + content_tokens(message["content"]) for message in messages)
+
+
+def split_by_tokens(text: str, max_tokens: int, model: str = "gpt-4o") -> List[str]:
+    """Hard-split ``text`` into pieces of at most ``max_tokens`` tokens."""
+    encoding = _get_encoding(model)
+    if encoding is None:
+        step = max_tokens * CHARS_PER_TOKEN
+        return [text[i:i + step] for i in range(0, len(text), step)]
+    tokens = encoding.encode(text, disallowed_special=())
+    return [encoding.decode(tokens[i:i + max_tokens]) for i in range(0, len(tokens), max_tokens)]
+
+
+def tail_tokens(text: str, max_tokens: int, model: str = "gpt-4o") -> str:
+    """Return roughly the last ``max_tokens`` tokens of ``text``."""
+    if max_tokens <= 0:
+        return ""
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return text[-max_tokens * CHARS_PER_TOKEN:]
+    tokens = encoding.encode(text, disallowed_special=())
+    return encoding.decode(tokens[-max_tokens:])
+
+
+@dataclass
+class TokenUsage:
+    """Tokens spent by a run of requests, as reported by the API."""
+
+    requests: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    estimated_prompt_tokens: int = 0  # Counted locally before sending
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def add(self, prompt_tokens: int, completion_tokens: int, estimated_prompt_tokens: int) -> None:
+        self.requests += 1
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        self.estimated_prompt_tokens += estimated_prompt_tokens
+
+    def __add__(self, other: 'TokenUsage') -> 'TokenUsage':
+        return TokenUsage(
+            self.requests + other.requests,
+            self.prompt_tokens + other.prompt_tokens,
+            self.completion_tokens + other.completion_tokens,
+            self.estimated_prompt_tokens + other.estimated_prompt_tokens,
+        )
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.total_tokens,
+            "estimated_prompt_tokens": self.estimated_prompt_tokens,
+        }
+
+    def __str__(self) -> str:
+        return (f"{self.requests} requests, {self.prompt_tokens} prompt + {self.completion_tokens} "
+                f"completion = {self.total_tokens} tokens (prompts estimated at {self.estimated_prompt_tokens})")
@@ -1,6 +1,7 @@
 """PDF to Markdown converter package."""
 
+from .document import PDFDocument
 from .processor import PDFProcessor
 
 __version__ = "0.1.0"
-__all__ = ["PDFProcessor"] 
\ No newline at end of file
+__all__ = ["PDFDocument", "PDFProcessor"] 
\ No newline at end of file
@@ -0,0 +1,193 @@
+import hashlib
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import PyPDF2
+from PyPDF2.generic import IndirectObject
+
+from .pdf_backend import open_text_source
+
+
+def _stable_repr(value: Any) -> str:
+    """A PDF value as text that is the same on every run (unlike IndirectObject's repr)."""
+    if isinstance(value, IndirectObject):
+        return f"{value.idnum} {value.generation} R"
+    if isinstance(value, list):
+        return "[" + " ".join(_stable_repr(item) for item in value) + "]"
+    if isinstance(value, dict):
+        return "<<" + " ".join(f"{key} {_stable_repr(item)}" for key, item in sorted(value.items())) + ">>"
+    return str(value)
+
+
+def encoded_stream_data(stream: Any) -> bytes:
+    """A stream's bytes as stored in the file, with no filter undone.
+
+    PyPDF2 has no public accessor for the encoded data; this is the one
+    place that reads it.
+    """
+    data = stream._data or b""
+    return data.encode('latin-1') if isinstance(data, str) else data
+
+
+def _stream_digest(stream: Any) -> bytes:
+    """SHA-256 of a stream's encoded bytes and the filters that decode them.
+
+    Nothing is decompressed; the encoded bytes identify the content just as
+    well for change detection.
+    """
+    digest = hashlib.sha256()
+    for key in ('/Filter', '/DecodeParms'):
+        digest.update(f"{key}={_stable_repr(stream.get(key))};".encode('utf-8'))
+    digest.update(encoded_stream_data(stream))
+    return digest.digest()
+
+
+class PDFDocument:
+    """Lazily-parsed PDF shared by every stage of a single conversion.
+
+    The file is parsed once on first access. Page text and image XObject
+    references are extracted on demand and cached, so the text and image
+    stages never re-open or re-parse the same document. Text comes from
+    PDF_TEXT_BACKEND (PyPDF2 by default); image XObjects always come from
+    PyPDF2.
+    """
+
+    def __init__(self, pdf_path: Union[str, Path], text_backend: Optional[str] = None):
+        self.pdf_path = str(pdf_path)
+        self.text_backend = text_backend if text_backend is not None else os.getenv('PDF_TEXT_BACKEND', 'pypdf')
+        self._reader = None
+        self._text_source = None
+        self._text_source_opened = False
+        self._page_texts: Dict[int, str] = {}
+        self._page_images: Dict[int, List[Tuple[str, Any]]] = {}
+        # Stream digests by (object number, generation), kept for the whole document
+        self._stream_digests: Dict[Tuple[int, int], bytes] = {}
+
+    @property
+    def reader(self) -> PyPDF2.PdfReader:
+        """The underlying reader, created on first use."""
+        if self._reader is None:
+            self._reader = PyPDF2.PdfReader(self.pdf_path)
+        return self._reader
+
+    @property
+    def pages(self):
+        """Page objects of the parsed document."""
+        return self.reader.pages
+
+    @property
+    def text_source(self):
+        """The fast text engine, or None when PyPDF2 extracts the text."""
+        if not self._text_source_opened:
+            self._text_source = open_text_source(self.pdf_path, self.text_backend)
+            self._text_source_opened = True
+        return self._text_source
+
+    @property
+    def page_count(self) -> int:
+        """Number of pages in the document."""
+        if self.text_source is not None:
+            return self.text_source.page_count
+        return len(self.reader.pages)
+
+    def page_text(self, index: int) -> str:
+        """Raw extracted text of a page (0-based), cached after first call."""
+        if index not in self._page_texts:
+            if self.text_source is not None:
+                self._page_texts[index] = self.text_source.page_text(index)
+            else:
+                self._page_texts[index] = self.pages[index].extract_text() or ""
+        return self._page_texts[index]
+
+    def texts(self) -> List[str]:
+        """Raw extracted text of every page in document order."""
+        return [self.page_text(i) for i in range(self.page_count)]
+
+    def release_page(self, index: int) -> None:
+        """Drop what is cached for a page that is done.
+
+        Besides the text and image references cached here, this evicts the
+        page's content streams from PyPDF2's object cache, which otherwise
+        keeps every parsed page alive; they are re-read if ever needed again.
+        """
+        self._page_texts.pop(index, None)
+        self._page_images.pop(index, None)
+        if self._reader is None:
+            return
+        page = self._reader.pages[index]
+        contents = page.raw_get('/Contents') if '/Contents' in page else None
+        for reference in contents if isinstance(contents, list) else [contents]:
+            if isinstance(reference, IndirectObject):
+                self._reader.resolved_objects.pop((reference.generation, reference.idnum), None)
+
+    def image_xobjects(self, index: int) -> List[Tuple[str, Any]]:
+        """(name, XObject) pairs for the image XObjects on a page (0-based)."""
+        if index not in self._page_images:
+            images = []
+            resources = self.pages[index].get('/Resources')
+            if resources is not None:
+                resources = resources.get_object()
+                if '/XObject' in resources:
+                    x_objects = resources['/XObject'].get_object()
+                    for name in x_objects:
+                        x_object = x_objects[name].get_object()
+                        if x_object.get('/Subtype') == '/Image':
+                            images.append((name, x_object))
+            self._page_images[index] = images
+        return self._page_images[index]
+
+    @staticmethod
+    def image_reference(x_object: Any) -> Optional[Tuple[int, int]]:
+        """(object number, generation) of an indirectly stored XObject, if it is one."""
+        reference = getattr(x_object, 'indirect_reference', None)
+        if reference is None:
+            return None
+        return reference.idnum, reference.generation
+
+    def stream_digest(self, x_object: Any) -> bytes:
+        """Digest of an XObject's stream, computed once per indirect object."""
+        reference = self.image_reference(x_object)
+        if reference is None:
+            return _stream_digest(x_object)
+        if reference not in self._stream_digests:
+            self._stream_digests[reference] = _stream_digest(x_object)
+        return self._stream_digests[reference]
+
+    def image_digest(self, x_object: Any) -> str:
+        """Hash of an image XObject's raw stream, soft mask and decoding parameters."""
+        digest = hashlib.sha256()
+        for key in ('/Width', '/Height', '/BitsPerComponent', '/ColorSpace', '/Filter', '/DecodeParms', '/Decode'):
+            digest.update(f"{key}={_stable_repr(x_object.get(key))};".encode('utf-8'))
+        digest.update(self.stream_digest(x_object))
+        if '/SMask' in x_object:
+            digest.update(self.stream_digest(x_object['/SMask'].get_object()))
+        return digest.hexdigest()
+
+    def page_fingerprint(self, index: int) -> str:
+        """Hash of a page's text and raw image streams, for change detection."""
+        digest = hashlib.sha256(self.page_text(index).encode('utf-8'))
+        for name, x_object in self.image_xobjects(index):
+            digest.update(str(name).encode('utf-8'))
+            digest.update(self.stream_digest(x_object))
+        return digest.hexdigest()
+
+    def page_fingerprints(self) -> List[str]:
+        """Fingerprints of every page in document order."""
+        return [self.page_fingerprint(i) for i in range(self.page_count)]
+
+    def close(self) -> None:
+        """Close the text engine's document handle, if one was opened.
+
+        The document stays usable; the engine is reopened on next use.
+        """
+        if self._text_source is not None:
+            self._text_source.close()
+        self._text_source = None
+        self._text_source_opened = False
+
+    def __enter__(self) -> "PDFDocument":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
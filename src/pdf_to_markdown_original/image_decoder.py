@@ -0,0 +1,328 @@
+"""Decoding of raw (non-JPEG) PDF image samples with NumPy.
+
+Images stored with generic filters (Flate, LZW, ASCII85, ASCIIHex,
+RunLength, or none at all) are plain sample arrays that Pillow cannot
+open. This module undoes the filters and predictors, unpacks 1/2/4/8/16
+bit samples, applies ``/Decode`` arrays and indexed palettes, and returns
+an 8-bit array together with the Pillow mode it should be read in.
+"""
+import zlib
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+from PyPDF2.filters import ASCII85Decode, LZWDecode
+
+from .document import encoded_stream_data
+
+FLATE_FILTERS = ('/FlateDecode', '/Fl')
+LZW_FILTERS = ('/LZWDecode', '/LZW')
+ASCII85_FILTERS = ('/ASCII85Decode', '/A85')
+ASCII_HEX_FILTERS = ('/ASCIIHexDecode', '/AHx')
+RUN_LENGTH_FILTERS = ('/RunLengthDecode', '/RL')
+# Filters that only compress or encode the samples, as opposed to image codecs
+RAW_FILTERS = FLATE_FILTERS + LZW_FILTERS + ASCII85_FILTERS + ASCII_HEX_FILTERS + RUN_LENGTH_FILTERS
+# Filters PyPDF2's get_data() undoes; it has no RunLength decoder, and its
+# predictor support ignores /Colors, so those are undone here instead
+PYPDF2_FILTERS = FLATE_FILTERS + LZW_FILTERS + ASCII85_FILTERS + ASCII_HEX_FILTERS
+# Image codecs whose encoded stream Pillow opens as it is
+PASS_THROUGH_CODECS = ('/DCTDecode', '/DCT', '/JPXDecode')
+
+# Color space names and their (Pillow mode, components)
+DEVICE_SPACES = {
+    '/DeviceGray': ('L', 1), '/CalGray': ('L', 1), '/G': ('L', 1),
+    '/DeviceRGB': ('RGB', 3), '/CalRGB': ('RGB', 3), '/RGB': ('RGB', 3),
+    '/DeviceCMYK': ('CMYK', 4), '/CMYK': ('CMYK', 4),
+}
+MODES_BY_COMPONENTS = {1: 'L', 3: 'RGB', 4: 'CMYK'}
+
+
+class UnsupportedImageError(ValueError):
+    """The image uses a filter, predictor or color space this decoder does not handle."""
+
+
+def filter_chain(x_object: Any) -> Tuple[List[str], List[Any]]:
+    """The stream's filter names in the order they are undone, with their parameters."""
+    filters = x_object.get('/Filter')
+    if filters is None:
+        return [], []
+    filters = filters.get_object()
+    if not isinstance(filters, list):
+        filters = [filters]
+    parms = x_object.get('/DecodeParms')
+    parms = parms.get_object() if parms is not None else None
+    if not isinstance(parms, list):
+        parms = [parms] * len(filters) if len(filters) == 1 else [None] * len(filters)
+    parms = [p.get_object() if p is not None else None for p in parms]
+    return [str(name) for name in filters], [p if isinstance(p, dict) else None for p in parms]
+
+
+def is_raw_image(x_object: Any) -> bool:
+    """Whether the image's samples are stored without an image codec."""
+    filters, _ = filter_chain(x_object)
+    return all(name in RAW_FILTERS for name in filters)
+
+
+def _inflate(data: bytes) -> bytes:
+    try:
+        return zlib.decompress(data)
+    except zlib.error:
+        pass
+    # Keep whatever decompresses before a corrupt or truncated end, which is common in the wild
+    decompressor = zlib.decompressobj()
+    out = []
+    for start in range(0, len(data), 4096):
+        try:
+            out.append(decompressor.decompress(data[start:start + 4096]))
+        except zlib.error:
+            break
+    return b"".join(out)
+
+
+def _ascii_hex(data: bytes) -> bytes:
+    digits = bytes(data).split(b'>', 1)[0]
+    digits = b''.join(digits.split())
+    if len(digits) % 2:
+        digits += b'0'
+    return bytes.fromhex(digits.decode('ascii'))
+
+
+def _run_length(data: bytes) -> bytes:
+    out = bytearray()
+    i = 0
+    while i < len(data):
+        length = data[i]
+        if length == 128:
+            break
+        if length < 128:
+            out += data[i + 1:i + 2 + length]
+            i += length + 2
+        else:
+            out += data[i + 1:i + 2] * (257 - length)
+            i += 2
+    return bytes(out)
+
+
+def _unfilter_png(data: bytes, columns: int, colors: int, bits: int) -> np.ndarray:
+    """Undo PNG row filters (predictors 10-15), returning one row of bytes per line."""
+    bpp = max(1, colors * bits // 8)
+    row_bytes = (columns * colors * bits + 7) // 8
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    height = len(buffer) // (row_bytes + 1)
+    rows = buffer[:height * (row_bytes + 1)].reshape(height, row_bytes + 1)
+    kinds = rows[:, 0]
+    filtered = rows[:, 1:]
+    if not kinds.any():
+        return filtered
+    if np.isin(kinds, (0, 1, 2)).all():
+        # None, Sub and Up only depend on the left byte or the row above: one pass per row
+        out = np.empty_like(filtered)
+        previous = np.zeros(row_bytes, dtype=np.uint8)
+        pad = -row_bytes % bpp
+        for index, kind in enumerate(kinds):
+            row = filtered[index]
+            if kind == 1:
+                row = np.concatenate([row, np.zeros(pad, dtype=np.uint8)]).reshape(-1, bpp)
+                row = row.cumsum(axis=0, dtype=np.uint8).reshape(-1)[:row_bytes]
+            elif kind == 2:
+                row = row + previous
+            out[index] = row
+            previous = out[index]
+        return out
+    if kinds.max() > 4:
+        raise UnsupportedImageError(f"Unsupported PNG filter {int(kinds.max())}")
+
+    # Average and Paeth depend on the decoded left, upper and upper-left
+    # pixels. Pixels on the same anti-diagonal do not depend on each other,
+    # so the image is decoded one diagonal at a time.
+    pixels = -(-row_bytes // bpp)
+    source = np.zeros((height, pixels * bpp), dtype=np.int16)
+    source[:, :row_bytes] = filtered
+    source = source.reshape(height, pixels, bpp)
+    # Decoded pixels, with a zero row above and a zero column to the left
+    decoded = np.zeros((height + 1, pixels + 1, bpp), dtype=np.int16)
+    for diagonal in range(height + pixels - 1):
+        r = np.arange(max(0, diagonal - pixels + 1), min(height - 1, diagonal) + 1)
+        j = diagonal - r
+        left, up, up_left = decoded[r + 1, j], decoded[r, j + 1], decoded[r, j]
+        kind = kinds[r][:, None]
+        estimate = left + up - up_left
+        pa, pb, pc = np.abs(estimate - left), np.abs(estimate - up), np.abs(estimate - up_left)
+        paeth = np.where((pa <= pb) & (pa <= pc), left, np.where(pb <= pc, up, up_left))
+        predicted = np.select(
+            [kind == 1, kind == 2, kind == 3, kind == 4], [left, up, (left + up) >> 1, paeth], 0
+        )
+        decoded[r + 1, j + 1] = (source[r, j] + predicted) & 0xFF
+    return decoded[1:, 1:].reshape(height, pixels * bpp)[:, :row_bytes].astype(np.uint8)
+
+
+def _unfilter_tiff(data: bytes, columns: int, colors: int, bits: int) -> np.ndarray:
+    """Undo TIFF predictor 2 (horizontal differencing) for 8 and 16 bit samples."""
+    if bits not in (8, 16):
+        raise UnsupportedImageError(f"Unsupported TIFF predictor bit depth {bits}")
+    dtype = np.dtype(np.uint8) if bits == 8 else np.dtype('>u2')
+    row_samples = columns * colors
+    samples = np.frombuffer(data, dtype=np.uint8)
+    height = len(samples) // (row_samples * dtype.itemsize)
+    samples = samples[:height * row_samples * dtype.itemsize].view(dtype).reshape(height, columns, colors)
+    native = np.uint8 if bits == 8 else np.uint16
+    undone = samples.cumsum(axis=1, dtype=native)
+    return undone.astype(dtype).view(np.uint8).reshape(height, -1)
+
+
+def _unpredict(data: bytes, parms: Any) -> bytes:
+    predictor = int(parms.get('/Predictor', 1)) if parms else 1
+    if predictor <= 1:
+        return data
+    columns = int(parms.get('/Columns', 1))
+    colors = int(parms.get('/Colors', 1))
+    bits = int(parms.get('/BitsPerComponent', 8))
+    if predictor == 2:
+        return _unfilter_tiff(data, columns, colors, bits).tobytes()
+    if 10 <= predictor <= 15:
+        return _unfilter_png(data, columns, colors, bits).tobytes()
+    raise UnsupportedImageError(f"Unsupported predictor {predictor}")
+
+
+def _as_bytes(data: Any) -> bytes:
+    return data.encode('latin-1') if isinstance(data, str) else (data or b"")
+
+
+def stream_samples(x_object: Any) -> bytes:
+    """The image's sample bytes with every filter and predictor undone."""
+    filters, filter_parms = filter_chain(x_object)
+    if all(name in PYPDF2_FILTERS for name in filters) and not any(
+        parms is not None and int(parms.get('/Predictor', 1)) > 1 for parms in filter_parms
+    ):
+        try:
+            return _as_bytes(x_object.get_data())
+        except Exception:
+            # Corrupt or truncated streams; the decoders below keep what they can
+            pass
+
+    data = encoded_stream_data(x_object)
+    for name, parms in zip(filters, filter_parms):
+        if name in FLATE_FILTERS:
+            data = _unpredict(_inflate(data), parms)
+        elif name in LZW_FILTERS:
+            data = _unpredict(_as_bytes(LZWDecode.Decoder(data).decode()), parms)
+        elif name in ASCII85_FILTERS:
+            data = ASCII85Decode.decode(data)
+        elif name in ASCII_HEX_FILTERS:
+            data = _ascii_hex(data)
+        elif name in RUN_LENGTH_FILTERS:
+            data = _run_length(data)
+        else:
+            raise UnsupportedImageError(f"Unsupported image filter {name}")
+    return data
+
+
+def codec_data(x_object: Any) -> bytes:
+    """The bytes to hand to an image codec (JPEG, JPEG 2000, CCITT) for a non-raw image.
+
+    A JPEG or JPEG 2000 stream with no other filter is already a file
+    Pillow can open and is read as stored; otherwise get_data() undoes the
+    filters before the codec (and wraps CCITT data in a TIFF header).
+    """
+    filters, _ = filter_chain(x_object)
+    if len(filters) == 1 and filters[0] in PASS_THROUGH_CODECS:
+        return encoded_stream_data(x_object)
+    return _as_bytes(x_object.get_data())
+
+
+def _color_space(space: Any) -> Tuple[str, int, Optional[np.ndarray]]:
+    """(Pillow mode, components per sample, palette or None) for a color space."""
+    space = space.get_object() if space is not None else None
+    if space is None:
+        return 'L', 1, None
+    if not isinstance(space, list):
+        if str(space) in DEVICE_SPACES:
+            return DEVICE_SPACES[str(space)] + (None,)
+        raise UnsupportedImageError(f"Unsupported color space {space}")
+
+    family = str(space[0])
+    if family in DEVICE_SPACES:
+        return DEVICE_SPACES[family] + (None,)
+    if family == '/ICCBased':
+        components = int(space[1].get_object().get('/N', 3))
+        if components not in MODES_BY_COMPONENTS:
+            raise UnsupportedImageError(f"Unsupported ICC profile with {components} components")
+        return MODES_BY_COMPONENTS[components], components, None
+    if family in ('/Indexed', '/I'):
+        mode, base_components, _ = _color_space(space[1])
+        hival = int(space[2])
+        lookup = space[3].get_object()
+        if hasattr(lookup, 'get_data'):
+            lookup = lookup.get_data()
+        else:
+            lookup = lookup.original_bytes if hasattr(lookup, 'original_bytes') else bytes(lookup)
+        palette = np.zeros(((hival + 1) * base_components,), dtype=np.uint8)
+        table = np.frombuffer(lookup, dtype=np.uint8)[:len(palette)]
+        palette[:len(table)] = table
+        return mode, 1, palette.reshape(hival + 1, base_components)
+    raise UnsupportedImageError(f"Unsupported color space {family}")
+
+
+def _unpack(data: bytes, width: int, height: int, components: int, bits: int) -> np.ndarray:
+    """Samples as a height x width x components integer array."""
+    if bits not in (1, 2, 4, 8, 16):
+        raise UnsupportedImageError(f"Unsupported bit depth {bits}")
+    row_bytes = (width * components * bits + 7) // 8
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    if len(buffer) < row_bytes * height:
+        # Truncated streams are padded with zeros rather than dropped
+        buffer = np.concatenate([buffer, np.zeros(row_bytes * height - len(buffer), dtype=np.uint8)])
+    rows = buffer[:row_bytes * height].reshape(height, row_bytes)
+    row_samples = width * components
+    if bits == 8:
+        samples = rows[:, :row_samples]
+    elif bits == 16:
+        samples = rows[:, :row_samples * 2].copy().view('>u2')
+    else:
+        bits_per_row = np.unpackbits(rows, axis=1)[:, :row_samples * bits]
+        weights = (1 << np.arange(bits - 1, -1, -1)).astype(np.uint8)
+        samples = bits_per_row.reshape(height, row_samples, bits).dot(weights).astype(np.uint8)
+    return samples.reshape(height, width, components)
+
+
+def decode_raw_image(x_object: Any) -> Tuple[np.ndarray, str]:
+    """Decode a raw image XObject to an 8-bit array and its Pillow mode.
+
+    Gray images come back as height x width arrays, color ones as
+    height x width x components. Stencil masks (``/ImageMask``) are gray,
+    painted areas black.
+    """
+    width = int(x_object['/Width'])
+    height = int(x_object['/Height'])
+    if x_object.get('/ImageMask'):
+        mode, components, palette, bits = 'L', 1, None, 1
+    else:
+        mode, components, palette = _color_space(x_object.get('/ColorSpace'))
+        bits = int(x_object.get('/BitsPerComponent', 8))
+
+    samples = _unpack(stream_samples(x_object), width, height, components, bits)
+
+    max_value = (1 << bits) - 1
+    decode = x_object.get('/Decode')
+    decode = [float(value) for value in decode.get_object()] if decode is not None else None
+    if palette is not None:
+        # Samples are palette indices; /Decode maps them onto other indices
+        if decode is not None:
+            lut = np.rint(decode[0] + np.arange(max_value + 1) * (decode[1] - decode[0]) / max_value)
+            samples = np.clip(lut, 0, len(palette) - 1).astype(np.intp)[samples]
+        pixels = palette[np.minimum(samples[..., 0], len(palette) - 1)]
+    else:
+        if decode is None and bits == 8:
+            pixels = samples
+        else:
+            # One lookup table per component maps every possible sample to 0-255
+            decode = decode or [0.0, 1.0] * components
+            levels = np.arange(max_value + 1) / max_value
+            pixels = np.empty(samples.shape, dtype=np.uint8)
+            for component in range(components):
+                low, high = decode[2 * component], decode[2 * component + 1]
+                lut = np.clip(np.rint((low + levels * (high - low)) * 255), 0, 255).astype(np.uint8)
+                pixels[..., component] = lut[samples[..., component]]
+
+    if pixels.shape[-1] == 1:
+        pixels = pixels[..., 0]
+    return np.ascontiguousarray(pixels), mode
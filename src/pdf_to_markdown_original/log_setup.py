@@ -0,0 +1,164 @@
+"""Queue-based logging for the offline converter.
+
+Logging calls only put the record on a queue; one background thread per
+process formats it and writes it to the console and to the
+``conversion.log`` of the document it belongs to. The handlers are
+installed once per process, and each processor logs through an adapter
+that tags its records with the document and its log file, so converting
+many documents never stacks up handlers.
+"""
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Union
+
+# "pdf_to_markdown_original", or "src.pdf_to_markdown_original" when run from the repository root
+PACKAGE_LOGGER = __name__.rpartition(".")[0]
+# Per-line decisions (headings, tables, filtered text, image details);
+# PDF_LOG_DECISIONS=false silences them
+DECISION_LOGGER = f"{PACKAGE_LOGGER}.decisions"
+
+FILE_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+CONSOLE_FORMAT = '%(asctime)s - %(levelname)s - %(document)s - %(message)s'
+# Document log files kept open by the listener at once
+MAX_OPEN_LOG_FILES = 8
+# Longest wait, in seconds, for a document's records to be written
+FLUSH_TIMEOUT = 30.0
+
+_lock = threading.Lock()
+_pid: Optional[int] = None
+_queue: Optional[queue.SimpleQueue] = None
+_handler: Optional[logging.Handler] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class _DocumentDefaults(logging.Filter):
+    """Gives records logged outside a document the fields the formatters use."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "document"):
+            record.document = "-"
+        return True
+
+
+class _LazyQueueHandler(logging.handlers.QueueHandler):
+    """Queues records unformatted, so the message is built on the listener thread.
+
+    Arguments are formatted after the call returns; pass values that are
+    not modified afterwards.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class _DocumentFiles(logging.Handler):
+    """Appends each record to the log file of its document."""
+
+    def __init__(self, max_open: int = MAX_OPEN_LOG_FILES):
+        super().__init__()
+        self.max_open = max_open
+        self._files: "OrderedDict[str, logging.FileHandler]" = OrderedDict()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        path = getattr(record, "log_file", None)
+        if path is None:
+            return
+        handler = self._files.pop(path, None)
+        if handler is None:
+            # Least recently used files are closed; they are reopened for appending
+            while len(self._files) >= self.max_open:
+                self._files.popitem(last=False)[1].close()
+            handler = logging.FileHandler(path, encoding="utf-8")
+            handler.setFormatter(self.formatter)
+        self._files[path] = handler
+        handler.emit(record)
+
+    def close_file(self, path: str) -> None:
+        handler = self._files.pop(path, None)
+        if handler is not None:
+            handler.close()
+
+    def close(self) -> None:
+        while self._files:
+            self._files.popitem()[1].close()
+        super().close()
+
+
+class _Release:
+    """Queue marker asking the listener to close a document's log file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.done = threading.Event()
+
+
+class _Listener(logging.handlers.QueueListener):
+    def __init__(self, log_queue: queue.SimpleQueue, console: logging.Handler, files: _DocumentFiles):
+        super().__init__(log_queue, console, files, respect_handler_level=True)
+        self.files = files
+
+    def handle(self, record) -> None:
+        if isinstance(record, _Release):
+            self.files.close_file(record.path)
+            record.done.set()
+            return
+        super().handle(record)
+
+
+def configure_logging() -> None:
+    """Install the queue handler and start the listener thread, once per process.
+
+    LOG_LEVEL sets the level of the package loggers. Calling it again is
+    cheap; a process forked from one that was already configured gets its
+    own queue and listener.
+    """
+    global _pid, _queue, _handler, _listener
+    with _lock:
+        if _pid == os.getpid():
+            return
+        package_logger = logging.getLogger(PACKAGE_LOGGER)
+        if _handler is not None:
+            # Inherited through fork; its listener thread did not survive
+            package_logger.removeHandler(_handler)
+
+        console = logging.StreamHandler()
+        console.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+        files = _DocumentFiles()
+        files.setFormatter(logging.Formatter(FILE_FORMAT))
+
+        _queue = queue.SimpleQueue()
+        _handler = _LazyQueueHandler(_queue)
+        _handler.addFilter(_DocumentDefaults())
+        package_logger.addHandler(_handler)
+        package_logger.setLevel(os.getenv('LOG_LEVEL', 'INFO').upper())
+
+        log_decisions = os.getenv('PDF_LOG_DECISIONS', 'true').lower() in ('1', 'true', 'yes')
+        logging.getLogger(DECISION_LOGGER).setLevel(logging.NOTSET if log_decisions else logging.ERROR)
+
+        _listener = _Listener(_queue, console, files)
+        _listener.start()
+        atexit.register(_listener.stop)
+        _pid = os.getpid()
+
+
+def document_logger(name: str, pdf_path: str, log_file: Union[str, Path]) -> logging.LoggerAdapter:
+    """A logger whose records are tagged with a document and written to its log file."""
+    return logging.LoggerAdapter(
+        logging.getLogger(name), {"document": Path(pdf_path).name, "log_file": str(log_file)}
+    )
+
+
+def flush_document_log(log_file: Union[str, Path]) -> None:
+    """Wait until a document's queued records are written, then close its log file."""
+    with _lock:
+        if _pid != os.getpid():
+            return
+        marker = _Release(str(log_file))
+        _queue.put(marker)
+    marker.done.wait(FLUSH_TIMEOUT)
@@ -0,0 +1,104 @@
+import json
+import logging
+import os
+from pathlib import Path
+from typing import List, Optional, Union
+
+MANIFEST_VERSION = 1
+
+logger = logging.getLogger(__name__)
+
+
+class PageManifest:
+    """Per-page fingerprints and markdown from a finished conversion.
+
+    Stored as JSON next to the markdown output so that an incremental run
+    can reuse the markdown of every page whose fingerprint is unchanged.
+    """
+
+    def __init__(self, fingerprints: List[str], sections: List[str], processor_version: str):
+        self.fingerprints = fingerprints
+        self.sections = sections
+        self.processor_version = processor_version
+
+    @staticmethod
+    def path_for(output_file: Union[str, Path]) -> Path:
+        """Manifest location for a markdown output file."""
+        output_file = Path(output_file)
+        return output_file.with_name(f"{output_file.stem}.manifest.json")
+
+    @classmethod
+    def load(cls, path: Union[str, Path], processor_version: str) -> Optional["PageManifest"]:
+        """Load a manifest written by the same processor version, if any."""
+        path = Path(path)
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.warning(f"Could not read manifest {path}: {str(e)}")
+            return None
+        if data.get("version") != MANIFEST_VERSION or data.get("processor_version") != processor_version:
+            return None
+        return cls(data["fingerprints"], data["sections"], data["processor_version"])
+
+    def save(self, path: Union[str, Path]) -> None:
+        """Write the manifest atomically."""
+        path = Path(path)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "version": MANIFEST_VERSION,
+                "processor_version": self.processor_version,
+                "fingerprints": self.fingerprints,
+                "sections": self.sections,
+            }, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def section_for(self, index: int, fingerprint: str) -> Optional[str]:
+        """Previous markdown of a page (0-based) if its fingerprint is unchanged."""
+        if index < len(self.fingerprints) and self.fingerprints[index] == fingerprint:
+            return self.sections[index]
+        return None
+
+    @staticmethod
+    def writer(path: Union[str, Path], processor_version: str) -> "PageManifestWriter":
+        """A writer that streams a manifest to ``path`` one page at a time."""
+        return PageManifestWriter(path, processor_version)
+
+
+class PageManifestWriter:
+    """Streams a manifest to disk page by page, in the format PageManifest loads.
+
+    Sections are written as they are added; only the fingerprints are kept
+    until the end. The file is renamed into place when the writer is closed
+    without an error, and discarded otherwise.
+    """
+
+    def __init__(self, path: Union[str, Path], processor_version: str):
+        self.path = Path(path)
+        self.tmp_path = self.path.with_name(self.path.name + ".tmp")
+        self.fingerprints: List[str] = []
+        self._file = open(self.tmp_path, 'w', encoding='utf-8')
+        self._file.write(json.dumps({"version": MANIFEST_VERSION, "processor_version": processor_version})[:-1])
+        self._file.write(', "sections": [')
+
+    def add(self, fingerprint: str, section: str) -> None:
+        """Record the next page."""
+        if self.fingerprints:
+            self._file.write(", ")
+        self._file.write(json.dumps(section, ensure_ascii=False))
+        self.fingerprints.append(fingerprint)
+
+    def __enter__(self) -> "PageManifestWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self._file.write(f'], "fingerprints": {json.dumps(self.fingerprints)}}}')
+            self._file.close()
+            os.replace(self.tmp_path, self.path)
+        else:
+            self._file.close()
+            self.tmp_path.unlink()
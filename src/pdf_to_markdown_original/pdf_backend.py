@@ -0,0 +1,100 @@
+"""Interchangeable PDF text engines.
+
+PyPDF2 is always available. pypdfium2 and PyMuPDF are optional, much
+faster engines; ``auto`` picks the first of them that is installed and
+logs which one it chose. Note that they collapse the runs of spaces the
+processor uses to detect tables.
+"""
+import importlib.util
+import logging
+import threading
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+TEXT_FALLBACK = "pypdf"
+# Optional engines by preference, and the module each one needs
+FAST_BACKENDS = {"pypdfium2": "pypdfium2", "pymupdf": "fitz"}
+
+# Neither PDFium nor MuPDF may be called from two threads at once
+_pdfium_lock = threading.RLock()
+_mupdf_lock = threading.RLock()
+
+
+@lru_cache(maxsize=None)
+def resolve_backend(name: str) -> str:
+    """The engine to use for a configured name, falling back to PyPDF2."""
+    name = (name or TEXT_FALLBACK).lower()
+    if name == TEXT_FALLBACK:
+        return TEXT_FALLBACK
+    candidates = list(FAST_BACKENDS) if name == "auto" else [name]
+    for candidate in candidates:
+        module = FAST_BACKENDS.get(candidate)
+        if module is None:
+            logger.warning(f"Unknown PDF backend {candidate}; using {TEXT_FALLBACK}")
+            return TEXT_FALLBACK
+        if importlib.util.find_spec(module) is not None:
+            if name == "auto":
+                logger.info(f"PDF backend auto: using {candidate} instead of {TEXT_FALLBACK}")
+            return candidate
+        if name != "auto":
+            logger.warning(f"PDF backend {candidate} is not installed; using {TEXT_FALLBACK}")
+    return TEXT_FALLBACK
+
+
+class PdfiumText:
+    """Page text through pypdfium2."""
+
+    def __init__(self, pdf_path: str):
+        import pypdfium2
+        with _pdfium_lock:
+            self._pdf = pypdfium2.PdfDocument(pdf_path)
+
+    @property
+    def page_count(self) -> int:
+        return len(self._pdf)
+
+    def page_text(self, index: int) -> str:
+        with _pdfium_lock:
+            page = self._pdf[index]
+            text_page = page.get_textpage()
+            try:
+                return text_page.get_text_range().replace('\r\n', '\n')
+            finally:
+                text_page.close()
+                page.close()
+
+    def close(self) -> None:
+        with _pdfium_lock:
+            self._pdf.close()
+
+
+class MuPDFText:
+    """Page text through PyMuPDF."""
+
+    def __init__(self, pdf_path: str):
+        import fitz
+        with _mupdf_lock:
+            self._doc = fitz.open(pdf_path)
+
+    @property
+    def page_count(self) -> int:
+        return self._doc.page_count
+
+    def page_text(self, index: int) -> str:
+        with _mupdf_lock:
+            return self._doc[index].get_text()
+
+    def close(self) -> None:
+        with _mupdf_lock:
+            self._doc.close()
+
+
+def open_text_source(pdf_path: str, backend: str):
+    """A text source for a fast backend, or None when PyPDF2 should be used."""
+    backend = resolve_backend(backend)
+    if backend == "pypdfium2":
+        return PdfiumText(pdf_path)
+    if backend == "pymupdf":
+        return MuPDFText(pdf_path)
+    return None
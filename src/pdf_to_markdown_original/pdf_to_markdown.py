@@ -1,12 +1,9 @@
 import os
 import PyPDF2
 from pdf2image import convert_from_path
-from PIL import Image
-import io
-import base64
 from pathlib import Path
 import logging
-from typing import List, Tuple, Optional
+from typing import List, Optional
 
 class PDFProcessor:
     def __init__(self, pdf_path: str, output_dir: str = "output"):
@@ -36,35 +33,31 @@ class PDFProcessor:
             self.logger.error(f"Error extracting text: {str(e)}")
             return []
 
-    def extract_images(self) -> List[Tuple[str, str]]:
-        """Extract images from PDF pages and save them."""
-        image_data = []
+    def extract_images(self) -> List[str]:
+        """Extract images from PDF pages and save them, returning their paths."""
+        image_paths = []
         try:
             # Convert PDF to images
             images = convert_from_path(self.pdf_path)
             
             for i, image in enumerate(images):
-                # Save image
+                # Save image; the markdown links to the file, so it is encoded once
                 image_path = self.images_dir / f"page_{i+1}.png"
                 image.save(image_path, "PNG")
+                image.close()
                 
-                # Convert to base64 for markdown embedding
-                buffered = io.BytesIO()
-                image.save(buffered, format="PNG")
-                img_str = base64.b64encode(buffered.getvalue()).decode()
-                
-                image_data.append((str(image_path), img_str))
+                image_paths.append(str(image_path))
             
-            return image_data
+            return image_paths
         except Exception as e:
             self.logger.error(f"Error extracting images: {str(e)}")
             return []
 
-    def create_markdown(self, text_content: List[str], image_data: List[Tuple[str, str]]) -> str:
+    def create_markdown(self, text_content: List[str], image_paths: List[str]) -> str:
         """Create markdown content from extracted text and images."""
         markdown_content = []
         
-        for i, (text, (image_path, _)) in enumerate(zip(text_content, image_data)):
+        for i, (text, image_path) in enumerate(zip(text_content, image_paths)):
             # Add page number
             markdown_content.append(f"## Page {i+1}\n")
             
@@ -86,14 +79,14 @@ class PDFProcessor:
             
             # Extract text and images
             text_content = self.extract_text()
-            image_data = self.extract_images()
+            image_paths = self.extract_images()
             
-            if not text_content and not image_data:
+            if not text_content and not image_paths:
                 self.logger.error("No content extracted from PDF")
                 return None
             
             # Create markdown content
-            markdown_content = self.create_markdown(text_content, image_data)
+            markdown_content = self.create_markdown(text_content, image_paths)
             
             # Save markdown file
             output_file = self.output_dir / f"{Path(self.pdf_path).stem}.md"
@@ -1,44 +1,66 @@
 import os
-import PyPDF2
 from pdf2image import convert_from_path
 from PIL import Image
 import io
 import base64
+from contextlib import nullcontext
 from pathlib import Path
 import logging
-from typing import List, Tuple, Optional
+from typing import Dict, Iterator, List, Tuple, Optional
 import re
 from urllib.parse import quote
 
+from .document import PDFDocument
+from .image_decoder import UnsupportedImageError, codec_data, decode_raw_image, is_raw_image
+from .log_setup import DECISION_LOGGER, configure_logging, document_logger, flush_document_log
+from .manifest import PageManifest
+
+# Text post-processing patterns, compiled once for every page
+ALL_CAPS_HEADING = re.compile(r'^[A-Z][A-Z\s]{10,}$')
+TITLE_CASE_HEADING = re.compile(r'^[A-Z][a-z\s]{5,}$')
+LONG_TITLE_CASE_HEADING = re.compile(r'^[A-Z][a-z\s]{10,}$')
+HEADING_WORDS = re.compile('overview|background|description|summary|findings|resources')
+BULLET_PATTERN = re.compile(r'^[\s•\-\*]+(.*)')
+NUMBERED_PATTERN = re.compile(r'^(\d+\.)\s+(.*)')
+TOC_INDICATORS = ("table of contents", "contents", "page", "chapter", "section")
+
+EMAIL_PATTERN = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+# Company websites, except Microsoft
+WEBSITE_PATTERN = re.compile(r'https?://(?!microsoft\.com)[a-zA-Z0-9-]+(?:\.[a-zA-Z0-9-]+)*\.[a-zA-Z]{2,}')
+COMPANY_PATTERNS = (
+    re.compile(r'\b[A-Z][a-zA-Z]+(?:\.com|\.org|\.net|\.io|\.ai|\.tech)\b'),
+    re.compile(r'\b[A-Z][a-zA-Z]+(?: Inc\.| LLC| Ltd\.| Corporation| Corp\.)\b'),
+)
+
+# Line kinds returned by PDFProcessor._classify_line
+LINE_HEADING = "heading"
+LINE_LIST_ITEM = "list_item"
+LINE_TABLE_ROW = "table_row"
+LINE_TEXT = "text"
+
 class PDFProcessor:
-    VERSION = "1.1.0"  # Version number for the processor
+    VERSION = "1.3.0"  # Version number for the processor
     
-    def __init__(self, pdf_path: str, output_dir: str = "output"):
+    def __init__(self, pdf_path: str, output_dir: str = "output", document: Optional[PDFDocument] = None):
         self.pdf_path = pdf_path
+        # Parsed once and shared by the text and image stages
+        self.document = document if document is not None else PDFDocument(pdf_path)
+        # A document passed in belongs to the caller, who closes it
+        self._owns_document = document is None
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(exist_ok=True)
         self.images_dir = self.output_dir / "images"
         self.images_dir.mkdir(exist_ok=True)
+        # Saved image files by indirect reference and by content hash
+        self._assets_by_reference: Dict[Tuple[int, int], Optional[str]] = {}
+        self._assets_by_digest: Dict[str, Optional[str]] = {}
         
-        # Setup logging to both file and console
-        log_file = self.output_dir / "conversion.log"
-        
-        # Create a formatter
-        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-        
-        # Setup file handler
-        file_handler = logging.FileHandler(log_file)
-        file_handler.setFormatter(formatter)
-        
-        # Setup console handler
-        console_handler = logging.StreamHandler()
-        console_handler.setFormatter(formatter)
-        
-        # Setup logger
-        self.logger = logging.getLogger(__name__)
-        self.logger.setLevel(logging.INFO)
-        self.logger.addHandler(file_handler)
-        self.logger.addHandler(console_handler)
+        # Records go through the process-wide queue to the console and to this
+        # document's log file; PDF_LOG_DECISIONS=false skips the per-line decision log
+        configure_logging()
+        self.log_file = self.output_dir / "conversion.log"
+        self.logger = document_logger(__name__, pdf_path, self.log_file)
+        self.decision_logger = document_logger(DECISION_LOGGER, pdf_path, self.log_file)
         
         # Log initialization
         self.logger.info(f"Initialized PDF processor v{self.VERSION} for: {pdf_path}")
@@ -50,193 +72,167 @@ class PDFProcessor:
         
         # Check for specific heading patterns
         if line.startswith('## '):
-            self.logger.info(f"Detected heading level 2 (##) from pattern: {line}")
+            self.decision_logger.info("Detected heading level 2 (##) from pattern: %s", line)
             return 2
         if line.startswith('### '):
-            self.logger.info(f"Detected heading level 3 (###) from pattern: {line}")
+            self.decision_logger.info("Detected heading level 3 (###) from pattern: %s", line)
             return 3
             
         # Check for common heading patterns
-        if re.match(r'^[A-Z][A-Z\s]{10,}$', line):  # All caps with spaces
-            self.logger.info(f"Detected heading level 1 (#) from all-caps pattern: {line}")
+        if ALL_CAPS_HEADING.match(line):  # All caps with spaces
+            self.decision_logger.info("Detected heading level 1 (#) from all-caps pattern: %s", line)
             return 1
-        if re.match(r'^[A-Z][a-z\s]{10,}$', line):  # Title case
-            self.logger.info(f"Detected heading level 2 (##) from title case pattern: {line}")
-            return 2
-        if re.match(r'^[A-Z][a-z\s]{5,}$', line):   # Shorter title case
-            self.logger.info(f"Detected heading level 3 (###) from short title case pattern: {line}")
+        if TITLE_CASE_HEADING.match(line):
+            # Title case; ten or more characters after the capital is a longer title
+            if len(line) > 10:
+                self.decision_logger.info("Detected heading level 2 (##) from title case pattern: %s", line)
+                return 2
+            self.decision_logger.info("Detected heading level 3 (###) from short title case pattern: %s", line)
             return 3
             
         # Check for common heading indicators
         if line.endswith(':'):
-            self.logger.warning(f"Making assumption: treating line ending with colon as heading level 3: {line}")
+            self.decision_logger.warning("Making assumption: treating line ending with colon as heading level 3: %s", line)
             return 3
         if line.endswith('.'):
-            self.logger.warning(f"Making assumption: treating line ending with period as heading level 3: {line}")
+            self.decision_logger.warning("Making assumption: treating line ending with period as heading level 3: %s", line)
             return 3
             
         # Check for common heading words
-        heading_words = ['overview', 'background', 'description', 'summary', 'findings', 'resources']
-        if any(word in line.lower() for word in heading_words):
-            self.logger.warning(f"Making assumption: treating line with common heading word as level 2: {line}")
+        if HEADING_WORDS.search(line.lower()):
+            self.decision_logger.warning("Making assumption: treating line with common heading word as level 2: %s", line)
             return 2
             
         return None
 
     def _sanitize_text(self, text: str) -> str:
         """Sanitize text by removing email addresses and making company references generic."""
-        # Remove email addresses
-        original_text = text
-        text = re.sub(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}', '[email]', text)
-        if text != original_text:
-            emails = re.findall(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}', original_text)
-            for email in emails:
-                self.logger.info(f"Filtered out email address: {email}")
-        
-        # Replace company websites (except Microsoft)
-        original_text = text
-        text = re.sub(r'https?://(?!microsoft\.com)[a-zA-Z0-9-]+(?:\.[a-zA-Z0-9-]+)*\.[a-zA-Z]{2,}', '[company website]', text)
-        if text != original_text:
-            websites = re.findall(r'https?://(?!microsoft\.com)[a-zA-Z0-9-]+(?:\.[a-zA-Z0-9-]+)*\.[a-zA-Z]{2,}', original_text)
-            for website in websites:
-                self.logger.info(f"Filtered out company website: {website}")
-        
-        # Replace company names with generic terms
-        company_patterns = [
-            r'\b[A-Z][a-zA-Z]+(?:\.com|\.org|\.net|\.io|\.ai|\.tech)\b',
-            r'\b[A-Z][a-zA-Z]+(?: Inc\.| LLC| Ltd\.| Corporation| Corp\.)\b'
-        ]
-        
-        for pattern in company_patterns:
-            original_text = text
-            text = re.sub(pattern, '[Company]', text)
-            if text != original_text:
-                companies = re.findall(pattern, original_text)
-                for company in companies:
-                    self.logger.info(f"Filtered out company name: {company}")
+        log_matches = self.decision_logger.isEnabledFor(logging.INFO)
+        
+        def replacer(replacement: str, description: str):
+            def replace(match) -> str:
+                if log_matches:
+                    self.decision_logger.info("Filtered out %s: %s", description, match.group())
+                return replacement
+            return replace
+        
+        # Each pass sees the previous one's output, so the order matters;
+        # the cheap substring checks skip passes that cannot match
+        if '@' in text:
+            text = EMAIL_PATTERN.sub(replacer('[email]', 'email address'), text)
+        if '://' in text:
+            text = WEBSITE_PATTERN.sub(replacer('[company website]', 'company website'), text)
+        for pattern in COMPANY_PATTERNS:
+            text = pattern.sub(replacer('[Company]', 'company name'), text)
         
         return text
 
+    def _classify_line(self, line: str) -> Tuple[str, object]:
+        """Classify a stripped, non-empty line as a heading, list item, table row or text.
+
+        Returns the kind and its payload: the heading level, the list item
+        text (None for a bullet with no text) or the line itself.
+        """
+        heading_level = self._detect_heading_level(line)
+        if heading_level:
+            return LINE_HEADING, heading_level
+        
+        bullet_match = BULLET_PATTERN.match(line)
+        if bullet_match:
+            return LINE_LIST_ITEM, bullet_match.group(1).strip() or None
+        
+        number_match = NUMBERED_PATTERN.match(line)
+        if number_match:
+            number, content = number_match.groups()
+            return LINE_LIST_ITEM, f"{number}. {content}" if content else None
+        
+        if '  ' in line or '\t' in line:
+            return LINE_TABLE_ROW, line
+        return LINE_TEXT, line
+
     def _process_text(self, text: str) -> str:
         """Process extracted text to handle special formatting."""
         # First sanitize the text
         text = self._sanitize_text(text)
+        log_info = self.decision_logger.isEnabledFor(logging.INFO)
+        log_warning = self.decision_logger.isEnabledFor(logging.WARNING)
         
         lines = text.split('\n')
         processed_lines = []
-        in_table = False
         table_lines = []
-        in_list = False
-        current_section = None
-        skip_toc = False
         list_content = []
+        current_section = None
+        
+        # Check if this is a table of contents page by looking for TOC
+        # indicators in the first few lines
+        first_lines = " ".join(line.lower().strip() for line in lines[:5])
+        skip_toc = any(indicator in first_lines for indicator in TOC_INDICATORS)
+        if skip_toc and log_info:
+            self.decision_logger.info("Detected table of contents page - skipping content")
+        
+        def flush_table():
+            processed_lines.extend(self._process_table(table_lines))
+            table_lines.clear()
+        
+        def flush_list():
+            processed_lines.extend(self._process_list(list_content))
+            list_content.clear()
         
-        # Check if this is a table of contents page
-        toc_indicators = [
-            "table of contents",
-            "contents",
-            "page",
-            "chapter",
-            "section"
-        ]
-        
-        # Look for TOC indicators in the first few lines
-        first_lines = [line.lower().strip() for line in lines[:5]]
-        if any(indicator in " ".join(first_lines) for indicator in toc_indicators):
-            self.logger.info("Detected table of contents page - skipping content")
-            skip_toc = True
-        
-        for i, line in enumerate(lines):
+        for line in lines:
             line = line.strip()
             
-            # Skip empty lines
+            # Empty lines end any open table or list
             if not line:
-                if in_table:
-                    # Process collected table lines
-                    processed_lines.extend(self._process_table(table_lines))
-                    table_lines = []
-                    in_table = False
-                if in_list:
-                    # Process collected list lines
-                    processed_lines.extend(self._process_list(list_content))
-                    list_content = []
-                    in_list = False
+                if table_lines:
+                    flush_table()
+                if list_content:
+                    flush_list()
                 continue
             
             # Skip table of contents
             if skip_toc:
                 # Check if we've reached the end of TOC (usually marked by a main heading)
-                if re.match(r'^[A-Z][A-Z\s]{10,}$', line) or re.match(r'^[A-Z][a-z\s]{10,}$', line):
-                    self.logger.info(f"Reached end of table of contents at line: {line}")
+                if ALL_CAPS_HEADING.match(line) or LONG_TITLE_CASE_HEADING.match(line):
+                    if log_info:
+                        self.decision_logger.info("Reached end of table of contents at line: %s", line)
                     skip_toc = False
                 else:
                     continue
             
-            # Detect and process headings
-            heading_level = self._detect_heading_level(line)
-            if heading_level:
-                if heading_level == 2:
+            kind, value = self._classify_line(line)
+            
+            if kind == LINE_HEADING:
+                if value == 2:
                     current_section = line
-                    self.logger.info(f"New section started: {line}")
-                markdown_heading = f"{'#' * heading_level} {line}"
+                    if log_info:
+                        self.decision_logger.info("New section started: %s", line)
+                markdown_heading = f"{'#' * value} {line}"
                 processed_lines.append(markdown_heading)
-                self.logger.info(f"Converted heading to markdown: {markdown_heading}")
-                continue
-            
-            # Handle bullet points and numbered lists
-            bullet_match = re.match(r'^[\s•\-\*]+(.*)', line)
-            if bullet_match:
-                content = bullet_match.group(1).strip()
-                if content:
-                    list_content.append(content)
-                    in_list = True
-                continue
-                
-            number_match = re.match(r'^(\d+\.)\s+(.*)', line)
-            if number_match:
-                number, content = number_match.groups()
-                if content:
-                    list_content.append(f"{number}. {content}")
-                    in_list = True
-                continue
-            
-            # Handle tables
-            if '  ' in line or '\t' in line:
-                if not in_table:
-                    self.logger.warning(f"Making assumption: treating text with multiple spaces/tabs as table: {line}")
-                    in_table = True
+                if log_info:
+                    self.decision_logger.info("Converted heading to markdown: %s", markdown_heading)
+            elif kind == LINE_LIST_ITEM:
+                # Bullets and numbered items; one with no text is dropped
+                if value:
+                    list_content.append(value)
+            elif kind == LINE_TABLE_ROW:
+                # Multiple spaces or tabs usually separate table columns
+                if not table_lines and log_warning:
+                    self.decision_logger.warning("Making assumption: treating text with multiple spaces/tabs as table: %s", line)
                 table_lines.append(line)
-                continue
-            
-            # Process regular text
-            if in_table:
-                # Process collected table lines
-                processed_lines.extend(self._process_table(table_lines))
-                table_lines = []
-                in_table = False
-            
-            # Add regular text with proper spacing
-            if line:
-                if not in_list:
-                    processed_lines.append(line)
-                else:
-                    # Check if this is a continuation of the previous list item
-                    if line.startswith('  ') or line.startswith('\t'):
-                        list_content[-1] += ' ' + line.strip()
-                    else:
-                        # Process the list and start a new paragraph
-                        processed_lines.extend(self._process_list(list_content))
-                        list_content = []
-                        in_list = False
-                        processed_lines.append(line)
-        
-        # Process any remaining table lines
+            else:
+                # Regular text ends an open table and an open list (lines
+                # are stripped, so none continues a list item)
+                if table_lines:
+                    flush_table()
+                if list_content:
+                    flush_list()
+                processed_lines.append(line)
+        
+        # Process any remaining table and list lines
         if table_lines:
-            processed_lines.extend(self._process_table(table_lines))
-            
-        # Process any remaining list lines
+            flush_table()
         if list_content:
-            processed_lines.extend(self._process_list(list_content))
+            flush_list()
         
         return '\n'.join(processed_lines)
 
@@ -260,9 +256,10 @@ class PDFProcessor:
         
         # Log table structure assumptions
         if len(table_data) > 1:
-            self.logger.warning(f"Making assumption: treating first row as header: {table_data[0]}")
+            self.decision_logger.warning("Making assumption: treating first row as header: %s", table_data[0])
             if len(table_data[0]) != len(table_data[1]):
-                self.logger.warning(f"Warning: Inconsistent column count in table. Header: {len(table_data[0])}, Data: {len(table_data[1])}")
+                self.decision_logger.warning("Warning: Inconsistent column count in table. Header: %d, Data: %d",
+                                             len(table_data[0]), len(table_data[1]))
         
         # Create markdown table
         markdown_lines = []
@@ -281,7 +278,7 @@ class PDFProcessor:
                 row_text = ' | '.join(row)
                 markdown_lines.append(f"| {row_text} |")
             else:
-                self.logger.warning(f"Skipping table row due to column count mismatch: {row}")
+                self.decision_logger.warning("Skipping table row due to column count mismatch: %s", row)
         
         return markdown_lines
 
@@ -304,224 +301,270 @@ class PDFProcessor:
         """Extract text from PDF pages."""
         text_content = []
         try:
-            with open(self.pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                for page in pdf_reader.pages:
-                    text = page.extract_text()
-                    processed_text = self._process_text(text)
-                    text_content.append(processed_text)
+            for text in self.document.texts():
+                processed_text = self._process_text(text)
+                text_content.append(processed_text)
             return text_content
         except Exception as e:
             self.logger.error(f"Error extracting text: {str(e)}")
             return []
 
-    def extract_images(self) -> List[Tuple[str, str]]:
-        """Extract images from PDF pages and save them."""
+    def _decode_image(self, image, page_num: int) -> Optional[Image.Image]:
+        """Decode an image XObject onto a white background, or None if it cannot be."""
+        # The full image dictionary is only formatted when debugging
+        self.decision_logger.info("Processing image on page %d", page_num + 1)
+        self.decision_logger.debug("Image properties: %s", image)
+        
+        if is_raw_image(image):
+            # Raw samples (no filter, or compression only) are decoded straight to an array
+            try:
+                pixels, mode = decode_raw_image(image)
+            except UnsupportedImageError as e:
+                self.logger.warning(f"Unsupported raw image: {str(e)}")
+                return None
+            img = Image.fromarray(pixels, mode)
+        else:
+            filter_type = image['/Filter']
+            self.decision_logger.info("Image filter type: %s", filter_type)
+            # The last filter is the image codec; any before it are undone
+            codec = filter_type[-1] if isinstance(filter_type, list) else filter_type
+            
+            # Get the encoded image data
+            image_data_bytes = codec_data(image)
+            
+            # Handle different image formats
+            if codec == '/DCTDecode':
+                # JPEG image
+                img = Image.open(io.BytesIO(image_data_bytes))
+            elif codec == '/JPXDecode':
+                # JPEG2000 image
+                img = Image.open(io.BytesIO(image_data_bytes))
+            elif codec == '/CCITTFaxDecode':
+                # TIFF/CCITT image
+                img = Image.open(io.BytesIO(image_data_bytes))
+            else:
+                self.logger.warning(f"Unsupported image filter: {filter_type}")
+                return None
+        
+        # Handle ICC color profile if present
+        if '/ColorSpace' in image and isinstance(image['/ColorSpace'], list):
+            if image['/ColorSpace'][0] == '/ICCBased':
+                try:
+                    icc_profile = image['/ColorSpace'][1].get_data()
+                    img.info['icc_profile'] = icc_profile
+                except Exception as e:
+                    self.logger.warning(f"Could not extract ICC profile: {str(e)}")
+        
+        # Handle soft mask (transparency) if present
+        if '/SMask' in image:
+            try:
+                mask = image['/SMask'].get_object()
+                if is_raw_image(mask):
+                    mask_img = Image.fromarray(*decode_raw_image(mask))
+                else:
+                    mask_img = Image.open(io.BytesIO(codec_data(mask)))
+                if mask_img.mode == 'L':
+                    if mask_img.size != img.size:
+                        mask_img = mask_img.resize(img.size)
+                    img.putalpha(mask_img)
+            except Exception as e:
+                self.logger.warning(f"Could not apply soft mask: {str(e)}")
+        
+        # Convert to RGBA if needed, preserving white background
+        if img.mode not in ('RGB', 'RGBA'):
+            if img.mode == 'L':  # Grayscale
+                img = img.convert('RGBA')
+                # Create a white background
+                background = Image.new('RGBA', img.size, (255, 255, 255, 255))
+                # Composite the image onto the white background
+                img = Image.alpha_composite(background, img)
+            elif img.mode == 'CMYK':
+                # CMYK has no transparency, so there is nothing to composite
+                img = img.convert('RGB')
+            else:
+                img = img.convert('RGBA')
+                # Create a white background
+                background = Image.new('RGBA', img.size, (255, 255, 255, 255))
+                # Composite the image onto the white background
+                img = Image.alpha_composite(background, img)
+        
+        # Ensure white background for transparent images
+        if img.mode == 'RGBA':
+            # Create a white background
+            background = Image.new('RGBA', img.size, (255, 255, 255, 255))
+            # Composite the image onto the white background
+            img = Image.alpha_composite(background, img)
+        
+        return img
+
+    def _image_asset(self, image, page_num: int) -> Optional[str]:
+        """File name of the saved PNG for an image XObject, decoding it only once.
+
+        Images are looked up by indirect reference first, so a logo shared by
+        every page is recognised without reading it again, and then by content
+        hash, which also catches copies stored as separate objects. Files are
+        named after the hash, so later runs and other documents writing to the
+        same directory reuse them too. None means the image could not be decoded.
+        """
+        reference = self.document.image_reference(image)
+        if reference is not None and reference in self._assets_by_reference:
+            return self._assets_by_reference[reference]
+        
+        digest = self.document.image_digest(image)
+        if digest in self._assets_by_digest:
+            image_filename = self._assets_by_digest[digest]
+        else:
+            image_filename = f"image_{digest[:16]}.png"
+            image_path = self.images_dir / image_filename
+            if image_path.exists():
+                self.decision_logger.info("Reusing saved image: %s", image_filename)
+            else:
+                img = self._decode_image(image, page_num)
+                if img is None:
+                    image_filename = None
+                else:
+                    # Write under a temporary name so an interrupted save never looks complete
+                    tmp_path = image_path.with_name(image_path.name + ".tmp")
+                    try:
+                        img.save(tmp_path, "PNG")
+                        os.replace(tmp_path, image_path)
+                        self.logger.info(f"Successfully saved image: {image_filename}")
+                    except Exception as e:
+                        self.logger.error(f"Error saving image {image_filename}: {str(e)}")
+                        image_filename = None
+            self._assets_by_digest[digest] = image_filename
+        
+        if reference is not None:
+            self._assets_by_reference[reference] = image_filename
+        return image_filename
+
+    def extract_page_images(self, page_num: int) -> List[Tuple[str, str]]:
+        """Extract the images on one page (0-based page number), saving new ones."""
         image_data = []
-        try:
-            with open(self.pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                
-                for page_num, page in enumerate(pdf_reader.pages):
-                    # Extract images from the page
-                    if '/XObject' in page['/Resources']:
-                        x_objects = page['/Resources']['/XObject'].get_object()
-                        
-                        for obj in x_objects:
-                            if x_objects[obj]['/Subtype'] == '/Image':
-                                image = x_objects[obj]
-                                
-                                try:
-                                    # Log image properties for debugging
-                                    self.logger.info(f"Processing image on page {page_num + 1}")
-                                    self.logger.info(f"Image properties: {image}")
-                                    
-                                    # Get image dimensions
-                                    width = image['/Width']
-                                    height = image['/Height']
-                                    
-                                    # Get image data
-                                    if '/Filter' in image:
-                                        filter_type = image['/Filter']
-                                        self.logger.info(f"Image filter type: {filter_type}")
-                                        
-                                        # Get the raw image data
-                                        image_data_bytes = image.get_data()
-                                        
-                                        # Handle different image formats
-                                        if filter_type == '/DCTDecode':
-                                            # JPEG image
-                                            img = Image.open(io.BytesIO(image_data_bytes))
-                                        elif filter_type == '/FlateDecode':
-                                            # PNG image
-                                            try:
-                                                # First try to open as PNG
-                                                img = Image.open(io.BytesIO(image_data_bytes))
-                                            except Exception as e:
-                                                self.logger.warning(f"Failed to open FlateDecode image as PNG: {str(e)}")
-                                                # If that fails, try to create from raw data
-                                                try:
-                                                    # Get color mode
-                                                    if '/ColorSpace' in image:
-                                                        if isinstance(image['/ColorSpace'], list):
-                                                            color_space = image['/ColorSpace'][0]
-                                                        else:
-                                                            color_space = image['/ColorSpace']
-                                                            
-                                                        if color_space == '/DeviceRGB':
-                                                            mode = 'RGB'
-                                                        elif color_space == '/DeviceGray':
-                                                            mode = 'L'
-                                                        elif color_space == '/DeviceCMYK':
-                                                            mode = 'CMYK'
-                                                        else:
-                                                            mode = 'RGB'  # Default to RGB
-                                                    else:
-                                                        mode = 'RGB'  # Default to RGB
-                                                    
-                                                    # Create image from raw data
-                                                    img = Image.frombytes(mode, (width, height), image_data_bytes)
-                                                except Exception as e:
-                                                    self.logger.error(f"Failed to create image from raw data: {str(e)}")
-                                                    continue
-                                        elif filter_type == '/JPXDecode':
-                                            # JPEG2000 image
-                                            img = Image.open(io.BytesIO(image_data_bytes))
-                                        elif filter_type == '/CCITTFaxDecode':
-                                            # TIFF/CCITT image
-                                            img = Image.open(io.BytesIO(image_data_bytes))
-                                        else:
-                                            self.logger.warning(f"Unsupported image filter: {filter_type}")
-                                            continue
-                                        
-                                        # Handle ICC color profile if present
-                                        if '/ColorSpace' in image and isinstance(image['/ColorSpace'], list):
-                                            if image['/ColorSpace'][0] == '/ICCBased':
-                                                try:
-                                                    icc_profile = image['/ColorSpace'][1].get_data()
-                                                    img.info['icc_profile'] = icc_profile
-                                                except Exception as e:
-                                                    self.logger.warning(f"Could not extract ICC profile: {str(e)}")
-                                        
-                                        # Handle soft mask (transparency) if present
-                                        if '/SMask' in image:
-                                            try:
-                                                mask = image['/SMask'].get_object()
-                                                mask_data = mask.get_data()
-                                                mask_img = Image.open(io.BytesIO(mask_data))
-                                                if mask_img.mode == 'L':
-                                                    img.putalpha(mask_img)
-                                            except Exception as e:
-                                                self.logger.warning(f"Could not apply soft mask: {str(e)}")
-                                        
-                                        # Convert to RGBA if needed, preserving white background
-                                        if img.mode not in ('RGB', 'RGBA'):
-                                            if img.mode == 'L':  # Grayscale
-                                                img = img.convert('RGBA')
-                                                # Create a white background
-                                                background = Image.new('RGBA', img.size, (255, 255, 255, 255))
-                                                # Composite the image onto the white background
-                                                img = Image.alpha_composite(background, img)
-                                            elif img.mode == 'CMYK':
-                                                img = img.convert('RGB')
-                                                # Create a white background
-                                                background = Image.new('RGB', img.size, (255, 255, 255))
-                                                # Composite the image onto the white background
-                                                img = Image.composite(img, background, img)
-                                            else:
-                                                img = img.convert('RGBA')
-                                                # Create a white background
-                                                background = Image.new('RGBA', img.size, (255, 255, 255, 255))
-                                                # Composite the image onto the white background
-                                                img = Image.alpha_composite(background, img)
-                                        
-                                        # Ensure white background for transparent images
-                                        if img.mode == 'RGBA':
-                                            # Create a white background
-                                            background = Image.new('RGBA', img.size, (255, 255, 255, 255))
-                                            # Composite the image onto the white background
-                                            img = Image.alpha_composite(background, img)
-                                        
-                                        # Generate unique filename
-                                        image_filename = f"image_{page_num + 1}_{len(image_data) + 1}.png"
-                                        image_path = self.images_dir / image_filename
-                                        
-                                        # Save image
-                                        try:
-                                            img.save(image_path, "PNG")
-                                            self.logger.info(f"Successfully saved image: {image_filename}")
-                                        except Exception as e:
-                                            self.logger.error(f"Error saving image {image_filename}: {str(e)}")
-                                            continue
-                                        
-                                        # Store relative path using ../output/images/ prefix
-                                        relative_path = f"../output/images/{image_filename}"
-                                        image_data.append((relative_path, f"Image from page {page_num + 1}"))
-                                        
-                                    else:
-                                        self.logger.warning("Image has no filter type, skipping")
-                                        continue
-                                    
-                                except Exception as e:
-                                    self.logger.error(f"Error processing image on page {page_num + 1}: {str(e)}")
-                                    self.logger.error(f"Image properties: {image}")
-                                    continue
+        for _, image in self.document.image_xobjects(page_num):
+            try:
+                image_filename = self._image_asset(image, page_num)
+            except Exception as e:
+                self.logger.error(f"Error processing image on page {page_num + 1}: {str(e)}")
+                self.logger.debug("Image properties: %s", image)
+                continue
+            if image_filename is None:
+                continue
             
-            return image_data
+            # Store relative path using ../output/images/ prefix
+            relative_path = f"../output/images/{image_filename}"
+            image_data.append((relative_path, f"Image from page {page_num + 1}"))
+        return image_data
+
+    def extract_images(self) -> List[List[Tuple[str, str]]]:
+        """Extract images from PDF pages and save them, as one list per page."""
+        try:
+            return [self.extract_page_images(page_num) for page_num in range(self.document.page_count)]
         except Exception as e:
             self.logger.error(f"Error extracting images: {str(e)}")
             return []
 
-    def create_markdown(self, text_content: List[str], image_data: List[Tuple[str, str]]) -> str:
-        """Create markdown content from extracted text and images."""
-        markdown_content = []
+    def _page_markdown(self, text: str, page_images: List[Tuple[str, str]]) -> str:
+        """Markdown for one page: its text, image references and a separator."""
+        markdown_content = [text]
         
-        # Add version information at the top
-        markdown_content.append(f"<!-- Generated by PDF to Markdown Converter v{self.VERSION} -->\n")
+        # Add image references for this page
+        if page_images:
+            markdown_content.append("\n### Images from this page\n")
+            for image_path, alt_text in page_images:
+                markdown_content.append(f"![{alt_text}]({image_path})\n")
         
-        # Process text content
-        for i, text in enumerate(text_content):
-            # Add text content
-            markdown_content.append(text)
-            
-            # Find images that belong to this page
-            page_images = [(path, alt) for path, alt in image_data if f"image_{i+1}_" in path]
-            
-            # Add image references for this page
-            if page_images:
-                markdown_content.append("\n### Images from this page\n")
-                for image_path, alt_text in page_images:
-                    markdown_content.append(f"![{alt_text}]({image_path})\n")
-            
-            # Add separator between pages
-            markdown_content.append("---\n")
+        # Add separator between pages
+        markdown_content.append("---\n")
         
         return "\n".join(markdown_content)
 
-    def process(self) -> Optional[str]:
-        """Process PDF and create markdown output."""
+    def _markdown_header(self) -> str:
+        """Version comment placed at the top of every output file."""
+        return f"<!-- Generated by PDF to Markdown Converter v{self.VERSION} -->\n"
+
+    def _page_sections(self, text_content: List[str], image_data: List[List[Tuple[str, str]]]) -> List[str]:
+        """Per-page markdown sections for extracted text and images."""
+        sections = []
+        for i, text in enumerate(text_content):
+            page_images = image_data[i] if i < len(image_data) else []
+            sections.append(self._page_markdown(text, page_images))
+        return sections
+
+    def create_markdown(self, text_content: List[str], image_data: List[List[Tuple[str, str]]]) -> str:
+        """Create markdown content from extracted text and images."""
+        return "\n".join([self._markdown_header()] + self._page_sections(text_content, image_data))
+
+    def _iter_sections(self, previous: Optional[PageManifest], fingerprints: bool) -> Iterator[Tuple[Optional[str], str]]:
+        """Yield ``(fingerprint, markdown)`` for each page in order, one page at a time.
+
+        Pages are only fingerprinted when ``fingerprints`` is set (otherwise
+        the fingerprint is None). Pages whose fingerprint matches ``previous``
+        reuse its markdown; the rest are processed. A page's cached text and
+        image references are released as soon as it has been yielded.
+        """
+        changed = 0
+        page_count = self.document.page_count
+        for page_num in range(page_count):
+            fingerprint = self.document.page_fingerprint(page_num) if fingerprints else None
+            section = previous.section_for(page_num, fingerprint) if previous is not None else None
+            if section is None:
+                changed += 1
+                text = self._process_text(self.document.page_text(page_num))
+                section = self._page_markdown(text, self.extract_page_images(page_num))
+            yield fingerprint, section
+            self.document.release_page(page_num)
+        if previous is not None:
+            # Images are named by content, so unchanged ones were not written again
+            self.logger.info(f"Incremental run: re-processed {changed}/{page_count} changed pages")
+
+    def process(self, incremental: bool = False) -> Optional[str]:
+        """Process PDF and create markdown output.
+        
+        Pages are processed and written one at a time to a temporary file
+        that replaces the output only once every page is done, so memory use
+        does not grow with the length of the document. With ``incremental``
+        the page manifest from the previous incremental run is used to
+        re-process only pages whose text or images changed; the markdown of
+        every other page is spliced in unchanged. Pages are only fingerprinted,
+        and the manifest only written, on incremental runs.
+        """
         try:
             self.logger.info(f"Processing PDF: {self.pdf_path}")
+            output_file = self.output_dir / f"{Path(self.pdf_path).stem}.md"
+            manifest_path = PageManifest.path_for(output_file)
             
-            # Extract text and images
-            text_content = self.extract_text()
-            image_data = self.extract_images()
-            
-            if not text_content and not image_data:
+            if self.document.page_count == 0:
                 self.logger.error("No content extracted from PDF")
                 return None
             
-            # Create markdown content
-            markdown_content = self.create_markdown(text_content, image_data)
+            previous = PageManifest.load(manifest_path, self.VERSION) if incremental else None
             
-            # Save markdown file
-            output_file = self.output_dir / f"{Path(self.pdf_path).stem}.md"
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(markdown_content)
+            # Write the markdown and, on incremental runs, the per-page manifest
+            # for the next one side by side, then move both into place
+            tmp_file = output_file.with_name(output_file.name + ".tmp")
+            try:
+                with open(tmp_file, 'w', encoding='utf-8') as f, \
+                        (PageManifest.writer(manifest_path, self.VERSION) if incremental else nullcontext()) as manifest:
+                    f.write(self._markdown_header())
+                    for fingerprint, section in self._iter_sections(previous, fingerprints=incremental):
+                        f.write("\n")
+                        f.write(section)
+                        if manifest is not None:
+                            manifest.add(fingerprint, section)
+                os.replace(tmp_file, output_file)
+            finally:
+                if tmp_file.exists():
+                    tmp_file.unlink()
             
             self.logger.info(f"Successfully created markdown file: {output_file}")
             return str(output_file)
             
         except Exception as e:
             self.logger.error(f"Error processing PDF: {str(e)}")
-            return None 
\ No newline at end of file
+            return None
+        finally:
+            # conversion.log is complete once process() returns
+            flush_document_log(self.log_file)
+            if self._owns_document:
+                self.document.close()
@@ -6,6 +6,7 @@ PDF to Markdown Converter - Main Script
 import os
 import sys
 import logging
+import argparse
 from pathlib import Path
 from pdf_to_markdown_autogen.ai_processor import AIProcessor
 
@@ -21,9 +22,22 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_INPUT_FILE = "/Users/mannamraju/localCode/DMAIO-Application-Observability-for-Edge-Deployed-Solutions-270325-191742.pdf"
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Convert a PDF to Markdown using the AutoGen processor")
+    parser.add_argument("input_file", nargs="?", default=DEFAULT_INPUT_FILE, help="Path to the PDF file")
+    parser.add_argument("--image-workers", type=int, default=None,
+                        help="Worker processes for image extraction (default: PDF_IMAGE_WORKERS or 1)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Re-convert only pages changed since the previous incremental run")
+    parser.add_argument("--resume", action="store_true",
+                        help="Resume an interrupted conversion from its checkpoint")
+    return parser.parse_args()
+
 def main():
-    # Hardcoded input file path
-    input_file = "/Users/mannamraju/localCode/DMAIO-Application-Observability-for-Edge-Deployed-Solutions-270325-191742.pdf"
+    args = parse_args()
+    input_file = args.input_file
     
     # Create output directory if it doesn't exist
     output_dir = Path("output")
@@ -32,7 +46,9 @@ def main():
     logger.info(f"Starting conversion of {input_file}")
     try:
         # Use AutoGen processor
-        processor = AIProcessor(input_file)
+        processor = AIProcessor(
+            input_file, image_workers=args.image_workers, incremental=args.incremental, resume=args.resume
+        )
         output_file = processor.process()
         
         if output_file is None:
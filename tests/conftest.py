@@ -0,0 +1,12 @@
+import pytest
+
+from pdf_to_markdown_autogen.utils import tokens
+
+
+@pytest.fixture
+def no_tokenizer(monkeypatch):
+    """Count tokens from character lengths (four per token), as when tiktoken is unavailable."""
+    monkeypatch.setattr(tokens, "_get_encoding", lambda model: None)
+    tokens.count_tokens.cache_clear()
+    yield
+    tokens.count_tokens.cache_clear()
@@ -0,0 +1,68 @@
+import json
+
+from pdf_to_markdown_autogen.utils.checkpoint import CheckpointJournal
+
+
+def _write_run(path, identity="doc-v1"):
+    journal = CheckpointJournal.open(path, identity)
+    journal.record_chunk("1-2", "# Part one")
+    journal.record_image_page(1, [("images/doc_1.png", 1, (0, 0, 10, 20))])
+    journal.record_image_page(2, [])
+    journal.close()
+
+
+def test_resume_replays_finished_work(tmp_path):
+    path = CheckpointJournal.path_for(tmp_path / "doc.md")
+    assert path == tmp_path / "doc.checkpoint.jsonl"
+    _write_run(path)
+
+    journal = CheckpointJournal.open(path, "doc-v1", resume=True)
+    assert journal.chunks == {"1-2": "# Part one"}
+    assert journal.image_pages == {1: [("images/doc_1.png", 1, (0, 0, 10, 20))], 2: []}
+
+    # New records are appended after the replayed ones
+    journal.record_chunk("3", "# Part two")
+    journal.close()
+    assert CheckpointJournal.open(path, "doc-v1", resume=True).chunks == {"1-2": "# Part one", "3": "# Part two"}
+
+
+def test_journal_of_another_run_is_discarded(tmp_path):
+    path = tmp_path / "doc.checkpoint.jsonl"
+    _write_run(path)
+
+    journal = CheckpointJournal.open(path, "doc-v2", resume=True)
+    assert journal.chunks == {}
+    journal.close()
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line) for line in lines] == [{"type": "header", "identity": "doc-v2"}]
+
+
+def test_without_resume_the_journal_starts_over(tmp_path):
+    path = tmp_path / "doc.checkpoint.jsonl"
+    _write_run(path)
+    journal = CheckpointJournal.open(path, "doc-v1")
+    assert journal.chunks == {}
+    journal.close()
+    assert len(path.read_text(encoding="utf-8").splitlines()) == 1
+
+
+def test_torn_last_line_is_cut_off(tmp_path):
+    path = tmp_path / "doc.checkpoint.jsonl"
+    _write_run(path)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"type": "chunk", "key": "3", "mark')
+
+    journal = CheckpointJournal.open(path, "doc-v1", resume=True)
+    assert journal.chunks == {"1-2": "# Part one"}
+    journal.record_chunk("3", "# Part two")
+    journal.close()
+    # Every line parses again after the torn record was removed
+    records = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert records[-1] == {"type": "chunk", "key": "3", "markdown": "# Part two"}
+
+
+def test_discard_deletes_the_journal(tmp_path):
+    path = tmp_path / "doc.checkpoint.jsonl"
+    journal = CheckpointJournal.open(path, "doc-v1")
+    journal.discard()
+    assert not path.exists()
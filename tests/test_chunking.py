@@ -0,0 +1,47 @@
+import pytest
+
+from pdf_to_markdown_autogen.utils.chunking import Chunker
+
+# Four characters per token, so budgets are easy to reason about
+pytestmark = pytest.mark.usefixtures("no_tokenizer")
+
+
+def test_small_pages_are_packed_together():
+    chunks = Chunker(max_tokens=100, overlap_tokens=0).chunk_pages(["one " * 10, "two " * 10, "three " * 10])
+    assert len(chunks) == 1
+    assert (chunks[0].first_page, chunks[0].last_page) == (1, 3)
+    assert chunks[0].page_label == "1-3"
+
+
+def test_pages_start_a_new_chunk_when_the_budget_is_full():
+    pages = ["a" * 200, "b" * 200, "c" * 200]  # 50 tokens each
+    chunks = Chunker(max_tokens=120, overlap_tokens=0).chunk_pages(pages, first_page=5)
+    assert [(c.first_page, c.last_page) for c in chunks] == [(5, 6), (7, 7)]
+    assert [c.index for c in chunks] == [0, 1]
+    assert all(c.token_count <= 120 for c in chunks)
+
+
+def test_blank_pages_are_skipped():
+    chunks = Chunker(max_tokens=100).chunk_pages(["", "  \n", "text"])
+    assert [(c.first_page, c.last_page) for c in chunks] == [(3, 3)]
+
+
+def test_large_page_is_split_at_headings_first():
+    page = "\n".join(["# Intro", "i" * 120, "# Method", "m" * 120, "# Results", "r" * 120])
+    chunks = Chunker(max_tokens=40, overlap_tokens=0).chunk_pages([page])
+    assert len(chunks) == 3
+    assert [c.text.split("\n")[0] for c in chunks] == ["# Intro", "# Method", "# Results"]
+    assert all((c.first_page, c.last_page) == (1, 1) for c in chunks)
+
+
+def test_unbreakable_text_is_split_by_tokens():
+    chunks = Chunker(max_tokens=10, overlap_tokens=0).chunk_pages(["z" * 100])
+    assert "".join(c.text for c in chunks) == "z" * 100
+    assert all(c.token_count <= 10 for c in chunks)
+
+
+def test_chunks_carry_the_tail_of_the_previous_one():
+    pages = ["a" * 80, "b" * 80]
+    chunks = Chunker(max_tokens=20, overlap_tokens=2).chunk_pages(pages)
+    assert chunks[0].context == ""
+    assert chunks[1].context == "a" * 8
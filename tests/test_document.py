@@ -0,0 +1,94 @@
+import zlib
+
+import pytest
+from PyPDF2.generic import DictionaryObject, IndirectObject, NameObject, NumberObject, StreamObject
+
+from pdf_to_markdown_autogen.utils import document as autogen_document
+from pdf_to_markdown_original import document as original_document
+
+
+@pytest.fixture(params=[original_document, autogen_document], ids=["original", "autogen"])
+def module(request):
+    return request.param
+
+
+def _stream(data: bytes, filter_name: str = "/FlateDecode", reference=None, **parms) -> StreamObject:
+    stream = StreamObject()
+    stream[NameObject("/Filter")] = NameObject(filter_name)
+    if parms:
+        stream[NameObject("/DecodeParms")] = DictionaryObject({NameObject(f"/{k}"): v for k, v in parms.items()})
+    stream._data = data
+    if reference is not None:
+        stream.indirect_reference = IndirectObject(reference[0], reference[1], None)
+    return stream
+
+
+def test_stream_digest_hashes_encoded_bytes_and_filters(module):
+    digest = module._stream_digest
+    data = zlib.compress(b"pixels" * 100)
+    assert digest(_stream(data)) == digest(_stream(data))
+    assert digest(_stream(data)) != digest(_stream(zlib.compress(b"other" * 100)))
+    assert digest(_stream(data)) != digest(_stream(data, filter_name="/LZWDecode"))
+    assert digest(_stream(data)) != digest(_stream(data, Predictor=NumberObject(15)))
+    # Nothing is decoded, so streams PyPDF2 could not decode are hashed too
+    assert digest(_stream(b"not flate data")) != digest(_stream(b"other bytes"))
+
+
+def test_stream_digest_is_stable_across_readers(module):
+    # IndirectObject's repr includes the id of its reader, which differs between runs
+    first = _stream(b"data", ColorSpace=IndirectObject(7, 0, object()))
+    second = _stream(b"data", ColorSpace=IndirectObject(7, 0, object()))
+    assert module._stream_digest(first) == module._stream_digest(second)
+
+
+def test_shared_streams_are_hashed_once_per_document(module, monkeypatch):
+    calls = []
+    real_digest = module._stream_digest
+
+    def counting_digest(stream):
+        calls.append(stream)
+        return real_digest(stream)
+
+    monkeypatch.setattr(module, "_stream_digest", counting_digest)
+    document = module.PDFDocument("unused.pdf")
+    logo = _stream(zlib.compress(b"logo"), reference=(12, 0))
+    for _ in range(400):
+        document.stream_digest(logo)
+    assert len(calls) == 1
+
+    # Inline streams have no reference to cache them by
+    inline = _stream(b"inline")
+    document.stream_digest(inline)
+    document.stream_digest(inline)
+    assert len(calls) == 3
+
+
+class FakeTextSource:
+    page_count = 2
+
+    def __init__(self, opened):
+        self.closed = False
+        opened.append(self)
+
+    def close(self):
+        self.closed = True
+
+
+def test_close_releases_the_text_source(module, monkeypatch):
+    opened = []
+    monkeypatch.setattr(module, "open_text_source", lambda path, backend: FakeTextSource(opened))
+    with module.PDFDocument("unused.pdf") as document:
+        assert document.page_count == 2
+        assert document.page_count == 2
+    assert len(opened) == 1 and opened[0].closed
+    # Closing again is harmless and the engine is reopened on next use
+    document.close()
+    assert document.page_count == 2
+    assert len(opened) == 2 and not opened[1].closed
+
+
+def test_close_without_text_engine(module, monkeypatch):
+    monkeypatch.setattr(module, "open_text_source", lambda path, backend: None)
+    document = module.PDFDocument("unused.pdf")
+    assert document.text_source is None
+    document.close()
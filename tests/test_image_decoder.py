@@ -0,0 +1,206 @@
+import zlib
+
+import numpy as np
+import pytest
+from PyPDF2.generic import (
+    ArrayObject, BooleanObject, ByteStringObject, DictionaryObject, EncodedStreamObject, FloatObject, NameObject,
+    NumberObject
+)
+
+from pdf_to_markdown_original.image_decoder import (
+    UnsupportedImageError, _ascii_hex, _inflate, _run_length, _unfilter_png, _unfilter_tiff, _unpack, codec_data,
+    decode_raw_image, is_raw_image, stream_samples
+)
+
+
+def _pdf(value):
+    """The PyPDF2 object for a plain Python value."""
+    if isinstance(value, bool):
+        return BooleanObject(value)
+    if isinstance(value, int):
+        return NumberObject(value)
+    if isinstance(value, float):
+        return FloatObject(value)
+    if isinstance(value, bytes):
+        return ByteStringObject(value)
+    if isinstance(value, str):
+        return NameObject(value)
+    if isinstance(value, list):
+        return ArrayObject(_pdf(item) for item in value)
+    if isinstance(value, dict):
+        return DictionaryObject({NameObject(f"/{key}"): _pdf(item) for key, item in value.items()})
+    raise TypeError(value)
+
+
+def _image(data: bytes, **entries) -> EncodedStreamObject:
+    """An image XObject with the given stream bytes and dictionary entries, as a reader returns it."""
+    stream = EncodedStreamObject()
+    for key, value in entries.items():
+        stream[NameObject(f"/{key}")] = _pdf(value)
+    stream._data = data
+    return stream
+
+
+def _paeth(left, up, up_left):
+    estimate = left + up - up_left
+    pa, pb, pc = abs(estimate - left), abs(estimate - up), abs(estimate - up_left)
+    if pa <= pb and pa <= pc:
+        return left
+    return up if pb <= pc else up_left
+
+
+def _png_filter(rows: np.ndarray, kinds, bpp: int) -> bytes:
+    """Reference PNG row filtering, one filter type per row."""
+    out = bytearray()
+    previous = [0] * rows.shape[1]
+    for row, kind in zip(rows.tolist(), kinds):
+        out.append(kind)
+        for i, value in enumerate(row):
+            left = row[i - bpp] if i >= bpp else 0
+            up_left = previous[i - bpp] if i >= bpp else 0
+            predicted = [0, left, previous[i], (left + previous[i]) // 2, _paeth(left, previous[i], up_left)][kind]
+            out.append((value - predicted) % 256)
+        previous = row
+    return bytes(out)
+
+
+@pytest.mark.parametrize("kinds", [[0] * 6, [1] * 6, [2] * 6, [3] * 6, [4] * 6, [0, 1, 2, 3, 4, 2], [1, 2, 1, 0, 2, 1]])
+@pytest.mark.parametrize("columns, colors, bits", [(7, 1, 8), (5, 3, 8), (4, 4, 16), (13, 1, 1), (9, 1, 4)])
+def test_png_predictors_round_trip(kinds, columns, colors, bits):
+    rng = np.random.RandomState(columns * colors * bits)
+    row_bytes = (columns * colors * bits + 7) // 8
+    rows = rng.randint(0, 256, size=(len(kinds), row_bytes)).astype(np.uint8)
+    encoded = _png_filter(rows, kinds, bpp=max(1, colors * bits // 8))
+    np.testing.assert_array_equal(_unfilter_png(encoded, columns, colors, bits), rows)
+
+
+def test_png_predictor_rejects_unknown_filter_type():
+    with pytest.raises(UnsupportedImageError):
+        _unfilter_png(bytes([5, 1, 2, 3]), 3, 1, 8)
+
+
+@pytest.mark.parametrize("bits", [8, 16])
+def test_tiff_predictor_round_trip(bits):
+    rng = np.random.RandomState(bits)
+    dtype = np.dtype(">u2") if bits == 16 else np.dtype(np.uint8)
+    samples = rng.randint(0, 1 << bits, size=(4, 5, 3)).astype(dtype)
+    # Each sample minus the one to its left, per component, wrapping around
+    differences = np.diff(samples.astype(np.int64), axis=1, prepend=0) % (1 << bits)
+    encoded = differences.astype(dtype).tobytes()
+    np.testing.assert_array_equal(_unfilter_tiff(encoded, 5, 3, bits), samples.view(np.uint8).reshape(4, -1))
+
+
+def test_tiff_predictor_rejects_packed_samples():
+    with pytest.raises(UnsupportedImageError):
+        _unfilter_tiff(b"\x00", 8, 1, 1)
+
+
+def test_unpack_sub_byte_samples_skips_row_padding():
+    # Two rows of three 2-bit samples, each row padded to a whole byte
+    data = bytes([0b00011011, 0b11100100])
+    np.testing.assert_array_equal(_unpack(data, 3, 2, 1, 2)[..., 0], [[0, 1, 2], [3, 2, 1]])
+    # Rows of ten 1-bit samples take two bytes each
+    data = bytes([0b10101010, 0b11000000, 0b01010101, 0b01000000])
+    np.testing.assert_array_equal(
+        _unpack(data, 10, 2, 1, 1)[..., 0],
+        [[1, 0, 1, 0, 1, 0, 1, 0, 1, 1], [0, 1, 0, 1, 0, 1, 0, 1, 0, 1]],
+    )
+    np.testing.assert_array_equal(_unpack(bytes([0x1F, 0xA0]), 3, 1, 1, 4)[0, :, 0], [1, 15, 10])
+
+
+def test_unpack_16_bit_and_truncated_samples():
+    samples = _unpack(bytes([0x12, 0x34, 0xFF, 0xFF]), 2, 1, 1, 16)
+    np.testing.assert_array_equal(samples[..., 0], [[0x1234, 0xFFFF]])
+    # Missing rows are zero-filled
+    np.testing.assert_array_equal(_unpack(b"\x07", 1, 3, 1, 8)[..., 0], [[7], [0], [0]])
+    with pytest.raises(UnsupportedImageError):
+        _unpack(b"", 1, 1, 1, 3)
+
+
+def test_ascii_and_run_length_filters():
+    assert _ascii_hex(b"48 65 6c\n6C 6>") == b"Hell`"
+    # Copy three literal bytes, repeat one byte four times, end of data
+    assert _run_length(bytes([2, 65, 66, 67, 253, 88, 128, 99])) == b"ABCXXXX"
+
+
+def test_truncated_flate_stream_keeps_what_decompresses():
+    data = bytes(range(256)) * 64
+    compressed = zlib.compress(data)
+    assert _inflate(compressed) == data
+    partial = _inflate(compressed[:len(compressed) // 2])
+    assert 0 < len(partial) < len(data) and data.startswith(partial)
+
+
+def test_stream_samples_undoes_flate_and_png_predictor():
+    rows = np.arange(24, dtype=np.uint8).reshape(4, 6)
+    encoded = zlib.compress(_png_filter(rows, [0, 1, 2, 4], bpp=3))
+    image = _image(
+        encoded, Filter="/FlateDecode", DecodeParms={"Predictor": 15, "Columns": 2, "Colors": 3, "BitsPerComponent": 8}
+    )
+    assert stream_samples(image) == rows.tobytes()
+
+
+def test_stream_samples_applies_filters_in_order():
+    image = _image(zlib.compress(b"ABC").hex().encode() + b">", Filter=["/AHx", "/Fl"])
+    assert is_raw_image(image)
+    assert stream_samples(image) == b"ABC"
+    assert not is_raw_image(_image(b"", Filter="/DCTDecode"))
+    with pytest.raises(UnsupportedImageError):
+        stream_samples(_image(b"", Filter="/JBIG2Decode"))
+
+
+def test_stream_samples_recovers_truncated_flate_streams():
+    data = bytes(range(256)) * 64
+    compressed = zlib.compress(data)
+    # PyPDF2 gives up on the truncated stream; what decompresses is kept
+    samples = stream_samples(_image(compressed[:len(compressed) // 2], Filter="/FlateDecode"))
+    assert 0 < len(samples) < len(data) and data.startswith(samples)
+
+
+def test_stream_samples_undoes_run_length():
+    assert stream_samples(_image(bytes([2, 65, 66, 67, 253, 88, 128]), Filter="/RunLengthDecode")) == b"ABCXXXX"
+
+
+def test_codec_data():
+    jpeg = b"\xff\xd8\xff\xe0 not really a jpeg"
+    assert codec_data(_image(jpeg, Filter="/DCTDecode")) == jpeg
+    # Filters before the codec are undone
+    assert codec_data(_image(zlib.compress(jpeg), Filter=["/FlateDecode", "/DCTDecode"])) == jpeg
+
+
+def test_decode_gray_and_inverted_images():
+    pixels, mode = decode_raw_image(_image(bytes([0, 128, 255, 7]), Width=2, Height=2, ColorSpace="/DeviceGray",
+                                           BitsPerComponent=8))
+    assert mode == "L"
+    np.testing.assert_array_equal(pixels, [[0, 128], [255, 7]])
+
+    pixels, mode = decode_raw_image(_image(bytes([0b10000000]), Width=2, Height=1, ColorSpace="/DeviceGray",
+                                           BitsPerComponent=1, Decode=[1, 0]))
+    np.testing.assert_array_equal(pixels, [[0, 255]])
+
+
+def test_decode_image_mask():
+    pixels, mode = decode_raw_image(_image(bytes([0b01000000]), Width=2, Height=1, ImageMask=True))
+    assert mode == "L"
+    np.testing.assert_array_equal(pixels, [[0, 255]])
+
+
+def test_decode_16_bit_rgb_scales_to_8_bits():
+    data = np.array([[0xFFFF, 0x0000, 0x8000]], dtype=">u2").tobytes()
+    pixels, mode = decode_raw_image(_image(data, Width=1, Height=1, ColorSpace="/DeviceRGB", BitsPerComponent=16))
+    assert mode == "RGB"
+    np.testing.assert_array_equal(pixels, [[[255, 0, 128]]])
+
+
+def test_decode_indexed_image_uses_palette():
+    palette = bytes([255, 0, 0, 0, 0, 255])
+    image = _image(bytes([0b01100000]), Width=3, Height=1, BitsPerComponent=1,
+                   ColorSpace=["/Indexed", "/DeviceRGB", 1, palette])
+    pixels, mode = decode_raw_image(image)
+    assert mode == "RGB"
+    np.testing.assert_array_equal(pixels, [[[255, 0, 0], [0, 0, 255], [0, 0, 255]]])
+
+
+def test_unsupported_color_space():
+    with pytest.raises(UnsupportedImageError):
+        decode_raw_image(_image(b"\x00", Width=1, Height=1, ColorSpace="/Pattern"))
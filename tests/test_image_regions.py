@@ -0,0 +1,74 @@
+import random
+
+import pytest
+
+from pdf_to_markdown_autogen.utils.image_regions import _overlapping_pairs, merge_overlapping_regions
+
+
+def _overlap(a, b):
+    """Boxes overlap or touch."""
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    return ax <= bx + bw and bx <= ax + aw and ay <= by + bh and by <= ay + ah
+
+
+def _merge_pairwise(regions):
+    """Reference: merge any two overlapping boxes until none are left."""
+    regions = list(regions)
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(regions)):
+            for j in range(i + 1, len(regions)):
+                if _overlap(regions[i], regions[j]):
+                    (ax, ay, aw, ah), (bx, by, bw, bh) = regions[i], regions[j]
+                    x1, y1 = min(ax, bx), min(ay, by)
+                    x2, y2 = max(ax + aw, bx + bw), max(ay + ah, by + bh)
+                    regions[i] = (x1, y1, x2 - x1, y2 - y1)
+                    del regions[j]
+                    merged = True
+                    break
+            if merged:
+                break
+    return regions
+
+
+def _random_regions(rng, count, size):
+    return [
+        (rng.randrange(size), rng.randrange(size), rng.randrange(1, size // 8), rng.randrange(1, size // 8))
+        for _ in range(count)
+    ]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_overlapping_pairs_match_brute_force(seed):
+    regions = _random_regions(random.Random(seed), 40, 400)
+    found = {tuple(sorted(pair)) for pair in _overlapping_pairs(regions)}
+    expected = {
+        (i, j) for i in range(len(regions)) for j in range(i + 1, len(regions)) if _overlap(regions[i], regions[j])
+    }
+    assert found == expected
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_merge_matches_pairwise_merging(seed):
+    regions = _random_regions(random.Random(seed), 60, 500)
+    assert sorted(merge_overlapping_regions(regions)) == sorted(_merge_pairwise(regions))
+
+
+def test_chain_of_overlaps_becomes_one_box():
+    # The first and last boxes only overlap through the middle one
+    regions = [(0, 0, 10, 10), (100, 100, 10, 10), (8, 8, 95, 95)]
+    assert merge_overlapping_regions(regions) == [(0, 0, 110, 110)]
+
+
+def test_merged_box_swallows_regions_its_members_missed():
+    # The L-shaped pair's bounding box covers (40, 40), which neither member touches
+    regions = [(0, 0, 50, 10), (0, 0, 10, 50), (40, 40, 5, 5)]
+    assert merge_overlapping_regions(regions) == [(0, 0, 50, 50)]
+
+
+def test_separate_regions_are_kept():
+    regions = [(0, 0, 10, 10), (20, 0, 10, 10), (0, 20, 10, 10)]
+    assert sorted(merge_overlapping_regions(regions)) == sorted(regions)
+    assert merge_overlapping_regions([]) == []
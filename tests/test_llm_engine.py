@@ -0,0 +1,45 @@
+import asyncio
+
+import pytest
+
+from pdf_to_markdown_autogen.utils import llm_engine
+from pdf_to_markdown_autogen.utils.llm_engine import ChatCompletionEngine
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    monkeypatch.setattr(llm_engine, "get_async_client", lambda api_config, api_provider: None)
+    return ChatCompletionEngine({}, "openai", "gpt-4o", max_tokens=1000, max_concurrency=4)
+
+
+def test_replies_are_returned_in_request_order(engine):
+    async def complete(client, semaphore, index, messages, on_result):
+        await asyncio.sleep(0.01 * (3 - index))
+        return f"reply {index}"
+
+    engine._complete = complete
+    assert asyncio.run(engine._complete_all([[]] * 3)) == ["reply 0", "reply 1", "reply 2"]
+
+
+def test_failed_request_cancels_the_rest_of_the_batch(engine):
+    cancelled = []
+
+    async def complete(client, semaphore, index, messages, on_result):
+        if index == 0:
+            await asyncio.sleep(0.01)
+            raise RuntimeError("request failed")
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(index)
+            raise
+        return f"reply {index}"
+
+    async def run_batch():
+        with pytest.raises(RuntimeError, match="request failed"):
+            await engine._complete_all([[]] * 4)
+        # Checked before the loop shuts down, which would cancel leftover tasks anyway
+        return sorted(cancelled)
+
+    engine._complete = complete
+    assert asyncio.run(asyncio.wait_for(run_batch(), timeout=5)) == [1, 2, 3]
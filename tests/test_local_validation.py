@@ -0,0 +1,114 @@
+from pdf_to_markdown_autogen.utils.local_validation import (
+    END_OF_PAGES_MARKER, PageIndex, check_structure, normalize_markdown, page_marker, strip_page_markers,
+    validate_locally, words_with_offsets
+)
+
+PAGE_ONE = "The quick brown fox jumps over the lazy dog near the river bank."
+PAGE_TWO = "Results show that the new method converts tables without losing rows."
+
+
+def test_complete_markdown_has_full_coverage():
+    markdown = f"# Report\n\n{PAGE_ONE}\n\n## Results\n\n{PAGE_TWO}\n"
+    report = validate_locally([PAGE_ONE, PAGE_TWO], markdown)
+    assert report.coverage == 1.0
+    assert [page.coverage for page in report.pages] == [1.0, 1.0]
+    assert not any(page.missing for page in report.pages)
+    assert report.structure_issues == []
+
+
+def test_dropped_text_is_reported_as_a_missing_span():
+    markdown = f"{PAGE_ONE}\n\nResults show that the new method works.\n"
+    report = validate_locally([PAGE_ONE, PAGE_TWO], markdown)
+    assert report.pages[0].coverage == 1.0
+    assert report.pages[1].coverage < 0.5
+    [span] = report.pages[1].missing
+    assert span.page == 2
+    assert span.excerpt.startswith("converts tables without losing rows")
+    assert [page.page for page in report.pages_below(0.9)] == [2]
+    assert "page 2" in report.summary()
+
+
+def test_source_artifacts_and_markdown_syntax_are_ignored():
+    source = "Automatic conver-\nsion of **PDF** documents into Markdown files"
+    markdown = (
+        "<!-- page 1 -->\n"
+        "Automatic **conversion** of PDF documents into [Markdown](https://example.com/markdown-files) files\n"
+        "![Figure 1](images/figure_1.png)\n"
+    )
+    report = validate_locally([source], markdown)
+    assert report.coverage == 1.0
+
+
+def test_empty_and_short_pages():
+    report = validate_locally(["", "Summary"], "# Summary\n")
+    assert [page.coverage for page in report.pages] == [1.0, 1.0]
+    assert report.pages[0].word_count == 0
+
+
+def test_normalize_markdown_keeps_offsets():
+    markdown = "See ![chart](a.png) and [docs](http://x.y) <!-- note -->"
+    normalized = normalize_markdown(markdown)
+    assert len(normalized) == len(markdown)
+    words, offsets = words_with_offsets(normalized)
+    assert words == ["see", "and", "docs"]
+    assert markdown[offsets[2]:offsets[2] + 4] == "docs"
+
+
+def test_check_structure():
+    assert check_structure("| a | b |\n|---|---|\n| 1 | 2 |\n") == []
+    assert check_structure("```python\nprint()\n") == ["Unclosed code fence"]
+    assert check_structure("| a | b |\n| 1 | 2 |\n") == ["Table at line 1 has no header separator"]
+    assert check_structure("| a | b |\n|---|---|\n| 1 | 2 | 3 |\n") == [
+        "Table at line 1 has rows with different column counts"
+    ]
+    assert check_structure("# Title\n\n### Detail\n") == ["Heading level jumps from 1 to 3"]
+
+
+def _marked(*sections):
+    """Markdown as the extractor writes it: a marker before each chunk and one after the last."""
+    parts = [f"{page_marker(first, last)}\n{text}\n" for first, last, text in sections]
+    return "".join(parts) + END_OF_PAGES_MARKER + "\n"
+
+
+def test_page_index_maps_offsets_to_pages():
+    markdown = _marked((1, 1, "# One"), (2, 3, "Two and three"))
+    index = PageIndex.from_markdown(markdown)
+    assert [(a.first_page, a.last_page) for a in index.anchors] == [(1, 1), (2, 3)]
+    assert [a.label for a in index.anchors] == ["page 1", "pages 2-3"]
+    assert markdown[index.anchors[1].start:index.anchors[1].end] == "\nTwo and three\n"
+
+    assert index.anchor_at(markdown.index("One")) is index.anchors[0]
+    assert index.anchor_at(markdown.index("three")) is index.anchors[1]
+    assert index.anchor_at(0) is None  # Inside the first marker
+    assert index.anchor_at(len(markdown) - 1) is None  # After the end marker
+    assert index.anchor_for_page(3) is index.anchors[1]
+    assert index.anchor_for_page(4) is None
+    assert index.line_range(markdown, index.anchors[1]) == (4, 4)
+
+
+def test_page_split_across_chunks_is_one_anchor():
+    markdown = _marked((1, 2, "First half"), (2, 2, "second half"), (3, 3, "Next page"))
+    index = PageIndex.from_markdown(markdown)
+    assert [(a.first_page, a.last_page) for a in index.anchors] == [(1, 2), (3, 3)]
+    text = markdown[index.anchors[0].start:index.anchors[0].end]
+    assert "First half" in text and "second half" in text
+
+
+def test_markdown_without_markers_has_an_empty_index():
+    assert not PageIndex.from_markdown("# Plain markdown\n")
+
+
+def test_pages_are_only_compared_with_their_own_markdown():
+    # Page two's text was converted under page one's marker, and page two's chunk came back empty
+    markdown = _marked((1, 1, f"{PAGE_ONE}\n\n{PAGE_TWO}"), (2, 2, ""))
+    report = validate_locally([PAGE_ONE, PAGE_TWO], markdown)
+    assert report.pages[0].coverage == 1.0
+    assert report.pages[1].coverage == 0.0
+    anchor = PageIndex.from_markdown(markdown).anchors[0]
+    assert report.pages[0].markdown_span == (anchor.start, anchor.end)
+
+
+def test_strip_page_markers():
+    markdown = _marked((1, 1, "# One"), (2, 3, "Two"))
+    assert strip_page_markers(markdown) == "# One\nTwo\n"
+    assert strip_page_markers("# Keep <!-- other comments -->\n") == "# Keep <!-- other comments -->\n"
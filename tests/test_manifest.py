@@ -0,0 +1,57 @@
+import json
+
+from pdf_to_markdown_autogen.utils.manifest import ConversionManifest, contiguous_runs
+
+
+def test_contiguous_runs():
+    assert contiguous_runs([]) == []
+    assert contiguous_runs([5, 1, 2, 3, 7, 6, 2]) == [(1, 3), (5, 7)]
+    assert contiguous_runs([4]) == [(4, 4)]
+
+
+def test_changed_pages():
+    manifest = ConversionManifest(["a", "b", "c"])
+    assert manifest.changed_pages(["a", "b", "c"]) == set()
+    assert manifest.changed_pages(["a", "x", "c"]) == {2}
+    # Pages added at the end are changed; removed ones are not reported
+    assert manifest.changed_pages(["a", "b", "c", "d"]) == {4}
+    assert manifest.changed_pages(["a", "b"]) == set()
+
+
+def test_reusable_chunks_skip_changed_and_removed_pages():
+    chunks = [
+        {"first_page": 1, "last_page": 2, "markdown": "one"},
+        {"first_page": 3, "last_page": 3, "markdown": "two"},
+        {"first_page": 4, "last_page": 5, "markdown": "three"},
+    ]
+    manifest = ConversionManifest(["a"] * 5, chunks)
+    assert manifest.reusable_chunks({2}, page_count=5) == chunks[1:]
+    assert manifest.reusable_chunks(set(), page_count=4) == chunks[:2]
+
+
+def test_save_and_load_round_trip(tmp_path):
+    path = ConversionManifest.path_for(tmp_path / "doc.md")
+    assert path == tmp_path / "doc.manifest.json"
+    manifest = ConversionManifest(
+        ["a", "b"],
+        [{"first_page": 1, "last_page": 2, "markdown": "# Título"}],
+        [("images/doc_1.png", 1, (1, 2, 3, 4))],
+        model="gpt-4o",
+    )
+    manifest.save(path)
+    assert not path.with_name(path.name + ".tmp").exists()
+
+    loaded = ConversionManifest.load(path)
+    assert loaded.page_fingerprints == manifest.page_fingerprints
+    assert loaded.chunks == manifest.chunks
+    assert loaded.images == manifest.images
+    assert loaded.model == "gpt-4o"
+
+
+def test_load_ignores_missing_unsupported_and_corrupt_manifests(tmp_path):
+    path = tmp_path / "doc.manifest.json"
+    assert ConversionManifest.load(path) is None
+    path.write_text(json.dumps({"version": 999, "page_fingerprints": [], "chunks": []}))
+    assert ConversionManifest.load(path) is None
+    path.write_text("{not json")
+    assert ConversionManifest.load(path) is None
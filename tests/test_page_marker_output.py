@@ -0,0 +1,69 @@
+import pytest
+
+from pdf_to_markdown_autogen import converter, run_autogen
+from pdf_to_markdown_autogen.utils.local_validation import END_OF_PAGES_MARKER, page_marker
+
+MARKED = f"{page_marker(1, 1)}\n# Title\n{page_marker(2, 3)}\nBody text\n{END_OF_PAGES_MARKER}\n"
+
+
+class FakeDocument:
+    page_count = 3
+
+    def __init__(self, pdf_path):
+        self.pdf_path = pdf_path
+
+    def page_text(self, index):
+        return "Source text " * 20
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class FakeExtractor:
+    def __init__(self, config, **kwargs):
+        pass
+
+    def extract_content(self, pdf_path, document=None):
+        return MARKED
+
+    def extract_text(self, document):
+        return document.page_text(0)
+
+
+class FakeValidator:
+    def __init__(self, config):
+        pass
+
+    def validate_markdown(self, markdown, original):
+        return True, "ok"
+
+
+@pytest.fixture
+def fake_agents(monkeypatch):
+    for module in (converter, run_autogen):
+        monkeypatch.setattr(module, "PDFDocument", FakeDocument)
+        monkeypatch.setattr(module, "PDFExtractorAgent", FakeExtractor)
+        monkeypatch.setattr(module, "MDValidatorAgent", FakeValidator)
+    monkeypatch.setattr(run_autogen, "get_azure_config", lambda: {})
+
+
+def test_converter_returns_markdown_without_page_markers(fake_agents):
+    markdown = converter.PDFToMarkdownConverter(config={}).convert("doc.pdf")
+    assert "<!-- page" not in markdown
+    assert END_OF_PAGES_MARKER not in markdown
+    assert markdown == "# Title\nBody text\n"
+
+
+def test_run_autogen_writes_markdown_without_page_markers(fake_agents, tmp_path):
+    output_file = tmp_path / "doc.md"
+    run_autogen.convert_pdf_to_markdown("doc.pdf", str(output_file))
+    markdown = output_file.read_text(encoding="utf-8")
+    assert "<!-- page" not in markdown
+    assert END_OF_PAGES_MARKER not in markdown
+    assert markdown == "# Title\nBody text\n"
@@ -0,0 +1,29 @@
+import logging
+
+import pytest
+
+from pdf_to_markdown_autogen.config import ProcessingConfig
+from pdf_to_markdown_autogen.utils import pdf_backend
+from pdf_to_markdown_autogen.utils.pdf_backend import RENDER_FALLBACK, resolve_backend
+
+
+@pytest.fixture(autouse=True)
+def fresh_resolution(monkeypatch):
+    # Every engine is "installed"; results are cached per name
+    monkeypatch.setattr(pdf_backend.importlib.util, "find_spec", lambda module: object())
+    resolve_backend.cache_clear()
+    yield
+    resolve_backend.cache_clear()
+
+
+def test_render_backend_defaults_to_pdf2image(monkeypatch):
+    monkeypatch.delenv("PDF_RENDER_BACKEND", raising=False)
+    assert ProcessingConfig().render_backend == RENDER_FALLBACK
+
+
+def test_fast_engines_are_opt_in(caplog):
+    assert resolve_backend(RENDER_FALLBACK, RENDER_FALLBACK) == RENDER_FALLBACK
+    assert resolve_backend("", RENDER_FALLBACK) == RENDER_FALLBACK
+    with caplog.at_level(logging.INFO, logger=pdf_backend.__name__):
+        assert resolve_backend("auto", RENDER_FALLBACK) == "pypdfium2"
+    assert "using pypdfium2 instead of pdf2image" in caplog.text
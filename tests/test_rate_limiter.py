@@ -0,0 +1,107 @@
+import pytest
+
+from pdf_to_markdown_autogen.utils import rate_limiter
+from pdf_to_markdown_autogen.utils.rate_limiter import (
+    MAX_SLOWDOWN, SLOWDOWN_HALF_LIFE, RateLimiter, parse_reset_duration, retry_after_seconds
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter.time, "monotonic", clock)
+    return clock
+
+
+@pytest.mark.parametrize("value, seconds", [
+    ("6", 6.0), ("1.5", 1.5), ("250ms", 0.25), ("1m30s", 90.0), ("2h", 7200.0), ("", None), (None, None), ("soon", None),
+])
+def test_parse_reset_duration(value, seconds):
+    assert parse_reset_duration(value) == seconds
+
+
+def test_retry_after_seconds():
+    assert retry_after_seconds(None) is None
+    assert retry_after_seconds({}) is None
+    assert retry_after_seconds({"retry-after": "7"}) == 7.0
+    # The millisecond header is more precise and wins
+    assert retry_after_seconds({"retry-after-ms": "1500", "retry-after": "7"}) == 1.5
+    # HTTP dates are not supported
+    assert retry_after_seconds({"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"}) is None
+
+
+def test_requests_are_spaced_evenly(clock):
+    limiter = RateLimiter(requests_per_minute=60)
+    assert [limiter.reserve() for _ in range(3)] == [0.0, 1.0, 2.0]
+    clock.now += 10
+    assert limiter.reserve() == 0.0
+
+
+def test_tokens_may_burst_then_wait(clock):
+    limiter = RateLimiter(requests_per_minute=0, tokens_per_minute=600)
+    # Ten seconds' worth of tokens are available at once
+    assert limiter.reserve(100) == 0.0
+    assert limiter.reserve(50) == pytest.approx(5.0)
+    # Usage lower than estimated is given back
+    limiter.adjust_tokens(-50)
+    assert limiter.reserve(10) == pytest.approx(1.0)
+
+
+def test_rate_limit_pauses_and_slows_down(clock):
+    limiter = RateLimiter(requests_per_minute=60)
+    limiter.reserve()
+    assert limiter.on_rate_limited(retry_after=None, fallback=5.0) == 5.0
+    assert limiter.slowdown == 2.0
+    # Everyone waits out the pause, and the budget refills at half speed
+    clock.now += 1
+    assert limiter.reserve() == pytest.approx(4.0)
+    clock.now += 10
+    limiter.reserve()
+    assert limiter.slowdown > 1.0
+    assert limiter.reserve() == pytest.approx(limiter.slowdown)
+
+
+def test_server_retry_after_is_used(clock):
+    limiter = RateLimiter(requests_per_minute=60)
+    assert limiter.on_rate_limited(retry_after=12.0, fallback=5.0) == 12.0
+    # A shorter pause does not cut an earlier one short
+    assert limiter.on_rate_limited(retry_after=1.0, fallback=5.0) == 12.0
+
+
+def test_slowdown_is_capped_and_decays(clock):
+    limiter = RateLimiter(requests_per_minute=60)
+    for _ in range(10):
+        limiter.on_rate_limited(retry_after=0.0, fallback=0.0)
+    assert limiter.slowdown == MAX_SLOWDOWN
+
+    clock.now += SLOWDOWN_HALF_LIFE
+    limiter.reserve()
+    assert limiter.slowdown == pytest.approx(MAX_SLOWDOWN / 2)
+    clock.now += 10 * SLOWDOWN_HALF_LIFE
+    limiter.reserve()
+    assert limiter.slowdown == 1.0
+
+
+def test_headers_tighten_limits_and_pause_exhausted_windows(clock):
+    limiter = RateLimiter(requests_per_minute=600)
+    limiter.observe_headers({
+        "x-ratelimit-limit-requests": "60",
+        "x-ratelimit-limit-tokens": "30000",
+        "x-ratelimit-remaining-tokens": "0",
+        "x-ratelimit-reset-tokens": "3s",
+    })
+    assert limiter.requests.per_minute == 60
+    assert limiter.tokens.per_minute == 30000
+    assert limiter.reserve() == pytest.approx(3.0)
+
+    # A higher reported limit is not adopted
+    limiter.observe_headers({"x-ratelimit-limit-requests": "6000"})
+    assert limiter.requests.per_minute == 60
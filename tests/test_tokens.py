@@ -0,0 +1,72 @@
+import sys
+import types
+
+from pdf_to_markdown_autogen.utils import tokens
+
+
+def _fake_tiktoken(monkeypatch, encoding_for_model, get_encoding):
+    module = types.ModuleType("tiktoken")
+    module.encoding_for_model = encoding_for_model
+    module.get_encoding = get_encoding
+    monkeypatch.setitem(sys.modules, "tiktoken", module)
+
+
+def test_unknown_model_uses_gpt4_encoding(monkeypatch):
+    def encoding_for_model(model):
+        raise KeyError(model)
+
+    _fake_tiktoken(monkeypatch, encoding_for_model, lambda name: f"encoding {name}")
+    assert tokens._get_encoding.__wrapped__("my-azure-deployment") == "encoding cl100k_base"
+
+
+def test_encoding_download_failure_falls_back_to_estimate(monkeypatch):
+    def encoding_for_model(model):
+        raise KeyError(model)
+
+    def get_encoding(name):
+        raise OSError("network is unreachable")
+
+    _fake_tiktoken(monkeypatch, encoding_for_model, get_encoding)
+    assert tokens._get_encoding.__wrapped__("my-azure-deployment") is None
+
+
+def test_estimate_rounds_up():
+    assert tokens.estimate_tokens("") == 0
+    assert tokens.estimate_tokens("abcd") == 1
+    assert tokens.estimate_tokens("abcde") == 2
+
+
+def test_count_message_tokens_adds_chat_overhead(no_tokenizer):
+    messages = [{"role": "system", "content": "a" * 8}, {"role": "user", "content": "b" * 4}]
+    expected = tokens.REPLY_OVERHEAD_TOKENS + 2 * tokens.MESSAGE_OVERHEAD_TOKENS + 2 + 1
+    assert tokens.count_message_tokens(messages) == expected
+    assert tokens.count_message_tokens(messages, estimate=True) == expected
+
+
+def test_split_by_tokens_without_tokenizer(no_tokenizer):
+    text = "x" * 50
+    pieces = tokens.split_by_tokens(text, 3)
+    assert "".join(pieces) == text
+    assert all(len(piece) <= 3 * tokens.CHARS_PER_TOKEN for piece in pieces)
+
+
+def test_tail_tokens_without_tokenizer(no_tokenizer):
+    assert tokens.tail_tokens("0123456789", 2) == "23456789"
+    assert tokens.tail_tokens("0123456789", 0) == ""
+
+
+def test_model_limits_match_longest_prefix():
+    assert tokens.model_limits("gpt-4-32k-0613") == tokens.MODEL_LIMITS["gpt-4-32k"]
+    assert tokens.model_limits("gpt-4o-mini") == tokens.MODEL_LIMITS["gpt-4o"]
+    assert tokens.model_limits("gpt-4", context_window=1000) == tokens.ModelLimits(1000, 1000)
+
+
+def test_chunk_token_budget_fits_reply_and_context():
+    limits = tokens.ModelLimits(context_window=8192, max_output_tokens=4096)
+    # The converted reply is the tighter bound
+    assert tokens.chunk_token_budget(limits, 4096, prompt_overhead=500) == int(4096 / tokens.MARKDOWN_EXPANSION)
+    # The context window is the tighter bound
+    assert tokens.chunk_token_budget(limits, 4096, prompt_overhead=3000) == 8192 - 3000 - 4096
+    assert tokens.chunk_token_budget(limits, 4096, prompt_overhead=500, requested=100) == 100
+    # Never below the smallest useful request
+    assert tokens.chunk_token_budget(limits, 4096, prompt_overhead=8000) == tokens.MIN_REPLY_TOKENS